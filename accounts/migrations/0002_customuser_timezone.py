@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:56
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="timezone",
+            field=models.CharField(
+                default="UTC",
+                max_length=64,
+                validators=[accounts.models.validate_timezone],
+                verbose_name="Time Zone",
+            ),
+        ),
+    ]
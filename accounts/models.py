@@ -1,7 +1,15 @@
+from zoneinfo import available_timezones
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
 
 
+def validate_timezone(value):
+    if value not in available_timezones():
+        raise ValidationError(f"Unknown time zone {value!r}.")
+
+
 class CustomUserManager(BaseUserManager):
     
     def create_user(self, email, password=None, **extra_fields):
@@ -34,6 +42,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField('Active', default=True)
     is_staff = models.BooleanField('Staff', default=False)
     is_superuser = models.BooleanField('Super User', default=False)
+    # IANA name, used to date journal entries in the user's local calendar.
+    timezone = models.CharField(
+        "Time Zone", max_length=64, default="UTC", validators=[validate_timezone]
+    )
     objects = CustomUserManager()
     USERNAME_FIELD = 'email'
 
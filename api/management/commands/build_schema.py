@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.schema import build_schema, code_version, schema_settings
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema of this code version into its file cache."
+
+    def handle(self, *args, **options):
+        path = schema_settings()["PATH"]
+        if not path:
+            raise CommandError('API_SCHEMA["PATH"] is not set.')
+        version = code_version()
+        schema = build_schema(version)
+        self.stdout.write(
+            f"Wrote {len(schema['paths'])} paths of version {version} to {path}."
+        )
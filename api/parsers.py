@@ -0,0 +1,60 @@
+"""
+Parsers used by the API.
+
+``ORJSONParser`` decodes UTF-8 JSON bodies with orjson and falls back to
+DRF's ``JSONParser`` for other encodings or when orjson is not installed.
+``MessagePackParser`` reads the encoding written by ``MessagePackRenderer``,
+returning UUID and datetime objects for the extension types.
+"""
+
+import uuid
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import (
+    MSGPACK_UUID_EXT,
+    MessagePackRenderer,
+    ORJSONRenderer,
+    msgpack,
+    orjson,
+)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+def _ext_hook(code, data):
+    if code == MSGPACK_UUID_EXT and len(data) == 16:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(
+                stream.read(),
+                ext_hook=_ext_hook,
+                timestamp=3,
+                raw=False,
+                strict_map_key=False,
+            )
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError("MessagePack parse error - %s" % str(exc))
@@ -0,0 +1,147 @@
+"""
+On-demand sampling profiler for single API requests.
+
+A staff user adds the ``X-Profile: 1`` header (or ``?_profile=1``) to a
+request; while the view runs, a background thread samples the request
+thread's stack every ``INTERVAL`` seconds. The samples are stored in the
+cache in the collapsed-stack format understood by flamegraph.pl and
+speedscope, keyed by the request id returned in ``X-Profile-Id``.
+Profiling is disabled unless ``API_PROFILING["ENABLED"]`` is set.
+"""
+
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULTS = {
+    "ENABLED": False,
+    "INTERVAL": 0.005,
+    "MAX_SAMPLES": 2000,
+    "RETENTION": 3600,
+    "MAX_PROFILES": 50,
+}
+PROFILE_KEY = "api-profile:{}"
+INDEX_KEY = "api-profile:index"
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def profiling_settings():
+    return {**DEFAULTS, **getattr(settings, "API_PROFILING", {})}
+
+
+class SamplingProfiler:
+    """Sample the call stack of the calling thread at a fixed interval."""
+
+    def __init__(self, interval, max_samples):
+        self.interval = interval
+        self.max_samples = max_samples
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                break
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+            if self.samples >= self.max_samples:
+                break
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def collapsed(self):
+        """Return the samples as ``frame;frame;frame count`` lines."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.items())
+
+
+def profiling_requested(request):
+    if not profiling_settings()["ENABLED"]:
+        return False
+    user = request.user
+    if not (user and user.is_staff):
+        return False
+    return (
+        request.headers.get("X-Profile") == "1"
+        or request.query_params.get("_profile") == "1"
+    )
+
+
+def request_id_for(request):
+    request_id = request.headers.get("X-Request-ID", "")
+    if REQUEST_ID_RE.match(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+def store_profile(request_id, profiler):
+    """Keep the profile for ``RETENTION`` seconds, and only the latest few."""
+    options = profiling_settings()
+    cache.set(PROFILE_KEY.format(request_id), profiler.collapsed(), options["RETENTION"])
+
+    index = [rid for rid in cache.get(INDEX_KEY, []) if rid != request_id]
+    index.append(request_id)
+    expired, index = index[: -options["MAX_PROFILES"]], index[-options["MAX_PROFILES"]:]
+    cache.delete_many([PROFILE_KEY.format(rid) for rid in expired])
+    cache.set(INDEX_KEY, index, options["RETENTION"])
+
+
+def get_profile(request_id):
+    return cache.get(PROFILE_KEY.format(request_id))
+
+
+class ProfilingMixin:
+    """Profile the handler and rendering of requests that ask for it."""
+
+    def initial(self, request, *args, **kwargs):
+        self._profiler = None
+        super().initial(request, *args, **kwargs)
+        if profiling_requested(request):
+            options = profiling_settings()
+            self._profiler = SamplingProfiler(
+                options["INTERVAL"], options["MAX_SAMPLES"]
+            )
+            self._profiler.start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profiler = getattr(self, "_profiler", None)
+        if profiler is None:
+            return response
+
+        # Rendering is a large share of list requests, so include it.
+        try:
+            if not getattr(response, "is_rendered", True):
+                response.render()
+        finally:
+            profiler.stop()
+            self._profiler = None
+        request_id = request_id_for(request)
+        store_profile(request_id, profiler)
+        response["X-Profile-Id"] = request_id
+        return response
@@ -0,0 +1,271 @@
+"""
+Application of the changes pushed by offline clients.
+
+Entry changes are applied before answer changes, so an answer can belong to
+an entry created in the same push. Each model is locked, validated and
+written with a fixed number of queries whatever the number of changes: the
+upserts go out as one ``INSERT ... ON CONFLICT DO UPDATE``, the deletes as
+one ``DELETE``.
+
+Conflicts are resolved server-wins. A change whose ``base_version`` is not
+the object's current ``updated_at`` (null for an object the client created)
+is not applied and its result carries the server copy, or null when the
+object was deleted, for the client to rebase on. Deleting an object that is
+already gone succeeds.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from journal.models import (
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+    local_date,
+)
+from journal.analytics import invalidate_field_analytics
+from journal.completeness import refresh_missing_required
+from journal.counters import apply_count_deltas, move_deltas
+from journal.facets import field_category_owner_ids, invalidate_category_facets
+from journal.sync import publish_changes
+
+from .serializers import (
+    EntryFieldAnswerPushSerializer,
+    EntryFieldAnswerSerializer,
+    JournalEntryPushSerializer,
+    JournalEntrySerializer,
+)
+
+version_field = serializers.DateTimeField()
+
+
+def outcome(change, status, **extra):
+    return {"model": change["model"], "uuid": change["uuid"], "status": status, **extra}
+
+
+def check_version(change, current, owner_id, user, serializer_class):
+    """Return the result of a change that cannot be applied, else ``None``."""
+    if current is not None and owner_id != user.pk:
+        return outcome(change, "rejected", errors={"detail": "Not found."})
+    base_version = change.get("base_version")
+    if current is None:
+        if change["op"] == "delete":
+            return outcome(change, "applied", version=None)
+        if base_version is not None:
+            return outcome(change, "conflict", current=None)
+        return None
+    if base_version != current.updated_at:
+        return outcome(change, "conflict", current=serializer_class(current).data)
+    return None
+
+
+def validate_data(change, current, serializer_class):
+    serializer = serializer_class(data=change["data"], partial=current is not None)
+    if not serializer.is_valid():
+        return None, outcome(change, "rejected", errors=serializer.errors)
+    return serializer.validated_data, None
+
+
+def write(model, rows, deletes, update_fields):
+    model.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["uuid"],
+        update_fields=[*update_fields, "updated_at"],
+    )
+    if rows:
+        publish_changes(model, rows)
+    if deletes:
+        model.objects.filter(uuid__in=deletes).delete()
+
+
+def apply_entry_changes(user, changes, results):
+    existing = JournalEntry.objects.select_for_update().in_bulk(
+        [change["uuid"] for _, change in changes]
+    )
+
+    pending = []
+    for index, change in changes:
+        current = existing.get(change["uuid"])
+        owner_id = current.created_by_id if current is not None else None
+        results[index] = check_version(
+            change, current, owner_id, user, JournalEntrySerializer
+        )
+        data = None
+        if results[index] is None and change["op"] == "upsert":
+            data, results[index] = validate_data(
+                change, current, JournalEntryPushSerializer
+            )
+        if results[index] is None:
+            pending.append((index, change, current, data))
+
+    template_ids = {
+        data["template"] for _, _, _, data in pending if data and data.get("template")
+    }
+    templates = set(
+        Template.objects.filter(
+            created_by=user, uuid__in=template_ids, deleting=False
+        ).values_list("uuid", flat=True)
+    )
+
+    today = local_date(timezone.now(), user)
+    rows, deletes, moves, moved = [], [], [], []
+    for index, change, current, data in pending:
+        if change["op"] == "delete":
+            deletes.append(current.uuid)
+            results[index] = outcome(change, "applied", version=None)
+            continue
+        if data.get("template") and data["template"] not in templates:
+            results[index] = outcome(
+                change, "rejected", errors={"template": ["Template not found."]}
+            )
+            continue
+        row = current or JournalEntry(
+            uuid=change["uuid"], created_by=user, entry_date=today
+        )
+        old_template_id = row.template_id
+        for key, value in data.items():
+            setattr(row, "template_id" if key == "template" else key, value)
+        moves.append((old_template_id, row.template_id))
+        if current is None or old_template_id != row.template_id:
+            moved.append(row.pk)
+        rows.append((index, change, row))
+
+    write(
+        JournalEntry,
+        [row for _, _, row in rows],
+        deletes,
+        ["title", "template", "quote_of_the_day", "rate_your_day"],
+    )
+    apply_count_deltas("entries_count", move_deltas(moves))
+    if moved:
+        refresh_missing_required(JournalEntry.objects.filter(pk__in=moved))
+    if rows or deletes:
+        invalidate_field_analytics(user.pk)
+    for index, change, row in rows:
+        results[index] = outcome(
+            change, "applied", version=version_field.to_representation(row.updated_at)
+        )
+
+
+def apply_answer_changes(user, changes, results):
+    existing = (
+        EntryFieldAnswer.objects.select_related("entry")
+        .select_for_update(of=("self",))
+        .in_bulk([change["uuid"] for _, change in changes])
+    )
+
+    pending = []
+    for index, change in changes:
+        current = existing.get(change["uuid"])
+        owner_id = current.entry.created_by_id if current is not None else None
+        results[index] = check_version(
+            change, current, owner_id, user, EntryFieldAnswerSerializer
+        )
+        data = None
+        if results[index] is None and change["op"] == "upsert":
+            data, results[index] = validate_data(
+                change, current, EntryFieldAnswerPushSerializer
+            )
+        if results[index] is None:
+            pending.append((index, change, current, data))
+
+    upserts = [item for item in pending if item[1]["op"] == "upsert"]
+    entry_ids = {data["entry"] for *_, data in upserts if "entry" in data}
+    field_ids = {data["field"] for *_, data in upserts if "field" in data}
+    entries = set(
+        JournalEntry.objects.filter(created_by=user, uuid__in=entry_ids).values_list(
+            "uuid", flat=True
+        )
+    )
+    fields = set(
+        TemplateField.objects.filter(
+            template__created_by=user, template__deleting=False, id__in=field_ids
+        ).values_list("id", flat=True)
+    )
+    # Answers are unique per entry and field, whatever uuid a client minted.
+    taken = {
+        (answer.entry_id, answer.field_id): answer
+        for answer in EntryFieldAnswer.objects.filter(
+            entry_id__in=entry_ids, field_id__in=field_ids
+        )
+    }
+
+    rows, deletes, claimed, answered, touched = [], [], set(), set(), set()
+    for index, change, current, data in pending:
+        if change["op"] == "delete":
+            deletes.append(current.uuid)
+            touched.add(current.entry_id)
+            results[index] = outcome(change, "applied", version=None)
+            continue
+        errors = {}
+        for key, known in (("entry", entries), ("field", fields)):
+            if current is not None and key in data:
+                if data[key] != getattr(current, f"{key}_id"):
+                    errors[key] = ["Cannot be changed."]
+            elif current is None and data[key] not in known:
+                errors[key] = [f"{key.capitalize()} not found."]
+        if errors:
+            results[index] = outcome(change, "rejected", errors=errors)
+            continue
+
+        row = current
+        if row is None:
+            pair = (data["entry"], data["field"])
+            if pair in taken:
+                results[index] = outcome(
+                    change,
+                    "conflict",
+                    current=EntryFieldAnswerSerializer(taken[pair]).data,
+                )
+                continue
+            if pair in claimed:
+                results[index] = outcome(
+                    change,
+                    "rejected",
+                    errors={"field": ["Answered twice in this push."]},
+                )
+                continue
+            claimed.add(pair)
+            row = EntryFieldAnswer(
+                uuid=change["uuid"], entry_id=data["entry"], field_id=data["field"]
+            )
+            answered.add(row.field_id)
+        if "value" in data:
+            row.value = data["value"]
+        touched.add(row.entry_id)
+        rows.append((index, change, row))
+
+    write(EntryFieldAnswer, [row for _, _, row in rows], deletes, ["value"])
+    if answered:
+        invalidate_category_facets(*field_category_owner_ids(answered))
+    if touched:
+        refresh_missing_required(JournalEntry.objects.filter(pk__in=touched))
+        invalidate_field_analytics(user.pk)
+    for index, change, row in rows:
+        results[index] = outcome(
+            change, "applied", version=version_field.to_representation(row.updated_at)
+        )
+
+
+APPLIERS = {
+    "journal_entry": apply_entry_changes,
+    "entry_field_answer": apply_answer_changes,
+}
+
+
+def apply_changes(user, changes):
+    """Apply the changes in one transaction and return a result for each."""
+    results = [None] * len(changes)
+    with transaction.atomic():
+        for model, apply in APPLIERS.items():
+            indexed = [
+                (index, change)
+                for index, change in enumerate(changes)
+                if change["model"] == model
+            ]
+            if indexed:
+                apply(user, indexed, results)
+    return results
@@ -0,0 +1,179 @@
+"""
+The OpenAPI schema, generated once per code version.
+
+Introspecting every view and serializer takes hundreds of milliseconds, so
+``CachedSchemaView`` serves a schema generated on first use, or ahead of
+time by ``manage.py build_schema``, and kept in memory with each rendering
+of it. The schema is also written to ``API_SCHEMA["PATH"]`` so other
+processes of the same release load it instead of generating it again; a
+request still gets the schema when the path is not writable.
+
+The code version comes from ``API_SCHEMA["CODE_VERSION"]``, typically the
+commit deployed; without one it is derived from the size and modification
+time of the project's source files. Responses carry an ``ETag`` and
+``If-None-Match`` requests for an unchanged schema get a 304, also when they
+send the weak ETag of a compressed response.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from functools import cache
+from pathlib import Path
+
+import drf_spectacular
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+DEFAULTS = {
+    "CODE_VERSION": None,
+    "PATH": None,
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cached = None
+
+
+def schema_settings():
+    return {**DEFAULTS, **getattr(settings, "API_SCHEMA", {})}
+
+
+def code_version():
+    """Return the configured code version or a digest of the project sources."""
+    return schema_settings()["CODE_VERSION"] or source_digest()
+
+
+@cache
+def source_digest():
+    # Sources only change under the autoreloader, which restarts the process.
+    digest = hashlib.sha256(drf_spectacular.__version__.encode())
+    base = Path(settings.BASE_DIR)
+    roots = [Path(settings.SETTINGS_MODULE.split(".")[0])]
+    roots += [
+        Path(config.path).relative_to(base)
+        for config in apps.get_app_configs()
+        if Path(config.path).is_relative_to(base)
+    ]
+    for root in sorted(set(roots)):
+        for path in sorted((base / root).rglob("*.py")):
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def generate_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+class CachedSchema:
+    def __init__(self, version, schema):
+        self.version = version
+        self.schema = schema
+        self.digest = hashlib.sha256(
+            json.dumps(schema, sort_keys=True, default=str).encode()
+        ).hexdigest()[:32]
+        self.rendered = {}
+
+    def etag(self, renderer):
+        return f'"{self.digest}-{renderer.format}"'
+
+    def render(self, renderer, media_type):
+        """Return the schema rendered by ``renderer``, rendering it only once."""
+        key = (type(renderer), media_type)
+        if key not in self.rendered:
+            self.rendered[key] = renderer.render(self.schema, media_type, {})
+        return self.rendered[key]
+
+
+def read_schema(path, version):
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stored.get("version") != version:
+        return None
+    return stored["schema"]
+
+
+def write_schema(path, version, schema):
+    """Write ``schema`` to ``path`` atomically, so readers never see half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as f:
+        json.dump({"version": version, "schema": schema}, f, default=str)
+    os.replace(f.name, path)
+
+
+def build_schema(version=None):
+    """Generate the schema and store it in the file cache under ``version``."""
+    version = version or code_version()
+    schema = generate_schema()
+    path = schema_settings()["PATH"]
+    if path:
+        write_schema(path, version, schema)
+    return schema
+
+
+def cached_schema():
+    """Return the schema of this code version from memory, the file or afresh."""
+    global _cached
+    version = code_version()
+    cached = _cached
+    if cached is not None and cached.version == version:
+        return cached
+    # One thread generates the schema while the others wait for it.
+    with _lock:
+        if _cached is None or _cached.version != version:
+            path = schema_settings()["PATH"]
+            schema = read_schema(path, version) if path else None
+            if schema is None:
+                schema = generate_schema()
+                if path:
+                    try:
+                        write_schema(path, version, schema)
+                    except OSError:
+                        # Other processes generate it too, but serve it anyway.
+                        logger.exception("Could not write the API schema to %s", path)
+            _cached = CachedSchema(version, schema)
+        return _cached
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """``SpectacularAPIView`` serving the cached schema with an ``ETag``."""
+
+    def _get_schema_response(self, request):
+        cached = cached_schema()
+        renderer, media_type = request.accepted_renderer, request.accepted_media_type
+        etag = cached.etag(renderer)
+        # A weak comparison, the compression middleware weakens the ETag.
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = media_type
+            if renderer.charset:
+                content_type = f"{media_type}; charset={renderer.charset}"
+            response = HttpResponse(
+                cached.render(renderer, media_type), content_type=content_type
+            )
+            response["Content-Disposition"] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ["Accept"])
+        return response
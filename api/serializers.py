@@ -1,6 +1,14 @@
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import serializers
 from accounts.models import CustomUser
-from journal.models import Template, Category, JournalEntry, TemplateField, EntryFieldAnswer
+from journal.models import Template, Category, JournalEntry, TemplateField, EntryFieldAnswer, DeletionJob, ExportJob, WeeklyDigest
+from journal.completeness import refresh_missing_required
+from journal.exports import available_formats
+from journal.facets import category_owner_ids, invalidate_category_facets
+from journal.sync import sync_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -46,6 +54,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
             "email",
             "id",
             "is_staff",
+            "timezone",
             "password",
             "access",
             "refresh",
@@ -89,12 +98,17 @@ class TemplateSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "created_by",
+            "fields_count",
+            "entries_count",
             "created_at",
             "updated_at",
         )
         read_only_fields = ("created_by", "slug",)
 
 
+class TemplateCloneSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=240, required=False)
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -120,10 +134,15 @@ class JournalEntrySerializer(serializers.ModelSerializer):
             "created_by",
             "quote_of_the_day",
             "rate_your_day",
+            "entry_date",
+            "missing_required_count",
             "created_at",
             "updated_at",
         )
         read_only_fields = ("created_by",)
+        extra_kwargs = {
+            "template": {"queryset": Template.objects.filter(deleting=False)}
+        }
 
 
 class TemplateFieldSerializer(serializers.ModelSerializer):
@@ -137,7 +156,12 @@ class TemplateFieldSerializer(serializers.ModelSerializer):
             "category",
             "order",
             "is_required",
+            "created_at",
+            "updated_at",
         )
+        extra_kwargs = {
+            "template": {"queryset": Template.objects.filter(deleting=False)}
+        }
 
 
 class EntryFieldAnswerSerializer(serializers.ModelSerializer):
@@ -151,3 +175,227 @@ class EntryFieldAnswerSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            "uuid",
+            "format",
+            "status",
+            "total_rows",
+            "written_rows",
+            "progress",
+            "download_url",
+            "expires_at",
+            "error",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = tuple(field for field in fields if field != "format")
+
+    def validate_format(self, value):
+        if value not in available_formats():
+            raise serializers.ValidationError(f"{value} exports are not available.")
+        return value
+
+    def get_progress(self, job):
+        """Percentage of the rows written so far."""
+        if job.status in ("done", "expired"):
+            return 100
+        if not job.total_rows:
+            return 0
+        return min(100, job.written_rows * 100 // job.total_rows)
+
+    def get_download_url(self, job):
+        if job.status != "done":
+            return None
+        url = reverse("api:exportjob-download", args=[job.uuid])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class WeeklyDigestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeeklyDigest
+        fields = (
+            "week_start",
+            "entries_count",
+            "average_rate",
+            "top_fields",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = (
+            "uuid",
+            "target_type",
+            "target_id",
+            "status",
+            "deleted_rows",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class OwnCategoryField(serializers.PrimaryKeyRelatedField):
+    """A category of the requesting user."""
+
+    def get_queryset(self):
+        return Category.objects.filter(created_by=self.context["request"].user)
+
+
+class TemplateFieldChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField(max_length=120, required=False)
+    field_type = serializers.ChoiceField(
+        choices=TemplateField._meta.get_field("field_type").choices, required=False
+    )
+    category = OwnCategoryField(required=False, allow_null=True)
+    is_required = serializers.BooleanField(required=False)
+
+
+class TemplateFieldBulkUpdateSerializer(serializers.Serializer):
+    """
+    Reorder all fields of a template and change some of their properties.
+
+    ``order`` lists every field id of the template in its new order, and
+    ``updates`` optionally carries property changes keyed by field ``id``.
+    """
+
+    order = serializers.ListField(child=serializers.IntegerField(), allow_empty=True)
+    updates = TemplateFieldChangeSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        field_ids = set(self.instance.fields.values_list("id", flat=True))
+        order = attrs["order"]
+        if len(order) != len(set(order)):
+            raise serializers.ValidationError({"order": "Field ids must be unique."})
+        if set(order) != field_ids:
+            raise serializers.ValidationError(
+                {"order": "Must list every field of the template exactly once."}
+            )
+
+        updates = attrs.get("updates", [])
+        update_ids = [change["id"] for change in updates]
+        if len(update_ids) != len(set(update_ids)):
+            raise serializers.ValidationError(
+                {"updates": "Each field can only be changed once."}
+            )
+        if not set(update_ids) <= field_ids:
+            raise serializers.ValidationError(
+                {"updates": "Fields must belong to the template."}
+            )
+        return attrs
+
+    def update(self, instance, validated_data):
+        changes = {change.pop("id"): change for change in validated_data.get("updates", [])}
+        position = {field_id: index for index, field_id in enumerate(validated_data["order"])}
+
+        now = timezone.now()
+        with transaction.atomic():
+            fields = list(instance.fields.select_for_update().order_by("id"))
+            # Fields may have been added or deleted since validation.
+            if {field.id for field in fields} != set(position):
+                raise serializers.ValidationError(
+                    {"order": "The fields of the template changed, retry."}
+                )
+            # bulk_update() skips auto_now, bump it for delta sync ourselves.
+            updated_columns = {"order", "updated_at"}
+            category_ids = set()
+            required_changed = False
+            for field in fields:
+                field.order = position[field.id]
+                field.updated_at = now
+                for column, value in changes.get(field.id, {}).items():
+                    if column == "category":
+                        category_ids.update([field.category_id, value and value.pk])
+                    if column == "is_required" and value != field.is_required:
+                        required_changed = True
+                    setattr(field, column, value)
+                    updated_columns.add(column)
+            TemplateField.objects.bulk_update(fields, sorted(updated_columns))
+            if category_ids:
+                invalidate_category_facets(
+                    instance.created_by_id, *category_owner_ids(*category_ids)
+                )
+            if required_changed:
+                refresh_missing_required(instance.entries.all())
+        return instance
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Operations to run in order, optionally all-or-nothing (``atomic``)."""
+
+    atomic = serializers.BooleanField(default=False)
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        limit = settings.BATCH_MAX_OPERATIONS
+        if len(operations) > limit:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {limit} elements."
+            )
+        return operations
+
+
+class PushChangeSerializer(serializers.Serializer):
+    model = serializers.ChoiceField(choices=["journal_entry", "entry_field_answer"])
+    op = serializers.ChoiceField(choices=["upsert", "delete"])
+    uuid = serializers.UUIDField()
+    base_version = serializers.DateTimeField(required=False, allow_null=True)
+    data = serializers.DictField(required=False, default=dict)
+
+
+class PushSerializer(serializers.Serializer):
+    """
+    Offline changes to apply, each on an object identified by its uuid.
+
+    ``base_version`` is the ``updated_at`` the client last saw, or null for
+    objects created offline.
+    """
+
+    changes = PushChangeSerializer(many=True, allow_empty=False)
+
+    def validate_changes(self, changes):
+        limit = sync_settings()["PUSH_MAX_CHANGES"]
+        if len(changes) > limit:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {limit} elements."
+            )
+        keys = [(change["model"], change["uuid"]) for change in changes]
+        if len(keys) != len(set(keys)):
+            raise serializers.ValidationError("Each object can only be changed once.")
+        return changes
+
+
+class JournalEntryPushSerializer(serializers.Serializer):
+    title = serializers.CharField(
+        max_length=240, allow_null=True, allow_blank=True, required=False
+    )
+    template = serializers.UUIDField(allow_null=True, required=False)
+    quote_of_the_day = serializers.CharField(
+        max_length=500, allow_null=True, allow_blank=True, required=False
+    )
+    rate_your_day = serializers.IntegerField(allow_null=True, required=False)
+
+
+class EntryFieldAnswerPushSerializer(serializers.Serializer):
+    entry = serializers.UUIDField()
+    field = serializers.IntegerField()
+    value = serializers.CharField(allow_null=True, allow_blank=True, required=False)
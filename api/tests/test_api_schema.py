@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api import schema
+
+SCHEMA_URL = reverse("schema")
+
+
+class CachedSchemaTests(TestCase):
+    """Test the OpenAPI schema is generated once per code version"""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.path = os.path.join(root, "schema.json")
+        self.version("v1")
+        schema._cached = None
+        self.addCleanup(setattr, schema, "_cached", None)
+        self.generate = mock.patch.object(
+            schema, "generate_schema", wraps=schema.generate_schema
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.client = APIClient()
+
+    def version(self, code_version):
+        override = override_settings(
+            API_SCHEMA={"CODE_VERSION": code_version, "PATH": self.path}
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_generated_once(self):
+        """Test the schema is generated on first use and served from memory"""
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("/api/journal-entries/", json.loads(res.content)["paths"])
+        res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b"openapi:", res.content)
+        self.assertEqual(self.generate.call_count, 1)
+
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["version"], "v1")
+
+    def test_path_not_writable(self):
+        """Test the schema is served and kept when it cannot be written"""
+        self.path = os.path.join(self.path, "missing", "schema.json")
+        self.version("v1")
+        with self.assertLogs("api.schema", "ERROR"):
+            res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.generate.call_count, 1)
+
+        with self.assertRaises(OSError):
+            call_command("build_schema", stdout=StringIO())
+
+    def test_etag(self):
+        """Test clients holding the current schema get a 304"""
+        res = self.client.get(SCHEMA_URL)
+        etag = res["ETag"]
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        res = self.client.get(SCHEMA_URL, {"format": "json"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_of_compressed_response(self):
+        """Test the weak ETag of a gzipped schema gets a 304 too"""
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        etag = res["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+
+        for if_none_match in (etag, f'"stale", {etag}', etag.removeprefix("W/")):
+            res = self.client.get(
+                SCHEMA_URL,
+                HTTP_ACCEPT_ENCODING="gzip",
+                HTTP_IF_NONE_MATCH=if_none_match,
+            )
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_new_code_version(self):
+        """Test the schema is regenerated only when the code version changes"""
+        call_command("build_schema", stdout=StringIO())
+        schema._cached = None
+        self.client.get(SCHEMA_URL)
+        self.assertEqual(self.generate.call_count, 1)
+
+        self.version("v2")
+        self.client.get(SCHEMA_URL)
+        self.assertEqual(self.generate.call_count, 2)
@@ -0,0 +1,168 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.serializers import EntryFieldAnswerSerializer
+from journal.models import (
+    EntryFieldAnswer,
+    ExportJob,
+    JournalEntry,
+    Template,
+    TemplateField,
+)
+
+BATCH_URL = reverse("api:batch")
+
+
+class BatchApiTests(TestCase):
+    """Test running several API operations in one call"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.field = TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+
+    def save_day(self, atomic=False, answer_field=None):
+        return self.client.post(
+            BATCH_URL,
+            {
+                "atomic": atomic,
+                "operations": [
+                    {
+                        "method": "POST",
+                        "path": reverse("api:journalentry-list"),
+                        "body": {
+                            "title": "Monday",
+                            "template": str(self.template.uuid),
+                        },
+                    },
+                    {
+                        "method": "POST",
+                        "path": reverse("api:entryfieldanswer-list"),
+                        "body": {
+                            "entry": {"$ref": "0.uuid"},
+                            "field": answer_field or self.field.id,
+                            "value": "Great",
+                        },
+                    },
+                    {
+                        "method": "GET",
+                        "path": reverse("api:journalentry-list") + "?page_size=5",
+                    },
+                ],
+            },
+            format="json",
+        )
+
+    def test_operations_run_in_order(self):
+        """Test later operations can use results of earlier ones"""
+        res = self.save_day()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        statuses = [result["status"] for result in res.data["results"]]
+        self.assertEqual(statuses, [201, 201, 200])
+        entry = JournalEntry.objects.get()
+        self.assertEqual(entry.created_by, self.user)
+        self.assertEqual(EntryFieldAnswer.objects.get().entry, entry)
+        self.assertEqual(res.data["results"][2]["body"]["count"], 1)
+
+    def test_atomic_batch_rolled_back_on_failure(self):
+        """Test a failing operation undoes the whole atomic batch"""
+        res = self.save_day(atomic=True, answer_field=999)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(res.data["rolled_back"])
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertFalse(JournalEntry.objects.exists())
+
+    def test_non_atomic_batch_keeps_successes(self):
+        """Test without atomic each operation stands on its own"""
+        res = self.save_day(answer_field=999)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][1]["status"], 400)
+        self.assertTrue(JournalEntry.objects.exists())
+
+    @mock.patch.object(
+        EntryFieldAnswerSerializer, "create", side_effect=IntegrityError("duplicate")
+    )
+    def test_database_error_reported_per_operation(self, create):
+        """Test a database error fails its own operation, not the batch"""
+        with self.assertLogs("api.batch", "ERROR"):
+            res = self.save_day()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        statuses = [result["status"] for result in res.data["results"]]
+        self.assertEqual(statuses, [201, 409, 200])
+        self.assertNotIn("duplicate", str(res.data["results"][1]["body"]))
+
+        with self.assertLogs("api.batch", "ERROR"):
+            res = self.save_day(atomic=True)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(res.data["rolled_back"])
+        self.assertEqual(JournalEntry.objects.count(), 1)
+
+    def test_streaming_response_refused(self):
+        """Test a download in a batch is refused and its file closed"""
+        job = ExportJob.objects.create(
+            requested_by=self.user, status="done", artifact="export.zip"
+        )
+        archive = io.BytesIO(b"PK")
+        with mock.patch("api.views.export_storage") as storage:
+            storage.return_value.open.return_value = archive
+            res = self.client.post(
+                BATCH_URL,
+                {
+                    "operations": [
+                        {
+                            "method": "GET",
+                            "path": reverse("api:exportjob-download", args=[job.uuid]),
+                        }
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["status"], 400)
+        self.assertTrue(archive.closed)
+
+    def test_only_api_routes_allowed(self):
+        """Test operations outside the API or on the batch route are refused"""
+        res = self.client.post(
+            BATCH_URL,
+            {
+                "operations": [
+                    {"method": "GET", "path": "/admin/"},
+                    {"method": "POST", "path": BATCH_URL},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(
+            [result["status"] for result in res.data["results"]], [404, 404]
+        )
+
+    @override_settings(BATCH_MAX_OPERATIONS=1)
+    def test_operation_limit(self):
+        """Test batches above the limit are rejected"""
+        res = self.save_day()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = APIClient().post(BATCH_URL, {"operations": []}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
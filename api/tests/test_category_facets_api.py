@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.checks import check_shared_cache
+from journal.models import (
+    Category,
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+)
+from journal.tasks import purge_template
+
+FACETS_URL = reverse("api:category-facets")
+
+
+# Commits run their feed callbacks too, keep those off Redis.
+@override_settings(EVENTS={"BROKER": "logjournal.events.InMemoryBroker"})
+class CategoryFacetsApiTests(TestCase):
+    """Test the per-category counts"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.health = Category.objects.create(name="Health", created_by=self.user)
+        self.work = Category.objects.create(name="Work", created_by=self.user)
+        Category.objects.create(name="Hidden", created_by=self.other)
+
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.template.categories.add(self.health, self.work)
+        self.fields = [
+            TemplateField.objects.create(
+                template=self.template,
+                name=f"Field {i}",
+                field_type="text",
+                category=self.health,
+            )
+            for i in range(2)
+        ]
+        self.entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        for field in self.fields:
+            EntryFieldAnswer.objects.create(entry=self.entry, field=field, value="x")
+
+    def facets(self):
+        res = self.client.get(FACETS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {
+            row["name"]: (
+                row["templates_count"],
+                row["template_fields_count"],
+                row["answers_count"],
+            )
+            for row in res.data
+        }
+
+    def test_counts(self):
+        """Test the counts of every category of the user come in one query"""
+        with self.assertNumQueries(1):
+            facets = self.facets()
+        self.assertEqual(facets, {"Health": (1, 2, 2), "Work": (1, 0, 0)})
+
+    def test_counts_are_cached(self):
+        """Test repeated calls are served from the cache"""
+        self.facets()
+        with self.assertNumQueries(0):
+            self.facets()
+
+    def test_field_category_change_invalidates(self):
+        """Test re-pointing a template field refreshes the counts"""
+        self.facets()
+        field = self.fields[0]
+        field.category = self.work
+        with self.captureOnCommitCallbacks(execute=True):
+            field.save()
+
+        self.assertEqual(self.facets(), {"Health": (1, 1, 1), "Work": (1, 1, 1)})
+
+    def test_template_category_change_invalidates(self):
+        """Test linking and unlinking categories refreshes the counts"""
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.template.categories.remove(self.work)
+        self.assertEqual(self.facets()["Work"], (0, 0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Template.objects.create(
+                title="Weekly", slug="weekly", created_by=self.user
+            ).categories.add(self.work)
+        self.assertEqual(self.facets()["Work"], (1, 0, 0))
+
+    def test_new_answer_invalidates(self):
+        """Test answering a categorized field refreshes the counts"""
+        self.facets()
+        entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            EntryFieldAnswer.objects.create(entry=entry, field=self.fields[0])
+
+        self.assertEqual(self.facets()["Health"], (1, 2, 3))
+
+    def test_moved_answer_invalidates(self):
+        """Test moving an answer to a field of another category recounts both"""
+        field = TemplateField.objects.create(
+            template=self.template,
+            name="Hours",
+            field_type="number",
+            category=self.work,
+        )
+        self.facets()
+        answer = EntryFieldAnswer.objects.filter(field=self.fields[0]).get()
+        with self.captureOnCommitCallbacks(execute=True):
+            answer.field = field
+            answer.save()
+
+        self.assertEqual(self.facets()["Health"], (1, 2, 1))
+        self.assertEqual(self.facets()["Work"], (1, 1, 1))
+
+    def test_templates_being_deleted_not_counted(self):
+        """Test a template queued for deletion drops out of the counts at once"""
+        self.facets()
+        with mock.patch.object(purge_template, "delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.delete(
+                    reverse("api:template-detail", args=[self.template.uuid])
+                )
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+        self.assertEqual(self.facets()["Health"], (0, 0, 0))
+        self.assertEqual(self.facets()["Work"], (0, 0, 0))
+
+    def test_invalidated_on_commit(self):
+        """Test the counts are dropped once the change commits, not before"""
+        self.facets()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.template.categories.remove(self.work)
+            self.assertEqual(self.facets()["Work"], (1, 0, 0))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.facets()["Work"], (0, 0, 0))
+
+    def test_shared_cache_required(self):
+        """Test the deploy checks refuse a process-local cache"""
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ["journal.E001"]
+        )
+        dummy = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=dummy):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,113 @@
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import click
+from celery import Celery
+from celery.apps.worker import Worker
+from click.core import ParameterSource
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from logjournal.celery import app
+from logjournal.queues import configure_worker, queue_depths
+
+
+class CeleryQueueTests(SimpleTestCase):
+    """Test the routing of tasks to queues and the queue workers"""
+
+    def route(self, name):
+        options = app.amqp.router.route({}, name)
+        return options["queue"].name, options.get("priority")
+
+    def test_routes(self):
+        """Test heavy tasks leave the interactive queue"""
+        self.assertEqual(self.route("journal.tasks.purge_user"), ("bulk", 6))
+        self.assertEqual(self.route("journal.tasks.purge_tombstones"), ("bulk", 6))
+        self.assertEqual(self.route("journal.tasks.run_export"), ("bulk", 6))
+        self.assertEqual(
+            self.route("journal.tasks.generate_weekly_digests"), ("analytics", 3)
+        )
+        self.assertEqual(
+            self.route("journal.tasks.print_time_task"), ("interactive", None)
+        )
+
+    def conf(self):
+        return SimpleNamespace(worker_concurrency=None, worker_prefetch_multiplier=None)
+
+    def test_worker_profile(self):
+        """Test a single-queue worker takes its queue's profile"""
+        conf = self.conf()
+        configure_worker(conf=conf, options={"queues": ["bulk"]})
+        self.assertEqual(conf.worker_concurrency, 2)
+        self.assertEqual(conf.worker_prefetch_multiplier, 1)
+
+        conf = self.conf()
+        configure_worker(conf=conf, options={"queues": "interactive", "concurrency": 3})
+        self.assertIsNone(conf.worker_concurrency)
+        self.assertEqual(conf.worker_prefetch_multiplier, 4)
+
+        conf = self.conf()
+        configure_worker(conf=conf, options={"queues": ["bulk", "analytics"]})
+        self.assertIsNone(conf.worker_concurrency)
+
+    def test_worker_profile_with_cli_defaults(self):
+        """Test options Celery filled with the configured value are not explicit"""
+        conf = SimpleNamespace(worker_concurrency=8, worker_prefetch_multiplier=4)
+        options = {"queues": "bulk", "concurrency": 8, "prefetch_multiplier": 4}
+        configure_worker(conf=conf, options=options)
+        self.assertEqual(conf.worker_concurrency, 2)
+        self.assertEqual(conf.worker_prefetch_multiplier, 1)
+
+        # On the command line click knows whether the value was typed.
+        command = click.Command(
+            "worker",
+            params=[
+                click.Option(["--concurrency"], type=int),
+                click.Option(["--prefetch-multiplier"], type=int),
+            ],
+        )
+        ctx = command.make_context("worker", ["--prefetch-multiplier", "4"])
+        self.assertEqual(
+            ctx.get_parameter_source("prefetch_multiplier"),
+            ParameterSource.COMMANDLINE,
+        )
+        conf = SimpleNamespace(worker_concurrency=8, worker_prefetch_multiplier=4)
+        with ctx:
+            configure_worker(conf=conf, options=options)
+        self.assertEqual(conf.worker_concurrency, 2)
+        self.assertEqual(conf.worker_prefetch_multiplier, 4)
+
+    def worker(self, **options):
+        broker = Celery(broker="memory://", set_as_current=False)
+        # Keep the test run's logging and skip the running-as-root warning.
+        with mock.patch.object(Worker, "setup_logging"), mock.patch(
+            "celery.apps.worker.check_privileges"
+        ):
+            return broker.Worker(pool="solo", quiet=True, **options)
+
+    def test_worker_takes_profile(self):
+        """Test the worker itself runs with its queue's profile"""
+        # The command line fills the prefetch multiplier in with the default.
+        worker = self.worker(queues=["bulk"], prefetch_multiplier=4)
+        self.assertEqual(worker.concurrency, 2)
+        self.assertEqual(worker.prefetch_multiplier, 1)
+
+        worker = self.worker(queues=["interactive"], concurrency=3)
+        self.assertEqual(worker.concurrency, 3)
+        self.assertEqual(worker.prefetch_multiplier, 4)
+
+    def test_queue_depths(self):
+        """Test the waiting messages are counted per queue"""
+        broker = Celery(broker="memory://", set_as_current=False)
+        broker.conf.task_queues = app.conf.task_queues
+        broker.conf.task_default_queue = "interactive"
+        for queue in ("bulk", "bulk", "analytics"):
+            broker.send_task("journal.tasks.purge_user", queue=queue)
+
+        self.assertEqual(
+            queue_depths(broker), {"interactive": 0, "analytics": 1, "bulk": 2}
+        )
+        out = StringIO()
+        with mock.patch("journal.management.commands.queue_depths.app", broker):
+            call_command("queue_depths", stdout=out)
+        self.assertIn("bulk: 2", out.getvalue())
@@ -0,0 +1,68 @@
+import gzip
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from logjournal.compression import COMPRESSORS, CompressionMiddleware, negotiate
+
+
+BODY = b'{"title": "Entry", "quote_of_the_day": "Stay hungry"}' * 100
+
+
+def middleware(response):
+    return CompressionMiddleware(lambda request: response)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test negotiated response compression"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_negotiation_honours_quality_values(self):
+        """Test the server preference applies among accepted codings"""
+        self.assertEqual(negotiate("gzip, deflate", ["zstd", "br", "gzip"]), "gzip")
+        self.assertEqual(negotiate("gzip;q=0, identity", ["gzip"]), None)
+        self.assertEqual(negotiate("gzip;q=0.5, br;q=0.1", ["br", "gzip"]), "gzip")
+        self.assertEqual(negotiate("*", ["gzip"]), "gzip")
+
+    @override_settings(COMPRESSION={"ENCODINGS": ["gzip"]})
+    def test_large_response_compressed(self):
+        """Test responses above the threshold are compressed"""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = HttpResponse(BODY)
+        response["ETag"] = '"abc"'
+        response = middleware(response)(request)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+
+    def test_small_response_left_alone(self):
+        """Test bodies below the threshold are not compressed"""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = middleware(HttpResponse(b"{}"))(request)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION={"ENCODINGS": ["gzip"], "LEVELS": {"gzip": 1}})
+    def test_streaming_response_compressed_incrementally(self):
+        """Test every streamed chunk is flushed as it is compressed"""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = middleware(StreamingHttpResponse(iter([BODY, BODY])))(request)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        chunks = list(response.streaming_content)
+        self.assertGreaterEqual(len(chunks), 3)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # The first chunk alone already decodes to the first body.
+        self.assertEqual(decompressor.decompress(chunks[0]), BODY)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), BODY * 2)
+
+    def test_preferred_encoding_used(self):
+        """Test zstd or brotli are chosen over gzip when available"""
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip, br, zstd")
+        response = middleware(HttpResponse(BODY))(request)
+        expected = next(e for e in ("zstd", "br", "gzip") if e in COMPRESSORS)
+        self.assertEqual(response["Content-Encoding"], expected)
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import (
+    Category,
+    DeletionJob,
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+)
+from journal.tasks import purge_template, purge_user
+
+
+PROFILE_URL = reverse("api:profile")
+
+
+def job_url(uuid):
+    """Return deletion job detail URL"""
+    return reverse("api:deletionjob-detail", args=[uuid])
+
+
+@override_settings(DELETE_BATCH_SIZE=2)
+class DeletionJobApiTests(TestCase):
+    """Test background deletion of templates and accounts"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.category = Category.objects.create(name="Health", created_by=self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.template.categories.add(self.category)
+        fields = [
+            TemplateField.objects.create(
+                template=self.template, name=f"Field {i}", field_type="text"
+            )
+            for i in range(3)
+        ]
+        for owner in (self.user, self.other):
+            entry = JournalEntry.objects.create(
+                template=self.template, created_by=owner
+            )
+            for field in fields:
+                EntryFieldAnswer.objects.create(entry=entry, field=field, value="x")
+
+    def delete(self, url, task):
+        with mock.patch.object(task, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(res.data["uuid"])
+        return res
+
+    def test_delete_template_runs_in_background(self):
+        """Test template deletion answers with a job that purges in batches"""
+        url = reverse("api:template-detail", args=[self.template.uuid])
+        res = self.delete(url, purge_template)
+        self.assertTrue(Template.objects.filter(uuid=self.template.uuid).exists())
+
+        purge_template(res.data["uuid"])
+
+        self.assertFalse(Template.objects.exists())
+        self.assertFalse(TemplateField.objects.exists())
+        self.assertFalse(EntryFieldAnswer.objects.exists())
+        self.assertEqual(JournalEntry.objects.filter(template=None).count(), 2)
+        self.assertTrue(Category.objects.exists())
+
+        job = self.client.get(job_url(res.data["uuid"]))
+        self.assertEqual(job.data["status"], "done")
+        self.assertEqual(job.data["deleted_rows"], 11)
+
+    def test_template_hidden_while_purging(self):
+        """Test a template queued for deletion can no longer be used"""
+        url = reverse("api:template-detail", args=[self.template.uuid])
+        self.delete(url, purge_template)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.patch(url, {"title": "Renamed"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(reverse("api:template-list"))
+        self.assertEqual(res.data["count"], 0)
+        res = self.client.post(
+            reverse("api:journalentry-list"), {"template": self.template.uuid}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        field = self.template.fields.first()
+        res = self.client.get(reverse("api:templatefield-detail", args=[field.id]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_account_runs_in_background(self):
+        """Test deleting an account deactivates it and purges its data"""
+        res = self.delete(PROFILE_URL, purge_user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        purge_user(res.data["uuid"])
+
+        self.assertFalse(get_user_model().objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Template.objects.exists())
+        self.assertFalse(Category.objects.exists())
+        self.assertEqual(
+            list(JournalEntry.objects.values_list("created_by", "template")),
+            [(self.other.pk, None)],
+        )
+        self.assertFalse(EntryFieldAnswer.objects.exists())
+        self.assertEqual(DeletionJob.objects.get().status, "done")
+
+    def test_jobs_are_private(self):
+        """Test users cannot see other users' deletion jobs"""
+        job = DeletionJob.objects.create(
+            target_type="template", target_id="x", requested_by=self.other
+        )
+        res = self.client.get(job_url(job.uuid))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from journal.models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+JOURNAL_ENTRY_URL = reverse("api:journalentry-list")
+
+
+class EntryCompletenessTests(TestCase):
+    """Test the precomputed count of unanswered required fields"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.mood, self.sleep = [
+            TemplateField.objects.create(
+                template=self.template,
+                name=name,
+                field_type="text",
+                is_required=True,
+            )
+            for name in ("Mood", "Sleep")
+        ]
+        self.notes = TemplateField.objects.create(
+            template=self.template, name="Notes", field_type="text"
+        )
+        self.entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+
+    def missing(self):
+        self.entry.refresh_from_db()
+        return self.entry.missing_required_count
+
+    def test_answers_update_count(self):
+        """Test answering and clearing required fields moves the count"""
+        self.assertEqual(self.missing(), 2)
+        answer = EntryFieldAnswer.objects.create(
+            entry=self.entry, field=self.mood, value="good"
+        )
+        EntryFieldAnswer.objects.create(entry=self.entry, field=self.notes, value="x")
+        self.assertEqual(self.missing(), 1)
+
+        answer.value = ""
+        answer.save()
+        self.assertEqual(self.missing(), 2)
+        answer.value = "fine"
+        answer.save()
+        answer.delete()
+        self.assertEqual(self.missing(), 2)
+
+    def test_moving_answer_updates_both_entries(self):
+        """Test an answer moved to another entry recounts the entry it left"""
+        EntryFieldAnswer.objects.create(entry=self.entry, field=self.mood, value="ok")
+        other = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        self.assertEqual(self.missing(), 1)
+
+        answer = EntryFieldAnswer.objects.get(entry=self.entry)
+        answer.entry = other
+        answer.save()
+        self.assertEqual(self.missing(), 2)
+        other.refresh_from_db()
+        self.assertEqual(other.missing_required_count, 1)
+
+    def test_template_field_changes_update_count(self):
+        """Test requiring, unrequiring and deleting fields moves the count"""
+        notes = TemplateField.objects.get(pk=self.notes.pk)
+        notes.is_required = True
+        notes.save()
+        self.assertEqual(self.missing(), 3)
+
+        TemplateField.objects.get(pk=self.mood.pk).delete()
+        sleep = TemplateField.objects.get(pk=self.sleep.pk)
+        sleep.is_required = False
+        sleep.save()
+        self.assertEqual(self.missing(), 1)
+
+    def test_renaming_required_field_keeps_count(self):
+        """Test saves that leave requirement and template alone recount nothing"""
+        mood = TemplateField.objects.get(pk=self.mood.pk)
+        mood.name = "Feeling"
+        with mock.patch("journal.completeness.refresh_missing_required") as refresh:
+            mood.save()
+        refresh.assert_not_called()
+
+    def test_moving_entry_updates_count(self):
+        """Test an entry moved to another template or none is recounted"""
+        other = Template.objects.create(
+            title="Weekly", slug="weekly", created_by=self.user
+        )
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        entry.template = other
+        entry.save()
+        self.assertEqual(self.missing(), 0)
+
+        entry.template = self.template
+        entry.save()
+        self.assertEqual(self.missing(), 2)
+        self.template.delete()
+        self.assertEqual(self.missing(), 0)
+
+    def test_filter_incomplete_entries(self):
+        """Test listing only the entries with unanswered required fields"""
+        done = JournalEntry.objects.create(template=self.template, created_by=self.user)
+        for field in (self.mood, self.sleep):
+            EntryFieldAnswer.objects.create(entry=done, field=field, value="x")
+
+        res = self.client.get(JOURNAL_ENTRY_URL, {"missing_required_count__gt": 0})
+        self.assertEqual(
+            [row["uuid"] for row in res.data["results"]], [str(self.entry.uuid)]
+        )
+        self.assertEqual(res.data["results"][0]["missing_required_count"], 2)
+
+        res = self.client.get(JOURNAL_ENTRY_URL, {"missing_required_count": 0})
+        self.assertEqual([row["uuid"] for row in res.data["results"]], [str(done.uuid)])
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import JournalEntry
+
+HEATMAP_URL = reverse("api:journalentry-heatmap")
+
+
+def written_at(moment):
+    return mock.patch("django.utils.timezone.now", return_value=moment)
+
+
+class EntryHeatmapApiTests(TestCase):
+    """Test the year calendar heatmap of journal entries"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123", timezone="America/New_York"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def entry(self, moment, rate=None, user=None):
+        with written_at(moment):
+            return JournalEntry.objects.create(
+                created_by=user or self.user, rate_your_day=rate
+            )
+
+    def test_entry_date_in_user_time_zone(self):
+        """Test an entry is dated in its author's time zone"""
+        # 02:00 UTC on Jan 2nd is still Jan 1st in New York.
+        entry = self.entry(datetime(2025, 1, 2, 2, tzinfo=dt_timezone.utc))
+        self.assertEqual(entry.entry_date, date(2025, 1, 1))
+
+    def test_heatmap(self):
+        """Test every day of the year comes with its count and average"""
+        self.entry(datetime(2025, 1, 2, 2, tzinfo=dt_timezone.utc), rate=4)
+        self.entry(datetime(2025, 1, 1, 15, tzinfo=dt_timezone.utc), rate=7)
+        self.entry(datetime(2025, 1, 1, 16, tzinfo=dt_timezone.utc))
+        self.entry(datetime(2025, 3, 5, 12, tzinfo=dt_timezone.utc), rate=2)
+        self.entry(datetime(2024, 12, 31, 12, tzinfo=dt_timezone.utc), rate=9)
+        other = get_user_model().objects.create_user("other@action.com", "password123")
+        self.entry(datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc), 1, user=other)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(HEATMAP_URL, {"year": 2025})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        days = res.json()
+        self.assertEqual(len(days), 365)
+        self.assertEqual(
+            days[0], {"date": "2025-01-01", "count": 3, "average_rate": 5.5}
+        )
+        self.assertEqual(days[1]["count"], 0)
+        self.assertIsNone(days[1]["average_rate"])
+        self.assertEqual(
+            days[63], {"date": "2025-03-05", "count": 1, "average_rate": 2}
+        )
+
+    def test_leap_year_and_invalid_year(self):
+        """Test leap years have 366 buckets and bad years are rejected"""
+        self.assertEqual(len(self.client.get(HEATMAP_URL, {"year": 2024}).data), 366)
+        res = self.client.get(HEATMAP_URL, {"year": "last"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
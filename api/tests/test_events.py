@@ -0,0 +1,172 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from journal.models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+from journal.tasks import purge_template_rows
+from logjournal import events
+
+IN_MEMORY = {"BROKER": "logjournal.events.InMemoryBroker", "KEEPALIVE": 15}
+
+
+def scope(query_string=b"", headers=()):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/events",
+        "query_string": query_string,
+        "headers": list(headers),
+    }
+
+
+@override_settings(EVENTS=IN_MEMORY)
+class ChangeFeedTests(TestCase):
+    """Test the server-sent events change feed"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def test_writes_publish_events(self):
+        """Test saving and deleting entries publishes events to the owner"""
+        template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        field = TemplateField.objects.create(
+            template=template, name="Mood", field_type="text"
+        )
+        with mock.patch.object(events.InMemoryBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                entry = JournalEntry.objects.create(created_by=self.user)
+                answer = EntryFieldAnswer.objects.create(entry=entry, field=field)
+            with self.captureOnCommitCallbacks(execute=True):
+                entry.delete()
+
+        published = [
+            (call.args[0], call.args[1]["type"]) for call in publish.mock_calls
+        ]
+        self.assertEqual(
+            published,
+            [
+                (self.user.pk, "journal_entry.created"),
+                (self.user.pk, "entry_field_answer.created"),
+                (self.user.pk, "entry_field_answer.deleted"),
+                (self.user.pk, "journal_entry.deleted"),
+            ],
+        )
+        self.assertEqual(publish.mock_calls[1].args[1]["uuid"], str(answer.uuid))
+
+    def test_deletes_published_together(self):
+        """Test a cascading delete publishes one event per owner and model"""
+        template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        entry = JournalEntry.objects.create(created_by=self.user)
+        answers = [
+            EntryFieldAnswer.objects.create(
+                entry=entry,
+                field=TemplateField.objects.create(
+                    template=template, name=f"Field {i}", field_type="text"
+                ),
+            )
+            for i in range(3)
+        ]
+        with mock.patch.object(events.InMemoryBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                entry.delete()
+
+        self.assertEqual(len(publish.mock_calls), 2)
+        event = publish.mock_calls[0].args[1]
+        self.assertEqual(event["type"], "entry_field_answer.deleted")
+        self.assertEqual(
+            sorted(event["uuids"]), sorted(str(answer.uuid) for answer in answers)
+        )
+        self.assertEqual(publish.mock_calls[1].args[1]["type"], "journal_entry.deleted")
+
+    def test_purges_publish_nothing(self):
+        """Test background purges do not publish their deletions"""
+        template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        field = TemplateField.objects.create(
+            template=template, name="Mood", field_type="text"
+        )
+        entry = JournalEntry.objects.create(created_by=self.user, template=template)
+        EntryFieldAnswer.objects.create(entry=entry, field=field)
+        with mock.patch.object(events.InMemoryBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                purge_template_rows(template.uuid)
+        publish.assert_not_called()
+
+    def test_no_event_before_commit(self):
+        """Test events of a rolled back write are never sent"""
+        with mock.patch.object(events.InMemoryBroker, "publish") as publish:
+            JournalEntry.objects.create(created_by=self.user)
+        publish.assert_not_called()
+
+    async def test_stream_delivers_events(self):
+        """Test the feed streams the events of the authenticated user"""
+        query = f"token={self.token}".encode()
+        communicator = ApplicationCommunicator(
+            events.sse_application, scope(query_string=query)
+        )
+        await communicator.send_input({"type": "http.request"})
+
+        start = await communicator.receive_output(timeout=5)
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+        opened = await communicator.receive_output(timeout=5)
+        self.assertEqual(opened["body"], b": open\n\n")
+
+        event = {"type": "journal_entry.updated", "uuid": "x", "version": None}
+        events.get_broker().publish(self.user.pk + 1, {"type": "other.user"})
+        events.get_broker().publish(self.user.pk, event)
+        message = await communicator.receive_output(timeout=5)
+        lines = message["body"].decode().splitlines()
+        self.assertEqual(lines[0], "event: journal_entry.updated")
+        self.assertEqual(json.loads(lines[1].removeprefix("data: ")), event)
+
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(timeout=5)
+        self.assertEqual(events.get_broker()._subscribers, {})
+
+    async def test_keepalive(self):
+        """Test idle feeds send keep-alive comments"""
+        with self.settings(EVENTS={**IN_MEMORY, "KEEPALIVE": 0.01}):
+            communicator = ApplicationCommunicator(
+                events.sse_application,
+                scope(headers=[(b"authorization", f"Bearer {self.token}".encode())]),
+            )
+            await communicator.send_input({"type": "http.request"})
+            await communicator.receive_output(timeout=5)
+            await communicator.receive_output(timeout=5)
+            message = await communicator.receive_output(timeout=5)
+            self.assertEqual(message["body"], b": keepalive\n\n")
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(timeout=5)
+
+    async def test_requires_token(self):
+        """Test the feed rejects anonymous and invalid tokens"""
+        for query in (b"", b"token=invalid"):
+            communicator = ApplicationCommunicator(
+                events.sse_application, scope(query_string=query)
+            )
+            start = await communicator.receive_output(timeout=5)
+            self.assertEqual(start["status"], 401)
+            await communicator.wait(timeout=5)
+
+    async def test_inactive_users_are_rejected(self):
+        """Test tokens of deactivated accounts are refused"""
+        await get_user_model().objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        communicator = ApplicationCommunicator(
+            events.sse_application, scope(query_string=f"token={self.token}".encode())
+        )
+        start = await communicator.receive_output(timeout=5)
+        self.assertEqual(start["status"], 401)
+        await asyncio.wait_for(communicator.wait(), timeout=5)
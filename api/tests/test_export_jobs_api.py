@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.exports import export_storage
+from journal.models import (
+    EntryFieldAnswer,
+    ExportJob,
+    JournalEntry,
+    Template,
+    TemplateField,
+)
+from journal.tasks import (
+    expire_exports,
+    fail_stale_exports,
+    purge_user_rows,
+    run_export,
+)
+
+EXPORTS_URL = reverse("api:exportjob-list")
+
+
+def detail_url(uuid):
+    return reverse("api:exportjob-detail", args=[uuid])
+
+
+def download_url(uuid):
+    return reverse("api:exportjob-download", args=[uuid])
+
+
+@override_settings(
+    EXPORTS={"CHUNK_SIZE": 2, "RETENTION_HOURS": 24, "STALE_MINUTES": 60}
+)
+class ExportJobApiTests(TestCase):
+    """Test background account exports"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        storages = {
+            **settings.STORAGES,
+            "exports": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.root},
+            },
+        }
+        storage_settings = override_settings(STORAGES=storages)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        field = TemplateField.objects.create(
+            template=template, name="Mood", field_type="text"
+        )
+        for i in range(3):
+            entry = JournalEntry.objects.create(
+                title=f"Day {i}", created_by=self.user, rate_your_day=i
+            )
+            EntryFieldAnswer.objects.create(entry=entry, field=field, value="ok")
+        JournalEntry.objects.create(title="Not mine", created_by=self.other)
+
+    def start(self, export_format):
+        with mock.patch.object(run_export, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(EXPORTS_URL, {"format": export_format})
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        delay.assert_called_once_with(res.data["uuid"])
+        run_export(res.data["uuid"])
+        return self.client.get(detail_url(res.data["uuid"]))
+
+    def archive(self, job):
+        res = self.client.get(job.data["download_url"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content)))
+
+    def test_ndjson_export(self):
+        """Test an export is written in chunks and downloadable when done"""
+        res = self.start("ndjson")
+        self.assertEqual(res.data["status"], "done")
+        self.assertEqual((res.data["total_rows"], res.data["written_rows"]), (6, 6))
+        self.assertEqual(res.data["progress"], 100)
+
+        archive = self.archive(res)
+        self.assertEqual(archive.namelist(), ["entries.ndjson", "answers.ndjson"])
+        entries = [
+            json.loads(line) for line in archive.read("entries.ndjson").splitlines()
+        ]
+        self.assertEqual(
+            sorted(entry["title"] for entry in entries), ["Day 0", "Day 1", "Day 2"]
+        )
+        answers = archive.read("answers.ndjson").splitlines()
+        self.assertEqual(json.loads(answers[0])["field_name"], "Mood")
+
+    def test_csv_export(self):
+        """Test CSV members come with a header row"""
+        archive = self.archive(self.start("csv"))
+        rows = list(csv.DictReader(io.StringIO(archive.read("entries.csv").decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertIn("entry_date", rows[0])
+
+    def test_not_ready_and_other_users(self):
+        """Test pending exports and other users' exports cannot be downloaded"""
+        job = ExportJob.objects.create(requested_by=self.user)
+        res = self.client.get(detail_url(job.uuid))
+        self.assertIsNone(res.data["download_url"])
+        self.assertEqual(
+            self.client.get(download_url(job.uuid)).status_code,
+            status.HTTP_409_CONFLICT,
+        )
+        theirs = ExportJob.objects.create(requested_by=self.other, status="done")
+        self.assertEqual(
+            self.client.get(download_url(theirs.uuid)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_one_active_export_per_user(self):
+        """Test a new export is refused while another one is under way"""
+        job = ExportJob.objects.create(requested_by=self.user, status="running")
+        res = self.client.post(EXPORTS_URL, {"format": "csv"})
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        ExportJob.objects.filter(pk=job.pk).update(status="done")
+        self.start("csv")
+
+    def test_stale_export_fails(self):
+        """Test an export its worker stopped updating no longer blocks the user"""
+        job = ExportJob.objects.create(requested_by=self.user, status="running")
+        self.assertEqual(fail_stale_exports(), 0)
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=61)
+        )
+        self.assertEqual(fail_stale_exports(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.start("csv")
+
+    def test_failure_message_is_generic(self):
+        """Test a failed export does not expose the exception text"""
+        job = ExportJob.objects.create(requested_by=self.user)
+        with mock.patch(
+            "journal.tasks.write_export", side_effect=OSError("/srv/secret: denied")
+        ):
+            with self.assertRaises(OSError):
+                run_export(job.uuid)
+        res = self.client.get(detail_url(job.uuid))
+        self.assertEqual(res.data["status"], "failed")
+        self.assertNotIn("secret", res.data["error"])
+
+    def test_unknown_format(self):
+        """Test only the available formats can be requested"""
+        res = self.client.post(EXPORTS_URL, {"format": "xml"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_artifacts_expire(self):
+        """Test finished archives are deleted after the retention period"""
+        res = self.start("ndjson")
+        job = ExportJob.objects.get(uuid=res.data["uuid"])
+        self.assertTrue(export_storage().exists(job.artifact))
+        self.assertEqual(expire_exports(), 0)
+
+        ExportJob.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(expire_exports(), 1)
+        self.assertFalse(export_storage().exists(job.artifact))
+        self.assertEqual(
+            self.client.get(download_url(job.uuid)).status_code, status.HTTP_410_GONE
+        )
+
+    def test_account_purge_deletes_artifacts(self):
+        """Test deleting an account deletes its export archives"""
+        job = ExportJob.objects.get(uuid=self.start("csv").data["uuid"])
+        purge_user_rows(self.user.pk)
+        self.assertFalse(export_storage().exists(job.artifact))
@@ -0,0 +1,140 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+ANALYTICS_URL = reverse("api:field-analytics")
+
+
+# Commits run their feed callbacks too, keep those off Redis.
+@override_settings(EVENTS={"BROKER": "logjournal.events.InMemoryBroker"})
+class FieldAnalyticsApiTests(TestCase):
+    """Test the field correlation analytics"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.sleep = TemplateField.objects.create(
+            template=self.template, name="Sleep", field_type="number"
+        )
+        self.exercised = TemplateField.objects.create(
+            template=self.template, name="Exercised", field_type="boolean"
+        )
+        self.notes = TemplateField.objects.create(
+            template=self.template, name="Notes", field_type="text"
+        )
+        days = [(4, "no", 3), (6, "no", 5), (8, "yes", 7), (10, "yes", 9)]
+        for sleep, exercised, rate in days:
+            self.answer(sleep, exercised, rate)
+
+    def answer(self, sleep, exercised, rate):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = JournalEntry.objects.create(
+                template=self.template, created_by=self.user, rate_your_day=rate
+            )
+            EntryFieldAnswer.objects.create(entry=entry, field=self.sleep, value=sleep)
+            EntryFieldAnswer.objects.create(
+                entry=entry, field=self.exercised, value=exercised
+            )
+            EntryFieldAnswer.objects.create(entry=entry, field=self.notes, value="x")
+        return entry
+
+    def analytics(self):
+        res = self.client.get(ANALYTICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {row["name"]: row for row in res.data}
+
+    def test_statistics(self):
+        """Test counts, means, correlations and histograms per field"""
+        with self.assertNumQueries(1):
+            fields = self.analytics()
+
+        self.assertEqual(set(fields), {"Sleep", "Exercised"})
+        sleep, exercised = fields["Sleep"], fields["Exercised"]
+        self.assertEqual(sleep["count"], 4)
+        self.assertEqual(sleep["mean"], 7)
+        self.assertEqual(sleep["correlation"], 1)
+        self.assertEqual(sum(sleep["histogram"]["counts"]), 4)
+        self.assertEqual(exercised["mean"], 0.5)
+        self.assertAlmostEqual(exercised["correlation"], 0.8944, places=4)
+        self.assertEqual(exercised["histogram"], {"edges": [0, 1], "counts": [2, 2]})
+
+    def test_unparsable_and_unrated_answers(self):
+        """Test bad values are skipped and unrated entries are not paired"""
+        self.answer("lots", "maybe", None)
+        fields = self.analytics()
+        self.assertEqual(fields["Sleep"]["count"], 4)
+        self.answer(20, "yes", None)
+        fields = self.analytics()
+        self.assertEqual(fields["Sleep"]["count"], 5)
+        self.assertEqual(fields["Sleep"]["correlation"], 1)
+
+    def test_non_finite_answers_ignored(self):
+        """Test infinite and NaN numbers count as unanswered"""
+        for value in ("inf", "-Infinity", "nan"):
+            self.answer(value, "yes", 5)
+        fields = self.analytics()
+        self.assertEqual(fields["Sleep"]["count"], 4)
+        self.assertEqual(sum(fields["Sleep"]["histogram"]["counts"]), 4)
+        self.assertEqual(fields["Sleep"]["correlation"], 1)
+
+    def test_extreme_answers(self):
+        """Test numbers too large to sum count as unanswered"""
+        for value in ("1e308", "-1e308", "1e308"):
+            self.answer(value, "yes", 5)
+        fields = self.analytics()
+        self.assertEqual(fields["Sleep"]["count"], 4)
+        self.assertEqual(fields["Sleep"]["mean"], 7)
+        self.assertEqual(sum(fields["Sleep"]["histogram"]["counts"]), 4)
+
+    def test_large_answers_one_bin(self):
+        """Test large answers too close to split into bins share one bin"""
+        steps = TemplateField.objects.create(
+            template=self.template, name="Steps", field_type="number"
+        )
+        for entry in JournalEntry.objects.all()[:2]:
+            EntryFieldAnswer.objects.create(entry=entry, field=steps, value="1e17")
+        cache.clear()
+        res = self.client.get(ANALYTICS_URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        fields = {row["name"]: row for row in res.json()}
+        self.assertEqual(fields["Steps"]["mean"], 1e17)
+        self.assertEqual(
+            fields["Steps"]["histogram"], {"edges": [1e17, 1e17], "counts": [2]}
+        )
+
+    def test_cached_until_new_answers(self):
+        """Test the result is cached and dropped when answers change"""
+        self.analytics()
+        with self.assertNumQueries(0):
+            self.analytics()
+
+        self.answer(2, "no", 1)
+        self.assertEqual(self.analytics()["Sleep"]["count"], 5)
+
+    def test_other_users_answers_ignored(self):
+        """Test only the user's own entries are analyzed"""
+        other = get_user_model().objects.create_user("other@action.com", "pass123")
+        entry = JournalEntry.objects.create(
+            template=self.template, created_by=other, rate_your_day=1
+        )
+        EntryFieldAnswer.objects.create(entry=entry, field=self.sleep, value="12")
+        self.assertEqual(self.analytics()["Sleep"]["count"], 4)
+
+    def test_numpy_missing(self):
+        """Test the endpoint reports when numpy is not installed"""
+        with mock.patch("journal.analytics.np", None):
+            res = self.client.get(ANALYTICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
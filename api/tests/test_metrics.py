@@ -0,0 +1,70 @@
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from logjournal import metrics
+
+
+METRICS_URL = reverse("metrics")
+
+
+@skipIf(metrics.prometheus_client is None, "prometheus_client is not installed")
+class MetricsEndpointTests(TestCase):
+    """Test the Prometheus metrics endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_metrics_labelled_by_url_name(self):
+        """Test API requests are recorded by URL name and status"""
+        self.client.get(reverse("api:journalentry-list"))
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn(
+            'logjournal_http_request_duration_seconds_count{method="GET",'
+            'status="200",view="api:journalentry-list"}',
+            body,
+        )
+        self.assertIn("logjournal_http_request_db_queries_bucket", body)
+
+    def test_cache_lookups_counted(self):
+        """Test cache hits and misses are counted"""
+        cache.set("metrics-test", 1)
+        cache.get("metrics-test")
+        cache.get("metrics-test-missing")
+        body = self.client.get(METRICS_URL).content.decode()
+        self.assertIn(
+            'logjournal_cache_lookups_total{cache="logjournal",result="hit"}', body
+        )
+        self.assertIn(
+            'logjournal_cache_lookups_total{cache="logjournal",result="miss"}', body
+        )
+
+    def test_scrape_restricted(self):
+        """Test only allowed networks or the token holder may scrape"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        options = {"ALLOWED_NETWORKS": ["10.0.0.0/8"], "TOKEN": "s3cret"}
+        with override_settings(METRICS=options):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            res = self.client.get(
+                METRICS_URL, REMOTE_ADDR="203.0.113.7", HTTP_AUTHORIZATION="Bearer no"
+            )
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+            res = self.client.get(
+                METRICS_URL,
+                REMOTE_ADDR="203.0.113.7",
+                HTTP_AUTHORIZATION="Bearer s3cret",
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
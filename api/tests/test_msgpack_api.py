@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.renderers import MessagePackRenderer, msgpack
+from journal.models import JournalEntry, Template
+
+ENTRY_URL = reverse("api:journalentry-list")
+
+
+@skipIf(msgpack is None, "msgpack is not installed")
+class MessagePackApiTests(TestCase):
+    """Test MessagePack content negotiation"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+
+    def unpack(self, content):
+        ext_uuid = lambda code, data: uuid.UUID(bytes=data)  # noqa: E731
+        return msgpack.unpackb(content, ext_hook=ext_uuid, timestamp=3)
+
+    def test_list_rendered_as_msgpack(self):
+        """Test UUIDs and datetimes are packed as extension types"""
+        entry = JournalEntry.objects.create(
+            title="Entry", template=self.template, created_by=self.user
+        )
+        res = self.client.get(ENTRY_URL, HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/msgpack")
+        row = self.unpack(res.content)["results"][0]
+        self.assertEqual(row["uuid"], entry.uuid)
+        self.assertEqual(row["template"], self.template.uuid)
+        self.assertIsInstance(row["created_at"], datetime)
+        self.assertEqual(row["title"], "Entry")
+
+    def test_create_from_msgpack_body(self):
+        """Test MessagePack request bodies are parsed"""
+        body = MessagePackRenderer().render(
+            {"title": "Offline", "template": self.template.uuid, "rate_your_day": 8}
+        )
+        res = self.client.post(
+            ENTRY_URL,
+            data=body,
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.unpack(res.content)["template"], self.template.uuid)
+
+    def test_free_text_left_alone(self):
+        """Test text shaped like a UUID or datetime is not converted"""
+        JournalEntry.objects.create(
+            title="2025-01-01T10:00:00Z",
+            quote_of_the_day="abcdefab-1234-1234-1234-abcdefabcdef",
+            template=self.template,
+            created_by=self.user,
+        )
+        res = self.client.get(ENTRY_URL, HTTP_ACCEPT="application/msgpack")
+
+        row = self.unpack(res.content)["results"][0]
+        self.assertEqual(row["title"], "2025-01-01T10:00:00Z")
+        self.assertEqual(
+            row["quote_of_the_day"], "abcdefab-1234-1234-1234-abcdefabcdef"
+        )
+        self.assertIsInstance(row["updated_at"], datetime)
+
+    def test_plain_data_left_alone(self):
+        """Test data not produced by a serializer is packed as it is"""
+        data = {"id": "abcdefab-1234-1234-1234-abcdefabcdef"}
+        self.assertEqual(self.unpack(MessagePackRenderer().render(data)), data)
+
+    def test_errors_rendered(self):
+        """Test validation errors of typed fields are packed as strings"""
+        res = self.client.post(
+            ENTRY_URL,
+            data=MessagePackRenderer().render({"template": "nope"}),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsInstance(self.unpack(res.content)["template"][0], str)
+
+    def test_invalid_body_rejected(self):
+        """Test malformed MessagePack returns a parse error"""
+        res = self.client.post(
+            ENTRY_URL, data=b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
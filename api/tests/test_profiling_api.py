@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import JournalEntry
+
+
+ENTRY_URL = reverse("api:journalentry-list")
+PROFILING_ON = {"ENABLED": True, "INTERVAL": 0.001}
+
+
+def profile_url(request_id):
+    """Return profile detail URL"""
+    return reverse("api:profile-detail", args=[request_id])
+
+
+class RequestProfilingTests(TestCase):
+    """Test the on-demand request profiler"""
+
+    def setUp(self):
+        cache.clear()
+        self.staff = get_user_model().objects.create_user(
+            "staff@action.com", "password123", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        JournalEntry.objects.create(title="Entry", created_by=self.staff)
+        self.client = APIClient()
+
+    def test_profiling_off_by_default(self):
+        """Test the trigger is ignored unless profiling is enabled"""
+        self.client.force_authenticate(self.staff)
+        res = self.client.get(ENTRY_URL, HTTP_X_PROFILE="1")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", res)
+
+    @override_settings(API_PROFILING=PROFILING_ON)
+    def test_staff_request_profiled_and_stored(self):
+        """Test a staff request is profiled and stored under its request id"""
+        self.client.force_authenticate(self.staff)
+        res = self.client.get(
+            ENTRY_URL, {"_profile": "1"}, HTTP_X_REQUEST_ID="slow-page-1"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Profile-Id"], "slow-page-1")
+
+        res = self.client.get(profile_url("slow-page-1"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/plain; charset=utf-8")
+
+    @override_settings(API_PROFILING=PROFILING_ON)
+    def test_non_staff_request_not_profiled(self):
+        """Test regular users cannot trigger or read profiles"""
+        self.client.force_authenticate(self.user)
+        res = self.client.get(ENTRY_URL, HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Id", res)
+
+        res = self.client.get(profile_url("anything"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(API_PROFILING={**PROFILING_ON, "MAX_PROFILES": 2})
+    def test_profile_retention_is_bounded(self):
+        """Test only the most recent profiles are kept"""
+        self.client.force_authenticate(self.staff)
+        for request_id in ("first", "second", "third"):
+            self.client.get(ENTRY_URL, HTTP_X_PROFILE="1", HTTP_X_REQUEST_ID=request_id)
+
+        self.assertEqual(
+            self.client.get(profile_url("first")).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get(profile_url("third")).status_code, status.HTTP_200_OK
+        )
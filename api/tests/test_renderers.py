@@ -0,0 +1,72 @@
+import json
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(TestCase):
+    """Test the orjson renderer and parser"""
+
+    def test_output_matches_stock_renderer(self):
+        """Test orjson output is byte-identical to DRF's renderer for API data"""
+        data = {
+            "uuid": uuid.uuid4(),
+            "created_at": timezone.now(),
+            "naive": timezone.now().replace(tzinfo=None),
+            "date": timezone.now().date(),
+            "amount": Decimal("1.50"),
+            "text": "café \u2028\u2029 \x1f",
+            "nested": [{"a": None, "b": True, "c": 1.5}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_float_notation(self):
+        """Test floats the notations differ on still decode to the same values"""
+        data = {"small": 1e-05, "large": 1e16, "plain": 0.1}
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_non_finite_floats_rejected(self):
+        """Test NaN and infinities fail as with the stock renderer, not as null"""
+        for value in (float("nan"), float("inf"), float("-inf")):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({"nested": [{"value": value}]})
+
+    def test_indented_output_matches_stock_renderer(self):
+        """Test indentation requests produce the stock output"""
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_json_round_trip_through_api(self):
+        """Test JSON bodies are parsed and rendered by the API"""
+        user = get_user_model().objects.create_user("test@action.com", "password123")
+        client = APIClient()
+        client.force_authenticate(user)
+        res = client.post(
+            reverse("api:journalentry-list"),
+            {"title": "Café", "rate_your_day": 7},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()["title"], "Café")
+
+        res = client.post(
+            reverse("api:journalentry-list"),
+            data=b"{not json",
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
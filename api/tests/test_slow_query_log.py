@@ -0,0 +1,116 @@
+from datetime import timedelta
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import SlowQuery
+from logjournal import metrics
+from logjournal.querylog import fingerprint, normalize, store
+
+
+@override_settings(SLOW_QUERY_LOG={"THRESHOLD_MS": 0})
+class SlowQueryLogTests(TestCase):
+    """Test slow query capture and aggregation"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_normalize_collapses_literals(self):
+        """Test literals and IN lists are replaced in fingerprints"""
+        self.assertEqual(
+            normalize(
+                "SELECT * FROM \"t1\"  WHERE a = 'x''y' AND b IN (%s, %s, %s) "
+                "LIMIT 21"
+            ),
+            'SELECT * FROM "t1" WHERE a = ? AND b IN (...) LIMIT ?',
+        )
+
+    def test_request_queries_aggregated_by_view(self):
+        """Test repeated requests aggregate into one row per fingerprint"""
+        url = reverse("api:journalentry-list")
+        self.client.get(url)
+        self.client.get(url)
+
+        rows = SlowQuery.objects.filter(origin="api:journalentry-list")
+        self.assertTrue(rows.exists())
+        self.assertTrue(all(row.count == 2 for row in rows))
+        self.assertTrue(all(row.max_time <= row.total_time for row in rows))
+
+    @override_settings(SLOW_QUERY_LOG={"THRESHOLD_MS": 0, "MAX_FINGERPRINTS": 2})
+    def test_store_is_bounded(self):
+        """Test the least recently seen fingerprint makes room for a new one"""
+        for digest in ("a", "b"):
+            SlowQuery.objects.create(
+                fingerprint=digest * 40, origin="task:test", sql="SELECT ?",
+                count=1, total_time=500, max_time=500,
+            )
+        SlowQuery.objects.filter(fingerprint="a" * 40).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        store("task:test", [("SELECT 1", 1.0)])
+
+        self.assertEqual(
+            set(SlowQuery.objects.values_list("fingerprint", flat=True)),
+            {"b" * 40, fingerprint("SELECT 1")[1]},
+        )
+
+    @skipIf(metrics.prometheus_client is None, "prometheus_client is not installed")
+    def test_storing_not_counted_as_request_queries(self):
+        """Test the request's query count leaves out storing its slow queries"""
+        url = reverse("api:journalentry-list")
+        self.client.get(url)
+
+        def counted_queries():
+            sample = "logjournal_http_request_db_queries_sum"
+            labels = {"view": "api:journalentry-list"}
+            registry = metrics.prometheus_client.REGISTRY
+            before = registry.get_sample_value(sample, labels)
+            self.client.get(url)
+            return registry.get_sample_value(sample, labels) - before
+
+        with override_settings(SLOW_QUERY_LOG={"ENABLED": False}):
+            unlogged = counted_queries()
+        self.assertEqual(counted_queries(), unlogged)
+
+    def test_concurrent_insert(self):
+        """Test losing the insert race inside a transaction adds to the winner"""
+        sql = "SELECT 1"
+        normalized, digest = fingerprint(sql)
+        SlowQuery.objects.create(
+            fingerprint=digest, origin="task:test", sql=normalized,
+            count=1, total_time=5, max_time=5,
+        )
+        update, calls = QuerySet.update, []
+
+        def racing_update(queryset, **kwargs):
+            # The row is not there yet on the first update, then it is.
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", racing_update):
+            store("task:test", [(sql, 7.0)])
+        row = SlowQuery.objects.get(fingerprint=digest)
+        self.assertEqual((row.count, row.max_time), (2, 7))
+
+    def test_admin_lists_top_offenders(self):
+        """Test the admin changelist shows captured queries"""
+        SlowQuery.objects.create(
+            fingerprint="a" * 40, origin="api:template-list", sql="SELECT ?",
+            count=3, total_time=900, max_time=500,
+        )
+        admin = get_user_model().objects.create_superuser(
+            "admin@action.com", "password123"
+        )
+        self.client.force_login(admin)
+        res = self.client.get(reverse("admin:journal_slowquery_changelist"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertContains(res, "api:template-list")
@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from journal.management.commands.profile_startup import (
+    Command,
+    package_times,
+    parse_importtime,
+)
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy._core
+import time:       300 |        420 |   numpy
+import time:        80 |        500 | journal.analytics
+"""
+
+
+class StartupProfileTests(TestCase):
+    """Test the startup import profile and the lazily loaded components"""
+
+    def test_parse_importtime(self):
+        """Test the import times are read per module and summed per package"""
+        modules = parse_importtime(IMPORTTIME.splitlines())
+        self.assertEqual(modules["numpy"], (300, 420))
+        self.assertEqual(
+            package_times(modules).most_common(), [("numpy", 420), ("journal", 80)]
+        )
+
+    def test_first_request_imports(self):
+        """Test the schema views, admin modules and numpy wait for first use"""
+        ready, modules = Command().run("web", "/api/journal-entries/")
+        self.assertEqual(ready["status"], "401 Unauthorized")
+        self.assertIn("journal.analytics", modules)
+        for module in ("drf_spectacular.views", "journal.admin", "numpy"):
+            self.assertNotIn(module, modules)
+
+        out = StringIO()
+        call_command("profile_startup", "worker", limit=3, stdout=out)
+        self.assertIn("modules imported", out.getvalue())
+
+    def test_lazy_admin(self):
+        """Test the admin still serves its registered models"""
+        admin = get_user_model().objects.create_superuser(
+            "admin@action.com", "password123"
+        )
+        self.client.force_login(admin)
+        res = self.client.get(reverse("admin:journal_slowquery_changelist"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,221 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import (
+    Category,
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+    Tombstone,
+)
+from journal.sync import encode_cursor
+from journal.tasks import purge_template_rows, purge_tombstones
+
+SYNC_URL = reverse("api:sync")
+
+
+@override_settings(SYNC={"OVERLAP_SECONDS": 0, "TOMBSTONE_RETENTION_DAYS": 30})
+class SyncApiTests(TestCase):
+    """Test the delta sync endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.field = TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+        self.entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        self.answer = EntryFieldAnswer.objects.create(
+            entry=self.entry, field=self.field, value="fine"
+        )
+        Template.objects.create(title="Other", slug="other", created_by=self.other)
+
+    def sync(self, cursor=None):
+        params = {"cursor": cursor} if cursor else {}
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync(self):
+        """Test a sync without cursor returns all of the user's rows"""
+        data = self.sync()
+        self.assertEqual(
+            [row["uuid"] for row in data["templates"]], [str(self.template.uuid)]
+        )
+        self.assertEqual(len(data["template_fields"]), 1)
+        self.assertEqual(len(data["journal_entries"]), 1)
+        self.assertEqual(len(data["entry_field_answers"]), 1)
+        self.assertEqual(data["deleted"], [])
+        self.assertTrue(data["cursor"])
+
+    def test_delta_sync_returns_changes_only(self):
+        """Test a sync with a cursor returns only rows changed since"""
+        cursor = self.sync()["cursor"]
+        category = Category.objects.create(name="Health", created_by=self.user)
+        self.entry.title = "Renamed"
+        self.entry.save()
+
+        data = self.sync(cursor)
+
+        self.assertEqual(data["templates"], [])
+        self.assertEqual(
+            [row["uuid"] for row in data["categories"]], [str(category.uuid)]
+        )
+        self.assertEqual([row["title"] for row in data["journal_entries"]], ["Renamed"])
+        self.assertEqual(data["entry_field_answers"], [])
+
+    def test_deletes_are_synced(self):
+        """Test deleted objects are returned as tombstones"""
+        cursor = self.sync()["cursor"]
+        self.client.delete(reverse("api:journalentry-detail", args=[self.entry.uuid]))
+
+        deleted = {
+            (row["model"], row["object_id"]) for row in self.sync(cursor)["deleted"]
+        }
+        self.assertEqual(
+            deleted,
+            {
+                ("journal_entry", str(self.entry.uuid)),
+                ("entry_field_answer", str(self.answer.uuid)),
+            },
+        )
+
+    def test_cascade_tombstones_written_at_once(self):
+        """Test a cascading delete writes all its tombstones with one insert"""
+        for i in range(5):
+            field = TemplateField.objects.create(
+                template=self.template, name=f"Field {i}", field_type="text"
+            )
+            EntryFieldAnswer.objects.create(entry=self.entry, field=field)
+        entry = JournalEntry.objects.get(pk=self.entry.pk)
+        with CaptureQueriesContext(connection) as queries:
+            entry.delete()
+
+        tombstone_queries = [
+            query["sql"] for query in queries if "journal_tombstone" in query["sql"]
+        ]
+        self.assertEqual(len(tombstone_queries), 1)
+        self.assertTrue(tombstone_queries[0].startswith("INSERT"))
+        self.assertEqual(Tombstone.objects.filter(owner=self.user).count(), 7)
+
+    def test_answers_tombstoned_for_their_entry_owner(self):
+        """Test answers deleted with a template go to their entries' owners"""
+        entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.other
+        )
+        answer = EntryFieldAnswer.objects.create(entry=entry, field=self.field)
+        template_uuid, field_pk = self.template.uuid, self.field.pk
+        self.template.delete()
+
+        self.assertEqual(
+            set(Tombstone.objects.values_list("model", "object_id", "owner")),
+            {
+                ("template", str(template_uuid), self.user.pk),
+                ("template_field", str(field_pk), self.user.pk),
+                ("entry_field_answer", str(self.answer.uuid), self.user.pk),
+                ("entry_field_answer", str(answer.uuid), self.other.pk),
+            },
+        )
+
+    def test_batch_purge_writes_tombstones(self):
+        """Test background purges leave tombstones and touch nulled rows"""
+        cursor = self.sync()["cursor"]
+        purge_template_rows(self.template.uuid)
+
+        data = self.sync(cursor)
+        self.assertEqual(
+            {row["model"] for row in data["deleted"]},
+            {"template", "template_field", "entry_field_answer"},
+        )
+        self.assertEqual([row["template"] for row in data["journal_entries"]], [None])
+
+    def test_sync_paged(self):
+        """Test a sync above the page size continues from its cursor"""
+        cursor = self.sync()["cursor"]
+        entries = [
+            JournalEntry.objects.create(template=self.template, created_by=self.user)
+            for _ in range(3)
+        ]
+        gone = sorted([str(self.entry.uuid), str(self.answer.uuid)])
+        self.entry.delete()
+
+        synced, deleted, pages = [], [], 0
+        with self.settings(SYNC={"OVERLAP_SECONDS": 0, "PAGE_SIZE": 2}):
+            while True:
+                data = self.sync(cursor)
+                pages += 1
+                synced += [row["uuid"] for row in data["journal_entries"]]
+                deleted += [row["object_id"] for row in data["deleted"]]
+                cursor = data["cursor"]
+                if not data["has_more"]:
+                    break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(synced), sorted(str(entry.uuid) for entry in entries))
+        self.assertEqual(sorted(deleted), gone)
+        self.assertEqual(self.sync(cursor)["journal_entries"], [])
+
+    @override_settings(SYNC={"OVERLAP_SECONDS": 30})
+    def test_late_commits_within_overlap(self):
+        """Test rows stamped before the cursor are only synced within the overlap"""
+        cursor_time = timezone.now()
+        cursor = encode_cursor(cursor_time)
+        JournalEntry.objects.filter(pk=self.entry.pk).update(
+            updated_at=cursor_time - timedelta(seconds=20)
+        )
+        late = JournalEntry.objects.create(template=self.template, created_by=self.user)
+        # Committed more than the overlap after being stamped: missed.
+        JournalEntry.objects.filter(pk=late.pk).update(
+            updated_at=cursor_time - timedelta(seconds=40)
+        )
+
+        data = self.sync(cursor)
+        self.assertEqual(
+            [row["uuid"] for row in data["journal_entries"]], [str(self.entry.uuid)]
+        )
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        res = self.client.get(SYNC_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_cursor(self):
+        """Test a cursor older than the tombstone retention needs a full sync"""
+        cursor = encode_cursor(timezone.now() - timedelta(days=31))
+        res = self.client.get(SYNC_URL, {"cursor": cursor})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_purge_tombstones(self):
+        """Test old tombstones are removed"""
+        Tombstone.objects.create(
+            model="template",
+            object_id="old",
+            owner=self.user,
+            deleted_at=timezone.now() - timedelta(days=31),
+        )
+        Tombstone.objects.create(model="template", object_id="new", owner=self.user)
+
+        self.assertEqual(purge_tombstones(), 1)
+        self.assertEqual(
+            list(Tombstone.objects.values_list("object_id", flat=True)), ["new"]
+        )
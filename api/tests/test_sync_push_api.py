@@ -0,0 +1,210 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import (
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+    Tombstone,
+)
+
+PUSH_URL = reverse("api:sync-push")
+
+
+class SyncPushApiTests(TestCase):
+    """Test pushing offline changes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.fields = [
+            TemplateField.objects.create(
+                template=self.template, name=f"Field {i}", field_type="text"
+            )
+            for i in range(3)
+        ]
+        self.entry = JournalEntry.objects.create(
+            title="Monday", template=self.template, created_by=self.user
+        )
+
+    def push(self, *changes):
+        res = self.client.post(PUSH_URL, {"changes": list(changes)}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data["results"]
+
+    def version(self, row):
+        row.refresh_from_db()
+        return row.updated_at.isoformat()
+
+    def test_create_entry_with_answers(self):
+        """Test an offline entry and its answers are created in one push"""
+        entry_id = uuid.uuid4()
+        answers = [
+            {
+                "model": "entry_field_answer",
+                "op": "upsert",
+                "uuid": str(uuid.uuid4()),
+                "data": {"entry": str(entry_id), "field": field.id, "value": "x"},
+            }
+            for field in self.fields
+        ]
+        entry = {
+            "model": "journal_entry",
+            "op": "upsert",
+            "uuid": str(entry_id),
+            "data": {"title": "Offline", "template": str(self.template.uuid)},
+        }
+
+        with self.assertNumQueries(15):
+            results = self.push(*answers, entry)
+
+        self.assertEqual({result["status"] for result in results}, {"applied"})
+        created = JournalEntry.objects.get(uuid=entry_id)
+        self.assertEqual(created.created_by, self.user)
+        self.assertEqual(created.template, self.template)
+        self.assertEqual(created.field_answers.count(), 3)
+
+    def test_update_with_current_version(self):
+        """Test an update based on the current version is applied"""
+        results = self.push(
+            {
+                "model": "journal_entry",
+                "op": "upsert",
+                "uuid": str(self.entry.uuid),
+                "base_version": self.version(self.entry),
+                "data": {"rate_your_day": 7},
+            }
+        )
+
+        self.assertEqual(results[0]["status"], "applied")
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.rate_your_day, 7)
+        self.assertEqual(self.entry.title, "Monday")
+        self.assertEqual(
+            results[0]["version"],
+            self.entry.updated_at.isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_stale_update_conflicts(self):
+        """Test an update based on an old version returns the server copy"""
+        base_version = self.version(self.entry)
+        self.entry.title = "Edited elsewhere"
+        self.entry.save()
+
+        results = self.push(
+            {
+                "model": "journal_entry",
+                "op": "upsert",
+                "uuid": str(self.entry.uuid),
+                "base_version": base_version,
+                "data": {"title": "Edited offline"},
+            }
+        )
+
+        self.assertEqual(results[0]["status"], "conflict")
+        self.assertEqual(results[0]["current"]["title"], "Edited elsewhere")
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.title, "Edited elsewhere")
+
+    def test_duplicate_answer_conflicts(self):
+        """Test answering a field that already has an answer conflicts"""
+        answer = EntryFieldAnswer.objects.create(
+            entry=self.entry, field=self.fields[0], value="server"
+        )
+        results = self.push(
+            {
+                "model": "entry_field_answer",
+                "op": "upsert",
+                "uuid": str(uuid.uuid4()),
+                "data": {
+                    "entry": str(self.entry.uuid),
+                    "field": self.fields[0].id,
+                    "value": "client",
+                },
+            }
+        )
+
+        self.assertEqual(results[0]["status"], "conflict")
+        self.assertEqual(results[0]["current"]["uuid"], str(answer.uuid))
+
+    def test_delete(self):
+        """Test deletes apply once and are idempotent"""
+        change = {
+            "model": "journal_entry",
+            "op": "delete",
+            "uuid": str(self.entry.uuid),
+            "base_version": self.version(self.entry),
+        }
+
+        self.assertEqual(self.push(change)[0]["status"], "applied")
+        self.assertEqual(self.push(change)[0]["status"], "applied")
+        self.assertFalse(JournalEntry.objects.exists())
+        self.assertTrue(
+            Tombstone.objects.filter(object_id=str(self.entry.uuid)).exists()
+        )
+
+    def test_other_users_objects_are_rejected(self):
+        """Test changes to another user's objects are rejected"""
+        entry = JournalEntry.objects.create(created_by=self.other)
+        results = self.push(
+            {
+                "model": "journal_entry",
+                "op": "upsert",
+                "uuid": str(entry.uuid),
+                "base_version": self.version(entry),
+                "data": {"title": "Mine now"},
+            },
+            {
+                "model": "entry_field_answer",
+                "op": "upsert",
+                "uuid": str(uuid.uuid4()),
+                "data": {"entry": str(entry.uuid), "field": self.fields[0].id},
+            },
+        )
+
+        self.assertEqual([result["status"] for result in results], ["rejected"] * 2)
+        entry.refresh_from_db()
+        self.assertIsNone(entry.title)
+        self.assertFalse(EntryFieldAnswer.objects.exists())
+
+    def test_other_users_fields_are_rejected(self):
+        """Test answers to fields of another user's template are rejected"""
+        template = Template.objects.create(
+            title="Theirs", slug="theirs", created_by=self.other
+        )
+        field = TemplateField.objects.create(
+            template=template, name="Secret", field_type="text"
+        )
+        results = self.push(
+            {
+                "model": "entry_field_answer",
+                "op": "upsert",
+                "uuid": str(uuid.uuid4()),
+                "data": {"entry": str(self.entry.uuid), "field": field.id},
+            }
+        )
+
+        self.assertEqual(results[0]["status"], "rejected")
+        self.assertEqual(results[0]["errors"], {"field": ["Field not found."]})
+        self.assertFalse(EntryFieldAnswer.objects.exists())
+
+    def test_duplicate_changes_are_invalid(self):
+        """Test an object cannot be changed twice in one push"""
+        change = {"model": "journal_entry", "op": "delete", "uuid": str(uuid.uuid4())}
+        res = self.client.post(PUSH_URL, {"changes": [change, change]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
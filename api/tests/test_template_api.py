@@ -62,7 +62,7 @@ class PrivateTemplateApiTests(TestCase):
         )
         url = detail_url(template.uuid)
         res = self.client.delete(url)
-        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
 
 
     def test_update_template(self):
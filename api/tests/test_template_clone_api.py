@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import Category, Template, TemplateField
+
+
+def clone_url(uuid):
+    """Return template clone URL"""
+    return reverse("api:template-clone", args=[uuid])
+
+
+class TemplateCloneApiTests(TestCase):
+    """Test cloning templates"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily Journal",
+            slug="daily-journal",
+            description="Daily journal template",
+            created_by=self.user,
+        )
+        self.category = Category.objects.create(name="Health", created_by=self.user)
+        self.template.categories.add(self.category)
+
+    def create_fields(self, count):
+        TemplateField.objects.bulk_create(
+            TemplateField(
+                template=self.template,
+                name=f"Field {i}",
+                field_type="number",
+                category=self.category,
+                order=i,
+                is_required=i % 2 == 0,
+            )
+            for i in range(count)
+        )
+
+    def test_clone_copies_fields_and_categories(self):
+        """Test the clone has its own copies of fields and category links"""
+        self.create_fields(3)
+        res = self.client.post(clone_url(self.template.uuid), {"title": "Copy"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        copy = Template.objects.get(uuid=res.data["uuid"])
+        self.assertEqual(copy.title, "Copy")
+        self.assertEqual(copy.description, self.template.description)
+        self.assertNotEqual(copy.slug, self.template.slug)
+        self.assertEqual(list(copy.categories.all()), [self.category])
+        self.assertEqual(
+            list(copy.fields.order_by("order").values_list("name", "is_required")),
+            list(
+                self.template.fields.order_by("order").values_list(
+                    "name", "is_required"
+                )
+            ),
+        )
+
+    def test_clone_query_count_is_constant(self):
+        """Test cloning issues the same number of queries for any size"""
+        self.create_fields(2)
+        with self.assertNumQueries(9) as small:
+            self.client.post(clone_url(self.template.uuid))
+        self.create_fields(40)
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.post(clone_url(self.template.uuid))
+
+    def test_repeated_clones_get_unique_slugs(self):
+        """Test cloning the same template twice does not clash on slug"""
+        first = self.client.post(clone_url(self.template.uuid))
+        second = self.client.post(clone_url(self.template.uuid))
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Template.objects.count(), 3)
+
+    def test_other_users_template_not_found(self):
+        """Test users cannot clone templates they do not own"""
+        other_user = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client.force_authenticate(other_user)
+        res = self.client.post(clone_url(self.template.uuid))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Template.objects.count(), 1)
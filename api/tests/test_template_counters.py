@@ -0,0 +1,121 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from journal.models import JournalEntry, Template, TemplateField
+
+
+def detail_url(uuid):
+    return reverse("api:template-detail", args=[uuid])
+
+
+class TemplateCounterTests(TestCase):
+    """Test the denormalized field and entry counts of templates"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.other = Template.objects.create(
+            title="Weekly", slug="weekly", created_by=self.user
+        )
+
+    def counts(self, template):
+        template.refresh_from_db()
+        return template.fields_count, template.entries_count
+
+    def test_counters_follow_writes(self):
+        """Test creating, moving and deleting rows moves the counters"""
+        field = TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+        TemplateField.objects.create(
+            template=self.template, name="Sleep", field_type="number"
+        )
+        entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        self.assertEqual(self.counts(self.template), (2, 1))
+
+        field = TemplateField.objects.get(pk=field.pk)
+        field.template = self.other
+        field.save()
+        entry = JournalEntry.objects.get(pk=entry.pk)
+        entry.template = None
+        entry.save()
+        self.assertEqual(self.counts(self.template), (1, 0))
+        self.assertEqual(self.counts(self.other), (1, 0))
+
+        field.delete()
+        self.assertEqual(self.counts(self.other), (0, 0))
+
+    def test_counted_in_the_same_transaction(self):
+        """Test a row whose counter update fails is not saved either"""
+        with mock.patch(
+            "journal.counters.apply_count_deltas", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                TemplateField.objects.create(
+                    template=self.template, name="Mood", field_type="text"
+                )
+        self.assertFalse(TemplateField.objects.exists())
+
+    def test_drifted_counter_stops_at_zero(self):
+        """Test deleting a row under a counter that drifted to zero"""
+        entry = JournalEntry.objects.create(
+            template=self.template, created_by=self.user
+        )
+        Template.objects.update(entries_count=0)
+        entry.delete()
+        self.assertEqual(self.counts(self.template), (0, 0))
+
+    def test_counters_in_api(self):
+        """Test the template API exposes read-only counters"""
+        TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+        res = self.client.patch(
+            detail_url(self.template.uuid), {"title": "Renamed", "fields_count": 9}
+        )
+        self.assertEqual(res.data["fields_count"], 1)
+        self.assertEqual(res.data["entries_count"], 0)
+        self.assertEqual(self.counts(self.template), (1, 0))
+
+    def test_saving_stale_template_keeps_counters(self):
+        """Test saving a template loaded earlier does not reset counters"""
+        stale = Template.objects.get(pk=self.template.pk)
+        JournalEntry.objects.create(template=self.template, created_by=self.user)
+        stale.title = "Renamed"
+        stale.save()
+        self.assertEqual(self.counts(self.template), (0, 1))
+
+    def test_clone_copies_fields_count(self):
+        """Test a clone starts with its fields counted and no entries"""
+        TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+        JournalEntry.objects.create(template=self.template, created_by=self.user)
+        copy = self.template.clone(created_by=self.user)
+        self.assertEqual(self.counts(copy), (1, 0))
+
+    def test_repair_command(self):
+        """Test the repair command recomputes drifted counters"""
+        TemplateField.objects.create(
+            template=self.template, name="Mood", field_type="text"
+        )
+        Template.objects.update(fields_count=5, entries_count=3)
+        out = StringIO()
+        call_command("repair_template_counters", batch_size=1, stdout=out)
+        self.assertIn("2 templates", out.getvalue())
+        self.assertEqual(self.counts(self.template), (1, 0))
+        self.assertEqual(self.counts(self.other), (0, 0))
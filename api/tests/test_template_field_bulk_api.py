@@ -0,0 +1,121 @@
+from unittest import mock
+
+from api.serializers import TemplateFieldBulkUpdateSerializer
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.models import Category, Template, TemplateField
+
+
+def bulk_url(uuid):
+    """Return template fields bulk update URL"""
+    return reverse("api:template-fields-bulk", args=[uuid])
+
+
+class TemplateFieldBulkUpdateApiTests(TestCase):
+    """Test reordering and editing template fields in bulk"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@action.com", "password123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = Template.objects.create(
+            title="Daily Journal", slug="daily-journal", created_by=self.user
+        )
+        self.fields = [
+            TemplateField.objects.create(
+                template=self.template, name=f"Field {i}", field_type="text", order=i
+            )
+            for i in range(3)
+        ]
+
+    def test_reorder_and_edit_fields(self):
+        """Test the new order and property changes are applied together"""
+        first, second, third = self.fields
+        payload = {
+            "order": [third.id, first.id, second.id],
+            "updates": [{"id": first.id, "is_required": True, "name": "Mood"}],
+        }
+        with self.assertNumQueries(8):
+            res = self.client.patch(bulk_url(self.template.uuid), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([f["id"] for f in res.data], payload["order"])
+        first.refresh_from_db()
+        third.refresh_from_db()
+        self.assertEqual(third.order, 0)
+        self.assertEqual(first.order, 1)
+        self.assertEqual(first.name, "Mood")
+        self.assertTrue(first.is_required)
+
+    def test_order_must_list_every_field(self):
+        """Test an incomplete order is rejected without changes"""
+        payload = {"order": [self.fields[1].id, self.fields[0].id]}
+        res = self.client.patch(bulk_url(self.template.uuid), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.fields[1].refresh_from_db()
+        self.assertEqual(self.fields[1].order, 1)
+
+    def test_updates_must_belong_to_template(self):
+        """Test property changes for foreign fields are rejected"""
+        other = Template.objects.create(
+            title="Other", slug="other", created_by=self.user
+        )
+        foreign = TemplateField.objects.create(
+            template=other, name="Foreign", field_type="text"
+        )
+        payload = {
+            "order": [f.id for f in self.fields],
+            "updates": [{"id": foreign.id, "name": "Hijacked"}],
+        }
+        res = self.client.patch(bulk_url(self.template.uuid), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_template_not_found(self):
+        """Test users cannot bulk edit templates they do not own"""
+        other_user = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        self.client.force_authenticate(other_user)
+        payload = {"order": [f.id for f in self.fields]}
+        res = self.client.patch(bulk_url(self.template.uuid), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_category_rejected(self):
+        """Test fields cannot be put in another user's category"""
+        other_user = get_user_model().objects.create_user(
+            "other@action.com", "password123"
+        )
+        theirs = Category.objects.create(name="Theirs", created_by=other_user)
+        payload = {
+            "order": [f.id for f in self.fields],
+            "updates": [{"id": self.fields[0].id, "category": str(theirs.uuid)}],
+        }
+        res = self.client.patch(bulk_url(self.template.uuid), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.fields[0].refresh_from_db()
+        self.assertIsNone(self.fields[0].category)
+
+    def test_field_deleted_concurrently(self):
+        """Test a field deleted after validation gives a 400, not a 500"""
+        validate = TemplateFieldBulkUpdateSerializer.validate
+
+        def validate_then_delete(serializer, attrs):
+            attrs = validate(serializer, attrs)
+            self.fields[2].delete()
+            return attrs
+
+        payload = {"order": [f.id for f in reversed(self.fields)]}
+        with mock.patch.object(
+            TemplateFieldBulkUpdateSerializer, "validate", validate_then_delete
+        ):
+            res = self.client.patch(
+                bulk_url(self.template.uuid), payload, format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.fields[0].refresh_from_db()
+        self.assertEqual(self.fields[0].order, 0)
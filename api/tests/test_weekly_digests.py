@@ -0,0 +1,106 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from journal.digests import last_week_start
+from journal.models import (
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+    WeeklyDigest,
+)
+from journal.tasks import generate_weekly_digests, schedule_weekly_digests
+
+DIGEST_URL = reverse("api:digest-list")
+WEEK = date(2025, 3, 3)
+
+
+@override_settings(DIGESTS={"CHUNK_SIZE": 2, "TOP_FIELDS": 2})
+class WeeklyDigestTests(TestCase):
+    """Test the weekly digests and their fan-out"""
+
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(f"user{i}@action.com", "pass123")
+            for i in range(5)
+        ]
+        self.user = self.users[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        template = Template.objects.create(
+            title="Daily", slug="daily", created_by=self.user
+        )
+        self.fields = [
+            TemplateField.objects.create(
+                template=template, name=name, field_type="number"
+            )
+            for name in ("Mood", "Sleep", "Water")
+        ]
+        # Two entries in the week, one the week after.
+        for day, rate, answered in ((3, 4, 3), (9, 8, 2), (10, 1, 3)):
+            entry = JournalEntry.objects.create(
+                created_by=self.user,
+                rate_your_day=rate,
+                entry_date=date(2025, 3, day),
+            )
+            for field in self.fields[:answered]:
+                EntryFieldAnswer.objects.create(entry=entry, field=field, value="1")
+
+    def test_last_week_start(self):
+        """Test the last complete week starts on the Monday before"""
+        self.assertEqual(last_week_start(date(2025, 3, 10)), WEEK)
+        self.assertEqual(last_week_start(date(2025, 3, 16)), WEEK)
+
+    def test_chunk_digests_in_grouped_queries(self):
+        """Test a chunk costs the same few queries whatever its size"""
+        user_ids = [user.pk for user in self.users]
+        with self.assertNumQueries(3):
+            self.assertEqual(generate_weekly_digests(user_ids, WEEK.isoformat()), 5)
+
+        digest = WeeklyDigest.objects.get(user=self.user)
+        self.assertEqual(digest.entries_count, 2)
+        self.assertEqual(digest.average_rate, 6)
+        self.assertEqual(
+            digest.top_fields,
+            [
+                {"field": self.fields[0].pk, "name": "Mood", "answers": 2},
+                {"field": self.fields[1].pk, "name": "Sleep", "answers": 2},
+            ],
+        )
+        empty = WeeklyDigest.objects.get(user=self.users[1])
+        self.assertEqual((empty.entries_count, empty.top_fields), (0, []))
+
+    def test_fan_out_is_restartable(self):
+        """Test the fan-out chunks users and skips the digests already made"""
+        generate_weekly_digests([self.users[1].pk], WEEK.isoformat())
+        self.users[4].is_active = False
+        self.users[4].save()
+
+        with mock.patch.object(generate_weekly_digests, "delay") as delay:
+            self.assertEqual(schedule_weekly_digests(WEEK.isoformat()), 2)
+        chunks = [call.args[0] for call in delay.call_args_list]
+        pending = [self.users[i].pk for i in (0, 2, 3)]
+        self.assertEqual(chunks, [pending[:2], pending[2:]])
+
+        # A chunk run twice keeps the digests of its first run.
+        generate_weekly_digests(pending, WEEK.isoformat())
+        generate_weekly_digests(pending, WEEK.isoformat())
+        self.assertEqual(WeeklyDigest.objects.count(), 4)
+
+    def test_list_own_digests(self):
+        """Test users list their own digests, latest week first"""
+        generate_weekly_digests([self.user.pk, self.users[1].pk], WEEK.isoformat())
+        generate_weekly_digests([self.user.pk], "2025-03-10")
+
+        res = self.client.get(DIGEST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["week_start"] for row in res.data["results"]],
+            ["2025-03-10", "2025-03-03"],
+        )
+        self.assertEqual(res.data["results"][0]["entries_count"], 1)
@@ -1,16 +1,31 @@
 from django.urls import path
 from .views import (
     CreateCustomUserApiView,
+    UserProfileApiView,
     ListCreateTemplateApiView,
     TemplateDetailApiView,
+    TemplateCloneApiView,
     ListCreateCategoryApiView,
     CategoryDetailApiView,
+    CategoryFacetsApiView,
+    FieldAnalyticsApiView,
+    ListWeeklyDigestApiView,
     ListCreateJournalEntryApiView,
+    JournalEntryHeatmapApiView,
     JournalEntryDetailApiView,
     ListCreateTemplateFieldApiView,
     TemplateFieldDetailApiView,
+    TemplateFieldBulkUpdateApiView,
     ListCreateEntryFieldAnswerApiView,
     EntryFieldAnswerDetailApiView,
+    ProfileDetailApiView,
+    DeletionJobDetailApiView,
+    ListCreateExportJobApiView,
+    ExportJobDetailApiView,
+    ExportJobDownloadApiView,
+    BatchApiView,
+    SyncApiView,
+    SyncPushApiView,
 )
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -21,18 +36,43 @@ urlpatterns = [
     path("register", CreateCustomUserApiView.as_view(), name="signup"),
     path("login", TokenObtainPairView.as_view(), name="signin"),
     path("refresh", TokenRefreshView.as_view(), name="refresh"),
+    path("profile", UserProfileApiView.as_view(), name="profile"),
+    path("batch", BatchApiView.as_view(), name="batch"),
+    path("sync", SyncApiView.as_view(), name="sync"),
+    path("sync/push", SyncPushApiView.as_view(), name="sync-push"),
     path("templates", ListCreateTemplateApiView.as_view(), name="template-list"),
     path(
         "templates/<uuid:uuid>",
         TemplateDetailApiView.as_view(),
         name="template-detail",
     ),
+    path(
+        "templates/<uuid:uuid>/clone/",
+        TemplateCloneApiView.as_view(),
+        name="template-clone",
+    ),
+    path(
+        "templates/<uuid:uuid>/fields/bulk/",
+        TemplateFieldBulkUpdateApiView.as_view(),
+        name="template-fields-bulk",
+    ),
     path("categories/", ListCreateCategoryApiView.as_view(), name="category-list"),
+    path(
+        "categories/facets/",
+        CategoryFacetsApiView.as_view(),
+        name="category-facets",
+    ),
     path(
         "categories/<uuid:uuid>/",
         CategoryDetailApiView.as_view(),
         name="category-detail",
     ),
+    path(
+        "analytics/fields/",
+        FieldAnalyticsApiView.as_view(),
+        name="field-analytics",
+    ),
+    path("digests/", ListWeeklyDigestApiView.as_view(), name="digest-list"),
     path(
         "template-fields/",
         ListCreateTemplateFieldApiView.as_view(),
@@ -48,6 +88,11 @@ urlpatterns = [
         ListCreateJournalEntryApiView.as_view(),
         name="journalentry-list",
     ),
+    path(
+        "journal-entries/heatmap/",
+        JournalEntryHeatmapApiView.as_view(),
+        name="journalentry-heatmap",
+    ),
     path(
         "journal-entries/<uuid:uuid>/",
         JournalEntryDetailApiView.as_view(),
@@ -63,4 +108,25 @@ urlpatterns = [
         EntryFieldAnswerDetailApiView.as_view(),
         name="entryfieldanswer-detail",
     ),
+    path(
+        "deletion-jobs/<uuid:uuid>/",
+        DeletionJobDetailApiView.as_view(),
+        name="deletionjob-detail",
+    ),
+    path("exports/", ListCreateExportJobApiView.as_view(), name="exportjob-list"),
+    path(
+        "exports/<uuid:uuid>/",
+        ExportJobDetailApiView.as_view(),
+        name="exportjob-detail",
+    ),
+    path(
+        "exports/<uuid:uuid>/download/",
+        ExportJobDownloadApiView.as_view(),
+        name="exportjob-download",
+    ),
+    path(
+        "profiles/<str:request_id>/",
+        ProfileDetailApiView.as_view(),
+        name="profile-detail",
+    ),
 ]
@@ -1,7 +1,9 @@
 from rest_framework.generics import (
+    GenericAPIView,
     ListCreateAPIView,
     ListAPIView,
     CreateAPIView,
+    RetrieveAPIView,
     RetrieveUpdateDestroyAPIView,
 )
 from .serializers import (
@@ -13,11 +15,20 @@ from .serializers import (
     JournalEntrySerializer,
     TemplateFieldSerializer,
     EntryFieldAnswerSerializer,
+    TemplateFieldBulkUpdateSerializer,
+    TemplateCloneSerializer,
+    DeletionJobSerializer,
+    BatchSerializer,
+    PushSerializer,
+    ExportJobSerializer,
+    WeeklyDigestSerializer,
 )
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import filters
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
 from accounts.models import CustomUser
@@ -27,9 +38,37 @@ from journal.models import (
     JournalEntry,
     TemplateField,
     EntryFieldAnswer,
+    DeletionJob,
+    ExportJob,
+    WeeklyDigest,
+    local_date,
+)
+from journal.analytics import AnalyticsUnavailable, field_analytics
+from journal.facets import (
+    category_facets,
+    invalidate_category_facets,
+    template_category_owner_ids,
+)
+from journal.heatmap import entry_heatmap
+from journal.sync import (
+    ExpiredCursor,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    encode_position,
+    read_page,
+    sync_settings,
 )
+from journal.exports import export_storage
+from journal.tasks import purge_template, purge_user, run_export
+from django.utils import timezone
+from django.db import transaction
 from rest_framework.response import Response
+from django.http import FileResponse, Http404, HttpResponse
+from .batch import run_operation
+from .push import apply_changes
 from .pagination import CustomPagination
+from .profiling import ProfilingMixin, get_profile
 
 
 class CreateCustomUserApiView(CreateAPIView):
@@ -57,7 +96,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = []
 
 
-class ListCustomUsersApiView(ListAPIView):
+class ListCustomUsersApiView(ProfilingMixin, ListAPIView):
     serializer_class = ListCustomUserSerializer
     queryset = CustomUser.objects.all()
     permission_classes = [IsAuthenticated]
@@ -71,7 +110,7 @@ class ListCustomUsersApiView(ListAPIView):
     search_fields = ["username", "email"]
 
 
-class UserProfileApiView(RetrieveUpdateDestroyAPIView):
+class UserProfileApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = CustomUserSerializer
     queryset = CustomUser.objects.all()
     permission_classes = [IsAuthenticated]
@@ -79,11 +118,26 @@ class UserProfileApiView(RetrieveUpdateDestroyAPIView):
     def get_object(self):
         return self.request.user
 
+    def destroy(self, request, *args, **kwargs):
+        user = self.get_object()
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        return enqueue_deletion(request, "user", user.pk, purge_user)
+
+
+def enqueue_deletion(request, target_type, target_id, task):
+    """Record a deletion job, start it after commit and return its handle."""
+    job = DeletionJob.objects.create(
+        target_type=target_type, target_id=str(target_id), requested_by=request.user
+    )
+    transaction.on_commit(lambda: task.delay(str(job.uuid)))
+    return Response(DeletionJobSerializer(job).data, status=202)
+
 
 # Template Views
-class ListCreateTemplateApiView(ListCreateAPIView):
+class ListCreateTemplateApiView(ProfilingMixin, ListCreateAPIView):
     serializer_class = TemplateSerializer
-    queryset = Template.objects.all()
+    queryset = Template.objects.filter(deleting=False)
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
     filter_backends = [
@@ -99,15 +153,42 @@ class ListCreateTemplateApiView(ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class TemplateDetailApiView(RetrieveUpdateDestroyAPIView):
+class TemplateDetailApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = TemplateSerializer
-    queryset = Template.objects.all()
+    queryset = Template.objects.filter(deleting=False)
     permission_classes = [IsAuthenticated]
     lookup_field = "uuid"
 
+    def destroy(self, request, *args, **kwargs):
+        template = self.get_object()
+        # Hidden right away, the rows themselves go in the background.
+        Template.objects.filter(pk=template.pk).update(deleting=True)
+        invalidate_category_facets(*template_category_owner_ids(template.pk))
+        return enqueue_deletion(request, "template", template.uuid, purge_template)
+
+
+class TemplateCloneApiView(ProfilingMixin, GenericAPIView):
+    """Copy a template with its categories and fields server-side."""
+
+    serializer_class = TemplateCloneSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return Template.objects.filter(created_by=self.request.user, deleting=False)
+
+    def post(self, request, *args, **kwargs):
+        template = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        copy = template.clone(
+            created_by=request.user, title=serializer.validated_data.get("title")
+        )
+        return Response(TemplateSerializer(copy).data, status=201)
+
 
 # Category Views
-class ListCreateCategoryApiView(ListCreateAPIView):
+class ListCreateCategoryApiView(ProfilingMixin, ListCreateAPIView):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     permission_classes = [IsAuthenticated]
@@ -125,15 +206,47 @@ class ListCreateCategoryApiView(ListCreateAPIView):
         serializer.save(created_by=self.request.user)
 
 
-class CategoryDetailApiView(RetrieveUpdateDestroyAPIView):
+class CategoryDetailApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     permission_classes = [IsAuthenticated]
     lookup_field = "uuid"
 
 
+class CategoryFacetsApiView(ProfilingMixin, APIView):
+    """Count the templates, template fields and answers of each category."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(category_facets(request.user.pk))
+
+
+class FieldAnalyticsApiView(ProfilingMixin, APIView):
+    """Correlate the numeric and boolean fields with the day's rating."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return Response(field_analytics(request.user.pk))
+        except AnalyticsUnavailable as exc:
+            return Response({"detail": str(exc)}, status=503)
+
+
+class ListWeeklyDigestApiView(ProfilingMixin, ListAPIView):
+    serializer_class = WeeklyDigestSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        return WeeklyDigest.objects.filter(user=self.request.user).order_by(
+            "-week_start"
+        )
+
+
 # Journal Entry Views
-class ListCreateJournalEntryApiView(ListCreateAPIView):
+class ListCreateJournalEntryApiView(ProfilingMixin, ListCreateAPIView):
     serializer_class = JournalEntrySerializer
     queryset = JournalEntry.objects.all()
     permission_classes = [IsAuthenticated]
@@ -143,15 +256,34 @@ class ListCreateJournalEntryApiView(ListCreateAPIView):
         filters.OrderingFilter,
         filters.SearchFilter,
     ]
-    filterset_fields = ["title", "created_by__username", "template__title"]
-    ordering_fields = ["created_at", "title"]
+    filterset_fields = {
+        "title": ["exact"],
+        "created_by__username": ["exact"],
+        "template__title": ["exact"],
+        "missing_required_count": ["exact", "gt", "gte"],
+    }
+    ordering_fields = ["created_at", "title", "missing_required_count"]
     search_fields = ["title", "quote_of_the_day"]
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class JournalEntryDetailApiView(RetrieveUpdateDestroyAPIView):
+class JournalEntryHeatmapApiView(ProfilingMixin, APIView):
+    """Count the entries and average their rating for each day of a year."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        year = request.query_params.get("year")
+        if year is None:
+            year = local_date(timezone.now(), request.user).year
+        elif not year.isdigit() or not 1 <= int(year) <= 9999:
+            return Response({"detail": "Invalid year."}, status=400)
+        return Response(entry_heatmap(request.user.pk, int(year)))
+
+
+class JournalEntryDetailApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = JournalEntrySerializer
     queryset = JournalEntry.objects.all()
     permission_classes = [IsAuthenticated]
@@ -159,9 +291,9 @@ class JournalEntryDetailApiView(RetrieveUpdateDestroyAPIView):
 
 
 # Template Field Views
-class ListCreateTemplateFieldApiView(ListCreateAPIView):
+class ListCreateTemplateFieldApiView(ProfilingMixin, ListCreateAPIView):
     serializer_class = TemplateFieldSerializer
-    queryset = TemplateField.objects.all()
+    queryset = TemplateField.objects.filter(template__deleting=False)
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
     filter_backends = [
@@ -174,15 +306,34 @@ class ListCreateTemplateFieldApiView(ListCreateAPIView):
     search_fields = ["name"]
 
 
-class TemplateFieldDetailApiView(RetrieveUpdateDestroyAPIView):
+class TemplateFieldDetailApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = TemplateFieldSerializer
-    queryset = TemplateField.objects.all()
+    queryset = TemplateField.objects.filter(template__deleting=False)
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
 
 
+class TemplateFieldBulkUpdateApiView(ProfilingMixin, GenericAPIView):
+    """Reorder and edit all fields of a template in a single transaction."""
+
+    serializer_class = TemplateFieldBulkUpdateSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return Template.objects.filter(created_by=self.request.user, deleting=False)
+
+    def patch(self, request, *args, **kwargs):
+        template = self.get_object()
+        serializer = self.get_serializer(template, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        fields = template.fields.order_by("order", "id")
+        return Response(TemplateFieldSerializer(fields, many=True).data)
+
+
 # Entry Field Answer Views
-class ListCreateEntryFieldAnswerApiView(ListCreateAPIView):
+class ListCreateEntryFieldAnswerApiView(ProfilingMixin, ListCreateAPIView):
     serializer_class = EntryFieldAnswerSerializer
     queryset = EntryFieldAnswer.objects.all()
     permission_classes = [IsAuthenticated]
@@ -197,8 +348,203 @@ class ListCreateEntryFieldAnswerApiView(ListCreateAPIView):
     search_fields = ["value"]
 
 
-class EntryFieldAnswerDetailApiView(RetrieveUpdateDestroyAPIView):
+class EntryFieldAnswerDetailApiView(ProfilingMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = EntryFieldAnswerSerializer
     queryset = EntryFieldAnswer.objects.all()
     permission_classes = [IsAuthenticated]
     lookup_field = "uuid"
+
+
+class DeletionJobDetailApiView(RetrieveAPIView):
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return DeletionJob.objects.filter(requested_by=self.request.user)
+
+
+# Export Views
+class ListCreateExportJobApiView(ProfilingMixin, ListCreateAPIView):
+    """
+    Start an export of the account's entries and answers, or list them.
+
+    An account has one export pending or running at a time, starting another
+    meanwhile gets a 409.
+    """
+
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user).order_by(
+            "-created_at"
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            # Locking the user serializes concurrent requests of one account.
+            get_user_model().objects.select_for_update().get(pk=request.user.pk)
+            active = ExportJob.objects.filter(
+                requested_by=request.user, status__in=ExportJob.ACTIVE_STATUSES
+            )
+            if active.exists():
+                return Response(
+                    {"detail": "An export is already in progress."}, status=409
+                )
+            job = serializer.save(requested_by=request.user)
+            transaction.on_commit(lambda: run_export.delay(str(job.uuid)))
+        return Response(serializer.data, status=202)
+
+
+class ExportJobDetailApiView(RetrieveAPIView):
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+
+class ExportJobDownloadApiView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, uuid, *args, **kwargs):
+        try:
+            job = ExportJob.objects.get(uuid=uuid, requested_by=request.user)
+        except ExportJob.DoesNotExist:
+            raise Http404
+        if job.status == "expired":
+            return Response({"detail": "The export has expired."}, status=410)
+        if job.status != "done":
+            return Response({"detail": "The export is not ready."}, status=409)
+        return FileResponse(
+            export_storage().open(job.artifact),
+            as_attachment=True,
+            filename=f"logjournal-export-{job.created_at:%Y-%m-%d}.zip",
+            content_type="application/zip",
+        )
+
+
+# Batch Views
+class BatchApiView(APIView):
+    """
+    Run several API operations in one call.
+
+    Operations run in order. With ``atomic`` they share one transaction
+    that is rolled back, and the remaining operations skipped, as soon as
+    one of them fails.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data["operations"]
+
+        results = []
+        if not serializer.validated_data["atomic"]:
+            for operation in operations:
+                results.append(run_operation(request, operation, results))
+            return Response({"results": results, "rolled_back": False})
+
+        with transaction.atomic():
+            for operation in operations:
+                result = run_operation(request, operation, results)
+                results.append(result)
+                if result["status"] >= 400:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"results": results, "rolled_back": True}, status=400
+                    )
+        return Response({"results": results, "rolled_back": False})
+
+
+# Sync Views
+class SyncApiView(APIView):
+    """
+    Return everything of the user changed since ``cursor``.
+
+    Without a cursor every row is returned. The response carries the cursor
+    to send on the next sync; deleted objects are listed under ``deleted``.
+    At most ``SYNC["PAGE_SIZE"]`` rows are returned at once; while
+    ``has_more`` is true the client syncs again with the new cursor.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializers = {
+        "templates": TemplateSerializer,
+        "categories": CategorySerializer,
+        "template_fields": TemplateFieldSerializer,
+        "journal_entries": JournalEntrySerializer,
+        "entry_field_answers": EntryFieldAnswerSerializer,
+    }
+
+    def get(self, request, *args, **kwargs):
+        # Taken before reading so rows committed meanwhile are in the next sync.
+        now = timezone.now()
+        try:
+            position = decode_cursor(request.query_params.get("cursor"))
+        except InvalidCursor as exc:
+            return Response({"detail": str(exc)}, status=400)
+        except ExpiredCursor as exc:
+            return Response({"detail": str(exc)}, status=410)
+
+        if position.until is None:
+            position = position._replace(until=now)
+        pages, next_position = read_page(
+            request.user, position, sync_settings()["PAGE_SIZE"]
+        )
+        data = {
+            key: serializer(pages[key], many=True).data
+            for key, serializer in self.serializers.items()
+        }
+        data["deleted"] = [
+            {
+                "model": tombstone.model,
+                "object_id": tombstone.object_id,
+                "deleted_at": tombstone.deleted_at,
+            }
+            for tombstone in pages.get("deleted", [])
+        ]
+        if next_position is None:
+            data["cursor"] = encode_cursor(position.until)
+        else:
+            data["cursor"] = encode_position(next_position)
+        data["has_more"] = next_position is not None
+        return Response(data)
+
+
+class SyncPushApiView(APIView):
+    """
+    Apply a batch of offline changes to entries and answers.
+
+    Objects are identified by client-generated uuids. Every change gets a
+    result: ``applied`` with the new ``version``, ``conflict`` with the
+    server copy, or ``rejected`` with the validation errors.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = PushSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_changes(request.user, serializer.validated_data["changes"])
+        return Response({"results": results})
+
+
+# Profiling Views
+class ProfileDetailApiView(APIView):
+    """Return a stored request profile as collapsed stacks for flamegraphs."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, request_id):
+        profile = get_profile(request_id)
+        if profile is None:
+            raise Http404
+        return HttpResponse(profile, content_type="text/plain; charset=utf-8")
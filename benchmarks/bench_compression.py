@@ -0,0 +1,40 @@
+"""
+CPU cost against bytes saved for each supported response encoding and a
+range of levels, on ``journal-entries/`` pages of 100 and 1000 rows.
+"""
+
+from benchmarks.common import entry_page, report, setup_django, timed
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+
+
+def main():
+    setup_django()
+    from api.renderers import ORJSONRenderer
+    from logjournal.compression import COMPRESSORS, compress
+
+    for rows in (100, 1000):
+        body = ORJSONRenderer().render(entry_page(rows))
+        results = [("", "bytes", "ratio", "us/page", "MB/s")]
+        for encoding, levels in LEVELS.items():
+            if encoding not in COMPRESSORS:
+                continue
+            for level in levels:
+                size = len(compress(encoding, body, level))
+                seconds = timed(
+                    lambda: compress(encoding, body, level), repeat=3, number=5
+                )
+                results.append(
+                    (
+                        f"{encoding} level {level}",
+                        size,
+                        f"{len(body) / size:.1f}x",
+                        f"{seconds * 1e6:.0f}",
+                        f"{len(body) / seconds / 1e6:.1f}",
+                    )
+                )
+        report(f"{rows}-row entry page, {len(body)} bytes uncompressed", results)
+
+
+if __name__ == "__main__":
+    main()
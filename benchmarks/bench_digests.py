@@ -0,0 +1,80 @@
+"""
+Weekly digest throughput, in users per second, for a range of chunk sizes
+against computing one user at a time.
+
+Runs against a throwaway test database seeded with ``USERS`` users, each
+with a week of entries answering a few fields.
+"""
+
+from datetime import timedelta
+
+from benchmarks.common import report, setup_django, timed
+
+USERS = 2000
+FIELDS = 5
+CHUNK_SIZES = (1, 50, 200, 1000)
+
+
+def seed(week_start):
+    from django.contrib.auth import get_user_model
+    from journal.models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(email=f"user{i}@bench.local", username=f"user{i}") for i in range(USERS)
+    )
+    users = list(User.objects.order_by("pk"))
+    template = Template.objects.create(title="Daily", slug="daily", created_by=users[0])
+    fields = TemplateField.objects.bulk_create(
+        TemplateField(template=template, name=f"Field {i}", field_type="number")
+        for i in range(FIELDS)
+    )
+    entries = JournalEntry.objects.bulk_create(
+        JournalEntry(
+            created_by=user,
+            template=template,
+            rate_your_day=day + 3,
+            entry_date=week_start + timedelta(days=day),
+        )
+        for user in users
+        for day in range(7)
+    )
+    EntryFieldAnswer.objects.bulk_create(
+        EntryFieldAnswer(entry=entry, field=field, value="1")
+        for index, entry in enumerate(entries)
+        for field in fields[: index % FIELDS + 1]
+    )
+    return [user.pk for user in users]
+
+
+def main():
+    setup_django()
+    from django.test.utils import setup_databases, teardown_databases
+    from journal.digests import compute_weekly_digests, last_week_start
+
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        week_start = last_week_start()
+        user_ids = seed(week_start)
+
+        def run(chunk_size):
+            for start in range(0, len(user_ids), chunk_size):
+                compute_weekly_digests(user_ids[start : start + chunk_size], week_start)
+
+        results = [("", "s/run", "users/s")]
+        for chunk_size in CHUNK_SIZES:
+            seconds = timed(lambda: run(chunk_size), repeat=3, number=1)
+            results.append(
+                (
+                    f"chunks of {chunk_size}",
+                    f"{seconds:.3f}",
+                    f"{len(user_ids) / seconds:.0f}",
+                )
+            )
+        report(f"Weekly digests of {len(user_ids)} users", results)
+    finally:
+        teardown_databases(databases, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compare DRF's stock JSON renderer and parser with the orjson ones on a
+100-row ``journal-entries/`` page.
+"""
+
+import io
+
+from benchmarks.common import entry_page, report, setup_django, timed
+
+
+def main():
+    setup_django()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api.parsers import ORJSONParser
+    from api.renderers import ORJSONRenderer, orjson
+
+    if orjson is None:
+        print("orjson is not installed, nothing to compare.")
+        return
+
+    page = entry_page(100)
+    stock = JSONRenderer().render(page)
+    fast = ORJSONRenderer().render(page)
+    assert stock == fast, "renderers disagree"
+
+    render_stock = timed(lambda: JSONRenderer().render(page))
+    render_fast = timed(lambda: ORJSONRenderer().render(page))
+    parse_stock = timed(lambda: JSONParser().parse(io.BytesIO(stock)))
+    parse_fast = timed(lambda: ORJSONParser().parse(io.BytesIO(stock)))
+
+    report(
+        f"100-row entry page ({len(stock)} bytes), microseconds per call",
+        [
+            ("", "json", "orjson", "speed-up"),
+            ("render", f"{render_stock * 1e6:.1f}", f"{render_fast * 1e6:.1f}",
+             f"{render_stock / render_fast:.1f}x"),
+            ("parse", f"{parse_stock * 1e6:.1f}", f"{parse_fast * 1e6:.1f}",
+             f"{parse_stock / parse_fast:.1f}x"),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
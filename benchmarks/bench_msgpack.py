@@ -0,0 +1,49 @@
+"""
+Compare payload size and decode time of JSON and MessagePack on a 100-row
+``journal-entries/`` page, as the mobile client would receive it.
+"""
+
+import gzip
+import io
+import json
+
+from benchmarks.common import entry_page, report, setup_django, timed
+
+
+def main():
+    setup_django()
+    from api.parsers import MessagePackParser
+    from api.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+
+    if msgpack is None:
+        print("msgpack is not installed, nothing to compare.")
+        return
+
+    page = entry_page(100)
+    as_json = ORJSONRenderer().render(page)
+    as_msgpack = MessagePackRenderer().render(page)
+
+    decoders = [("json (stdlib)", lambda: json.loads(as_json))]
+    if orjson is not None:
+        decoders.append(("json (orjson)", lambda: orjson.loads(as_json)))
+    decoders.append(("msgpack", lambda: msgpack.unpackb(as_msgpack)))
+    decoders.append(
+        ("msgpack (typed)", lambda: MessagePackParser().parse(io.BytesIO(as_msgpack)))
+    )
+
+    report(
+        "100-row entry page, bytes",
+        [
+            ("", "raw", "gzip"),
+            ("json", len(as_json), len(gzip.compress(as_json))),
+            ("msgpack", len(as_msgpack), len(gzip.compress(as_msgpack))),
+        ],
+    )
+    report(
+        "Decode, microseconds per page",
+        [(label, f"{timed(decode) * 1e6:.1f}") for label, decode in decoders],
+    )
+
+
+if __name__ == "__main__":
+    main()
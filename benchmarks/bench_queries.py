@@ -0,0 +1,179 @@
+"""
+The cost of the list queries behind the API views as the data grows.
+
+Each scenario is a list view of ``api.views`` with query parameters; it runs
+the view's own filter, search and ordering backends, then times the count
+and first page the paginator would fetch and captures the page's ``EXPLAIN``
+plan. Scenarios run against a throwaway test database seeded with
+``journal.seeding`` to each of ``--sizes`` users in turn.
+
+Each timing is the best of many runs, the one least disturbed by the rest of
+the machine. Results are written as JSON with ``--output``. Given a
+``--baseline`` from an earlier run, scenarios that got slower than
+``--threshold`` times the baseline, by more than ``--min-difference``
+milliseconds, or whose plan changed are listed and the script exits
+with 1::
+
+    python -m benchmarks.bench_queries --output baseline.json
+    python -m benchmarks.bench_queries --baseline baseline.json
+"""
+
+import argparse
+import json
+import re
+import sys
+
+from benchmarks.common import report, setup_django, timed
+
+PAGE_SIZE = 25
+
+
+def scenarios():
+    from api import views
+
+    entries = views.ListCreateJournalEntryApiView
+    return {
+        "entries-recent": (entries, {"ordering": "-created_at"}),
+        "entries-search": (entries, {"search": "stay"}),
+        "entries-by-template": (entries, {"template__title": "Workout log"}),
+        "entries-incomplete": (
+            entries,
+            {"missing_required_count__gt": 0, "ordering": "-missing_required_count"},
+        ),
+        "templates-search": (views.ListCreateTemplateApiView, {"search": "morning"}),
+        "templates-by-title": (views.ListCreateTemplateApiView, {"ordering": "title"}),
+        "categories-by-name": (views.ListCreateCategoryApiView, {"ordering": "name"}),
+        "fields-by-name": (views.ListCreateTemplateFieldApiView, {"ordering": "name"}),
+        "answers-search": (views.ListCreateEntryFieldAnswerApiView, {"search": "rain"}),
+        "answers-by-field": (
+            views.ListCreateEntryFieldAnswerApiView,
+            {"field__name": "Steps", "ordering": "field__name"},
+        ),
+        "users-search": (views.ListCustomUsersApiView, {"search": "seed-"}),
+    }
+
+
+def view_queryset(view_class, user, params):
+    """Return the queryset ``view_class`` would list for ``user`` and ``params``."""
+    from rest_framework.test import APIRequestFactory
+
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = view.initialize_request(APIRequestFactory().get("/", params))
+    view.request.user = user
+    return view.filter_queryset(view.get_queryset())
+
+
+def plan_shape(plan):
+    """Return ``plan`` without the row estimates, costs and node ids."""
+    plan = re.sub(r"\s*\((cost|actual)=[^)]*\)", "", plan)
+    return "\n".join(re.sub(r"^\d+ \d+ \d+ ", "", line) for line in plan.splitlines())
+
+
+def measure(user):
+    results = {}
+    for name, (view_class, params) in scenarios().items():
+        queryset = view_queryset(view_class, user, params)
+
+        def run():
+            queryset.count()
+            list(queryset[:PAGE_SIZE])
+
+        results[name] = {
+            "seconds": timed(run, repeat=20, number=10, summary=min),
+            "rows": queryset.count(),
+            "plan": plan_shape(queryset[:PAGE_SIZE].explain()),
+        }
+    return results
+
+
+def compare(results, baseline, threshold, min_difference):
+    """Return (scenario and size, problem) for each regression from ``baseline``."""
+    problems = []
+    for size, scenarios in results.items():
+        for name, result in scenarios.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                continue
+            slower = result["seconds"] - before["seconds"]
+            if (
+                result["seconds"] > before["seconds"] * threshold
+                and slower > min_difference
+            ):
+                ratio = result["seconds"] / before["seconds"]
+                problems.append((f"{name} at {size}", f"{ratio:.2f}x slower"))
+            if result["plan"] != before["plan"]:
+                problems.append((f"{name} at {size}", "plan changed"))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10,100,1000", help="Users, ascending.")
+    parser.add_argument("--entries-per-user", type=int, default=100)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with this JSON file.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument(
+        "--min-difference",
+        type=float,
+        default=0.5,
+        help="Milliseconds below which a slowdown is noise.",
+    )
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import setup_databases, teardown_databases
+    from journal.seeding import seed_users
+
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        results, seeded = {}, 0
+        for size in sizes:
+            seed_users("bench", seeded, size - seeded, args.entries_per_user, 365, 0)
+            seeded = size
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            user = get_user_model().objects.order_by("pk").first()
+            results[str(size)] = measure(user)
+            report(
+                f"{size} users, {size * args.entries_per_user} entries",
+                [("", "ms", "rows")]
+                + [
+                    (name, f"{result['seconds'] * 1000:.2f}", result["rows"])
+                    for name, result in results[str(size)].items()
+                ],
+            )
+    finally:
+        teardown_databases(databases, verbosity=0)
+
+    document = {
+        "vendor": connection.vendor,
+        "entries_per_user": args.entries_per_user,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline["vendor"], baseline["entries_per_user"]) != (
+            connection.vendor,
+            args.entries_per_user,
+        ):
+            sys.exit("The baseline was taken on another database or data shape.")
+        problems = compare(
+            results, baseline["results"], args.threshold, args.min_difference / 1000
+        )
+        if problems:
+            report("Regressions against the baseline", problems)
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
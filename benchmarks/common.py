@@ -0,0 +1,70 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Run a benchmark from the repository root, e.g.::
+
+    python -m benchmarks.bench_json
+"""
+
+import os
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "logjournal.settings")
+    import django
+
+    django.setup()
+
+
+def timed(func, repeat=7, number=200, summary=statistics.median):
+    """Return the seconds per call of ``func``, ``summary`` of ``repeat`` runs."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    return summary(runs)
+
+
+def entry_page(rows=100):
+    """Return a paginated ``journal-entries/`` payload of ``rows`` entries."""
+    from django.utils import timezone
+    from api.serializers import JournalEntrySerializer
+    from journal.models import JournalEntry
+
+    now = timezone.now()
+    template_id = uuid.uuid4()
+    entries = []
+    for i in range(rows):
+        entry = JournalEntry(
+            title=f"Entry {i} — notes",
+            template_id=template_id,
+            created_by_id=1,
+            quote_of_the_day="Stay hungry, stay foolish",
+            rate_your_day=i % 10 + 1,
+        )
+        entry.created_at = now - timedelta(days=i, microseconds=i)
+        entry.updated_at = now - timedelta(days=i)
+        entry.entry_date = entry.created_at.date()
+        entries.append(entry)
+
+    return {
+        "count": rows * 10,
+        "next": "http://testserver/api/journal-entries/?page=2",
+        "previous": None,
+        "results": JournalEntrySerializer(entries, many=True).data,
+    }
+
+
+def report(title, rows):
+    """Print ``rows`` of (label, value, ...) as an aligned table."""
+    print(title)
+    for row in rows:
+        label, *values = row
+        print(f"  {label:<28}" + "".join(f"{value:>16}" for value in values))
+    print()
@@ -1,3 +1,43 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        "short_sql",
+        "origin",
+        "count",
+        "total_time",
+        "average_time",
+        "max_time",
+        "updated_at",
+    )
+    list_filter = ("origin",)
+    search_fields = ("sql", "origin")
+    ordering = ("-total_time",)
+    readonly_fields = (
+        "fingerprint",
+        "origin",
+        "sql",
+        "count",
+        "total_time",
+        "max_time",
+        "created_at",
+        "updated_at",
+    )
+
+    @admin.display(description="Query")
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description="Average time")
+    def average_time(self, obj):
+        return round(obj.total_time / obj.count, 2) if obj.count else 0
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,236 @@
+"""
+Correlation of numeric and boolean template fields with ``rate_your_day``.
+
+The typed answers of a user come out of one query as flat arrays, and the
+per-field counts, means and Pearson correlations are computed with
+``numpy.bincount`` over all fields at once. The result is cached per user
+for ``FIELD_ANALYTICS["TIMEOUT"]`` seconds and dropped as soon as a change
+to an answer or entry of the user commits; bulk writes that bypass the model
+signals call ``invalidate_field_analytics`` themselves. Like the category
+facets, this needs a cache shared by every process, see ``journal.checks``.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .completeness import deleted_with
+from .models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+# numpy is a good share of process startup, so it is imported on first use.
+NOT_IMPORTED = object()
+np = NOT_IMPORTED
+
+
+def import_numpy():
+    global np
+    if np is NOT_IMPORTED:
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover - optional dependency
+            np = None
+    return np
+
+
+DEFAULTS = {
+    "TIMEOUT": 3600,
+    "BINS": 10,
+}
+
+CACHE_KEY = "field-analytics:{}"
+
+
+class AnalyticsUnavailable(Exception):
+    pass
+
+
+FIELD_TYPES = ("number", "boolean")
+TRUE_VALUES = ("true", "yes", "1")
+FALSE_VALUES = ("false", "no", "0")
+# Larger numbers overflow the sums of squares, they count as unanswered.
+MAX_MAGNITUDE = 1e150
+
+
+def analytics_settings():
+    return {**DEFAULTS, **getattr(settings, "FIELD_ANALYTICS", {})}
+
+
+def parse_numbers(values):
+    """Return ``values`` as floats, NaN where a value is not a number."""
+    values = np.char.strip(values)
+    try:
+        return values.astype(float)
+    except ValueError:
+        pass
+    parsed = np.full(len(values), np.nan)
+    for index, value in enumerate(values):
+        try:
+            parsed[index] = float(value)
+        except ValueError:
+            continue
+    return parsed
+
+
+def parse_booleans(values):
+    """Return ``values`` as 1.0 and 0.0, NaN where a value is not a boolean."""
+    values = np.char.lower(np.char.strip(values))
+    parsed = np.full(len(values), np.nan)
+    parsed[np.isin(values, TRUE_VALUES)] = 1.0
+    parsed[np.isin(values, FALSE_VALUES)] = 0.0
+    return parsed
+
+
+def histogram(values, field_type, bins):
+    if field_type == "boolean":
+        counts = np.bincount(values.astype(int), minlength=2)
+        return {"edges": [0, 1], "counts": counts.tolist()}
+    try:
+        counts, edges = np.histogram(values, bins=bins)
+    except ValueError:
+        # Large values too close together to split, they share one bin.
+        edges = [float(values.min()), float(values.max())]
+        return {"edges": edges, "counts": [len(values)]}
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def compute_field_analytics(user_id):
+    rows = (
+        EntryFieldAnswer.objects.filter(
+            entry__created_by_id=user_id, field__field_type__in=FIELD_TYPES
+        )
+        .exclude(value=None)
+        .values_list(
+            "field_id",
+            "field__name",
+            "field__field_type",
+            "value",
+            "entry__rate_your_day",
+        )
+    )
+    rows = list(rows)
+    if not rows:
+        return []
+    field_ids, names, field_types, values, rates = zip(*rows)
+
+    field_ids = np.array(field_ids)
+    values = np.array(values, dtype=str)
+    rates = np.array([np.nan if rate is None else rate for rate in rates])
+    field_types = np.array(field_types)
+    numbers = np.full(len(values), np.nan)
+    for field_type, parse in (("number", parse_numbers), ("boolean", parse_booleans)):
+        mask = field_types == field_type
+        if mask.any():
+            numbers[mask] = parse(values[mask])
+
+    fields, starts, index = np.unique(field_ids, return_index=True, return_inverse=True)
+    size = len(fields)
+    # "inf" and "nan" parse as floats, but count as unanswered.
+    answered = np.abs(numbers) <= MAX_MAGNITUDE
+    count = np.bincount(index, weights=answered, minlength=size)
+    mean_sum = np.bincount(index[answered], weights=numbers[answered], minlength=size)
+
+    # Pearson correlation over the answers whose entry has a rating.
+    paired = answered & ~np.isnan(rates)
+    x, y, at = numbers[paired], rates[paired], index[paired]
+    n = np.bincount(at, minlength=size)
+    sx, sy = np.bincount(at, x, size), np.bincount(at, y, size)
+    sxx, syy = np.bincount(at, x * x, size), np.bincount(at, y * y, size)
+    sxy = np.bincount(at, x * y, size)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        mean = mean_sum / count
+        correlation = (n * sxy - sx * sy) / np.sqrt(
+            (n * sxx - sx * sx) * (n * syy - sy * sy)
+        )
+    correlation[n < 3] = np.nan
+
+    # The parsed values of each field, in field order.
+    order = np.argsort(index[answered], kind="stable")
+    grouped = np.split(numbers[answered][order], np.cumsum(count, dtype=int)[:-1])
+
+    bins = analytics_settings()["BINS"]
+    result = []
+    for position, (field_id, start) in enumerate(zip(fields, starts)):
+        field_values = grouped[position]
+        result.append(
+            {
+                "field": int(field_id),
+                "name": names[start],
+                "field_type": field_types[start],
+                "count": int(count[position]),
+                "mean": (
+                    None if not np.isfinite(mean[position]) else float(mean[position])
+                ),
+                "correlation": (
+                    None
+                    if not np.isfinite(correlation[position])
+                    else round(float(correlation[position]), 4)
+                ),
+                "histogram": (
+                    histogram(field_values, field_types[start], bins)
+                    if len(field_values)
+                    else None
+                ),
+            }
+        )
+    return result
+
+
+def field_analytics(user_id):
+    """Return the statistics of the user's numeric and boolean fields, cached."""
+    if import_numpy() is None:
+        raise AnalyticsUnavailable("Field analytics require numpy.")
+    key = CACHE_KEY.format(user_id)
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = compute_field_analytics(user_id)
+        cache.set(key, analytics, analytics_settings()["TIMEOUT"])
+    return analytics
+
+
+def invalidate_field_analytics(*user_ids):
+    keys = [CACHE_KEY.format(user_id) for user_id in set(user_ids)]
+    # Once committed, or a read in between would cache the old statistics again.
+    transaction.on_commit(partial(cache.delete_many, keys))
+
+
+def answering_user_ids(**filters):
+    """Return the owners of the entries with answers matching ``filters``."""
+    lookups = {f"field_answers__{name}": value for name, value in filters.items()}
+    return (
+        JournalEntry.objects.filter(**lookups)
+        .values_list("created_by_id", flat=True)
+        .distinct()
+    )
+
+
+# Signal handlers, connected when ``JournalConfig.ready`` imports this module.
+
+
+@receiver(post_save, sender=EntryFieldAnswer)
+@receiver(post_delete, sender=EntryFieldAnswer)
+def answer_changed(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, JournalEntry, TemplateField, Template):
+        # Covered by the handlers of what is deleted.
+        return
+    owners = JournalEntry.objects.filter(pk=instance.entry_id).values_list(
+        "created_by_id", flat=True
+    )
+    invalidate_field_analytics(*owners)
+
+
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_delete, sender=JournalEntry)
+def entry_changed(sender, instance, **kwargs):
+    invalidate_field_analytics(instance.created_by_id)
+
+
+@receiver(post_save, sender=TemplateField)
+@receiver(pre_delete, sender=TemplateField)
+def template_field_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    invalidate_field_analytics(*answering_user_ids(field=instance))
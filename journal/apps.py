@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JournalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "journal"
+
+    def ready(self):
+        # Connect the signal handlers and register the checks.
+        from . import analytics, checks, completeness, counters, facets, sync  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+System checks of the deployment settings the journal relies on.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The cached category facets and field analytics are invalidated by
+    writes in any web or celery process, which a per-process cache never
+    sees.
+    """
+    if not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        Error(
+            "The default cache is local to each process, so cached category "
+            "facets and field analytics go stale after writes elsewhere.",
+            hint="Set CACHE_REDIS_URL, or use a cache backend shared by all "
+            "processes such as logjournal.cache.InstrumentedRedisCache.",
+            id="journal.E001",
+        )
+    ]
@@ -0,0 +1,106 @@
+"""
+Precomputed ``missing_required_count`` of journal entries.
+
+The count is the number of required fields of the entry's template without
+a non-empty answer. It is recomputed by a single ``UPDATE`` of the entries
+concerned whenever an answer or the entry's template changes, or a template
+field is added, removed, moved or made (not) required, so "entries with
+unanswered required fields" is an indexed filter instead of an anti-join.
+Bulk writes that bypass the model signals call ``refresh_missing_required``
+themselves.
+"""
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+
+def missing_required_subquery():
+    answered = (
+        EntryFieldAnswer.objects.filter(
+            entry=OuterRef(OuterRef("pk")), field=OuterRef("pk")
+        )
+        .exclude(value=None)
+        .exclude(value="")
+    )
+    missing = (
+        TemplateField.objects.filter(template=OuterRef("template"), is_required=True)
+        .exclude(Exists(answered))
+        .values("template")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(missing, output_field=IntegerField()), 0)
+
+
+def refresh_missing_required(entries):
+    """Recompute the count of the entries in the ``entries`` queryset."""
+    return entries.update(missing_required_count=missing_required_subquery())
+
+
+def deleted_with(origin, *models):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, models)
+
+
+# Signal handlers, connected when ``JournalConfig.ready`` imports this module.
+
+
+@receiver(post_save, sender=EntryFieldAnswer)
+@receiver(post_delete, sender=EntryFieldAnswer)
+def answer_changed(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, JournalEntry, TemplateField, Template):
+        # Refreshed, if still there, by the handlers of what is deleted.
+        return
+    # An answer moved to another entry leaves a field of the old one unanswered.
+    loaded = getattr(instance, "_loaded_values", {})
+    entry_ids = {loaded.get("entry_id", instance.entry_id), instance.entry_id}
+    refresh_missing_required(JournalEntry.objects.filter(pk__in=entry_ids))
+
+
+@receiver(post_save, sender=JournalEntry)
+def entry_saved(sender, instance, created, raw=False, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    moved = loaded.get("template_id", instance.template_id) != instance.template_id
+    if raw or not (created or moved):
+        return
+    refresh_missing_required(JournalEntry.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=TemplateField)
+def template_field_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    old_template_id = loaded.get("template_id", instance.template_id)
+    if created:
+        changed = instance.is_required
+    elif "is_required" not in loaded:
+        # Never loaded, what the save changed is unknown.
+        changed = True
+    else:
+        moved = old_template_id != instance.template_id
+        changed = loaded["is_required"] != instance.is_required or (
+            moved and instance.is_required
+        )
+    if not changed:
+        return
+    refresh_missing_required(
+        JournalEntry.objects.filter(
+            template_id__in={old_template_id, instance.template_id}
+        )
+    )
+
+
+@receiver(post_delete, sender=TemplateField)
+def template_field_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Template) or not instance.is_required:
+        return
+    refresh_missing_required(JournalEntry.objects.filter(template=instance.template_id))
+
+
+@receiver(pre_delete, sender=Template)
+def template_deleted(sender, instance, **kwargs):
+    # Its entries are about to lose their template, and required fields.
+    JournalEntry.objects.filter(template=instance).update(missing_required_count=0)
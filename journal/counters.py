@@ -0,0 +1,128 @@
+"""
+Denormalized ``fields_count`` and ``entries_count`` of templates.
+
+Creating, re-pointing or deleting a template field or journal entry moves
+the counters of the templates concerned with ``F()`` updates in the same
+transaction as the write, see ``AtomicSaveMixin``. Bulk writes that bypass
+the model signals call ``apply_count_deltas`` themselves;
+``repair_template_counters`` recomputes counters that drifted anyway, e.g.
+after raw SQL. A counter that drifted low stops at zero instead of failing
+the write that decrements it.
+"""
+
+from collections import Counter
+
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import JournalEntry, Template, TemplateField
+
+COUNTERS = {
+    TemplateField: "fields_count",
+    JournalEntry: "entries_count",
+}
+
+
+def apply_count_deltas(counter, deltas):
+    """Add ``{template_id: delta}`` to ``counter`` with a single update."""
+    deltas = {pk: delta for pk, delta in deltas.items() if pk and delta}
+    if not deltas:
+        return
+    change = Case(
+        *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    Template.objects.filter(pk__in=deltas).update(
+        **{counter: Greatest(F(counter) + change, Value(0))}
+    )
+
+
+def move_deltas(moves):
+    """Return the deltas of rows moving between templates, as (old, new) pairs."""
+    deltas = Counter()
+    for old, new in moves:
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+    return deltas
+
+
+def counted_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(template=OuterRef("pk"))
+            .values("template")
+            .annotate(count=Count("*"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def repair_template_counters(batch_size):
+    """Recompute the counters that differ from the actual counts."""
+    drifted = (
+        Template.objects.annotate(
+            actual_fields=counted_subquery(TemplateField),
+            actual_entries=counted_subquery(JournalEntry),
+        )
+        .filter(
+            ~Q(fields_count=F("actual_fields")) | ~Q(entries_count=F("actual_entries"))
+        )
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    repaired = 0
+    while True:
+        batch = list(drifted[:batch_size])
+        if not batch:
+            return repaired
+        repaired += Template.objects.filter(pk__in=batch).update(
+            fields_count=counted_subquery(TemplateField),
+            entries_count=counted_subquery(JournalEntry),
+        )
+
+
+def deleted_with_template(origin):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, Template)
+
+
+# Signal handlers, connected when ``JournalConfig.ready`` imports this module.
+
+
+@receiver(post_save, sender=TemplateField)
+@receiver(post_save, sender=JournalEntry)
+def count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        old = None
+    else:
+        loaded = getattr(instance, "_loaded_values", {})
+        old = loaded.get("template_id", instance.template_id)
+    apply_count_deltas(COUNTERS[sender], move_deltas([(old, instance.template_id)]))
+
+
+@receiver(post_delete, sender=TemplateField)
+@receiver(post_delete, sender=JournalEntry)
+def count_deleted(sender, instance, origin=None, **kwargs):
+    if deleted_with_template(origin):
+        # The fields go with their template, and its counters with it.
+        return
+    apply_count_deltas(COUNTERS[sender], {instance.template_id: -1})
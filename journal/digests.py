@@ -0,0 +1,111 @@
+"""
+Weekly journaling digests.
+
+``schedule_weekly_digests`` walks the active users by primary key and queues
+``generate_weekly_digests`` for each chunk of ``DIGESTS["CHUNK_SIZE"]`` of
+them. A chunk costs two grouped queries and one insert whatever its size.
+Users who already have the week's digest are skipped and inserts ignore
+existing rows, so rerunning the fan-out or a chunk after a crash only fills
+in what is missing.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .models import EntryFieldAnswer, JournalEntry, WeeklyDigest
+
+DEFAULTS = {
+    "CHUNK_SIZE": 500,
+    "TOP_FIELDS": 3,
+}
+
+
+def digests_settings():
+    return {**DEFAULTS, **getattr(settings, "DIGESTS", {})}
+
+
+def last_week_start(today=None):
+    """Return the Monday of the last complete week."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=today.weekday() + 7)
+
+
+def pending_user_chunks(week_start, chunk_size):
+    """Yield the ids of active users without a digest for the week, in chunks."""
+    users = (
+        get_user_model()
+        .objects.filter(is_active=True)
+        .exclude(digests__week_start=week_start)
+        .order_by("pk")
+    )
+    last = None
+    while True:
+        page = users if last is None else users.filter(pk__gt=last)
+        chunk = list(page.values_list("pk", flat=True)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def compute_weekly_digests(user_ids, week_start):
+    """Return the unsaved digests of ``user_ids`` for the week."""
+    week = (week_start, week_start + timedelta(days=6))
+    entries = {
+        row["created_by_id"]: row
+        for row in JournalEntry.objects.filter(
+            created_by_id__in=user_ids, entry_date__range=week
+        )
+        .values("created_by_id")
+        .annotate(count=Count("*"), average_rate=Avg("rate_your_day"))
+        .order_by()
+    }
+    answers = (
+        EntryFieldAnswer.objects.filter(
+            entry__created_by_id__in=user_ids, entry__entry_date__range=week
+        )
+        .exclude(value=None)
+        .exclude(value="")
+        .values("entry__created_by_id", "field_id", "field__name")
+        .annotate(answers=Count("*"))
+        .order_by("entry__created_by_id", "-answers", "field__name")
+    )
+    limit = digests_settings()["TOP_FIELDS"]
+    top_fields = defaultdict(list)
+    for row in answers:
+        fields = top_fields[row["entry__created_by_id"]]
+        if len(fields) < limit:
+            fields.append(
+                {
+                    "field": row["field_id"],
+                    "name": row["field__name"],
+                    "answers": row["answers"],
+                }
+            )
+
+    digests = []
+    for user_id in user_ids:
+        row = entries.get(user_id, {})
+        average = row.get("average_rate")
+        digests.append(
+            WeeklyDigest(
+                user_id=user_id,
+                week_start=week_start,
+                entries_count=row.get("count", 0),
+                average_rate=round(average, 2) if average is not None else None,
+                top_fields=top_fields[user_id],
+            )
+        )
+    return digests
+
+
+def store_weekly_digests(user_ids, week_start):
+    """Compute and save the week's digests, keeping those already there."""
+    digests = compute_weekly_digests(user_ids, week_start)
+    WeeklyDigest.objects.bulk_create(digests, ignore_conflicts=True)
+    return len(digests)
@@ -0,0 +1,214 @@
+"""
+Account exports written in the background.
+
+``write_export`` writes the entries and answers of a user into a zip
+archive with one member per dataset, ``CHUNK_SIZE`` rows at a time, and
+records the rows written so far on the job for clients polling its
+progress. NDJSON and CSV members are deflated; Parquet members, which need
+``pyarrow``, are compressed by Parquet itself and stored as is. Archives go
+to the "exports" storage and are deleted by ``expire_exports`` once
+``RETENTION_HOURS`` have passed. A job not updated for ``STALE_MINUTES``,
+its worker died or it was never queued, is failed by
+``fail_stale_exports`` so its user can start another export.
+"""
+
+import csv
+import importlib.util
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import EntryFieldAnswer, ExportJob, JournalEntry
+
+DEFAULTS = {
+    "CHUNK_SIZE": 2000,
+    "RETENTION_HOURS": 24,
+    "STALE_MINUTES": 60,
+}
+
+# The exported columns of each dataset, integer columns aside all text.
+DATASETS = {
+    "entries": (
+        lambda user_id: JournalEntry.objects.filter(created_by_id=user_id),
+        {
+            "uuid": "uuid",
+            "title": "title",
+            "template": "template_id",
+            "entry_date": "entry_date",
+            "quote_of_the_day": "quote_of_the_day",
+            "rate_your_day": "rate_your_day",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+        },
+    ),
+    "answers": (
+        lambda user_id: EntryFieldAnswer.objects.filter(entry__created_by_id=user_id),
+        {
+            "uuid": "uuid",
+            "entry": "entry_id",
+            "field": "field_id",
+            "field_name": "field__name",
+            "value": "value",
+            "created_at": "created_at",
+            "updated_at": "updated_at",
+        },
+    ),
+}
+INTEGER_COLUMNS = {"rate_your_day", "field"}
+
+
+def exports_settings():
+    return {**DEFAULTS, **getattr(settings, "EXPORTS", {})}
+
+
+def export_storage():
+    return storages["exports"]
+
+
+def available_formats():
+    formats = [value for value, _ in ExportJob.FORMAT_CHOICES]
+    # Looked up without importing pyarrow, which only Parquet exports need.
+    if importlib.util.find_spec("pyarrow") is None:
+        formats.remove("parquet")
+    return formats
+
+
+def chunks(queryset, columns, chunk_size):
+    """Yield the rows of ``queryset`` as dicts of ``columns``, by primary key."""
+    queryset = queryset.order_by("pk").values("pk", *columns.values())
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(page[:chunk_size])
+        if not rows:
+            return
+        last = rows[-1]["pk"]
+        yield [{name: row[lookup] for name, lookup in columns.items()} for row in rows]
+
+
+def as_text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class NDJSONWriter:
+    compression = zipfile.ZIP_DEFLATED
+    extension = "ndjson"
+
+    def __init__(self, stream, columns):
+        self.stream = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")
+
+    def write(self, rows):
+        for row in rows:
+            self.stream.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+    def close(self):
+        self.stream.close()
+
+
+class CSVWriter:
+    compression = zipfile.ZIP_DEFLATED
+    extension = "csv"
+
+    def __init__(self, stream, columns):
+        self.stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.stream, fieldnames=list(columns))
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(
+            {key: as_text(value) for key, value in row.items()} for row in rows
+        )
+
+    def close(self):
+        self.stream.close()
+
+
+class ParquetWriter:
+    compression = zipfile.ZIP_STORED
+    extension = "parquet"
+
+    def __init__(self, stream, columns):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.stream = stream
+        self.schema = pyarrow.schema(
+            [
+                (name, pyarrow.int64() if name in INTEGER_COLUMNS else pyarrow.string())
+                for name in columns
+            ]
+        )
+        # Parquet seeks while writing, so it goes through a temporary file
+        # with each chunk as a row group.
+        self.file = tempfile.TemporaryFile()
+        self.writer = pyarrow.parquet.ParquetWriter(
+            self.file, self.schema, compression="zstd"
+        )
+
+    def write(self, rows):
+        rows = [{key: as_text(value) for key, value in row.items()} for row in rows]
+        table = self.pyarrow.Table.from_pylist(rows, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, self.stream)
+        self.file.close()
+        self.stream.close()
+
+
+WRITERS = {
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def write_export(job):
+    """Write the archive of ``job`` and return its name in the export storage."""
+    chunk_size = exports_settings()["CHUNK_SIZE"]
+    writer_class = WRITERS[job.format]
+    user_id = job.requested_by_id
+
+    total = sum(queryset(user_id).count() for queryset, _ in DATASETS.values())
+    ExportJob.objects.filter(pk=job.pk).update(
+        total_rows=total, written_rows=0, updated_at=timezone.now()
+    )
+
+    written = 0
+    with tempfile.TemporaryFile() as archive:
+        with zipfile.ZipFile(archive, "w") as zf:
+            for dataset, (queryset, columns) in DATASETS.items():
+                info = zipfile.ZipInfo(f"{dataset}.{writer_class.extension}")
+                info.compress_type = writer_class.compression
+                writer = writer_class(zf.open(info, "w", force_zip64=True), columns)
+                for rows in chunks(queryset(user_id), columns, chunk_size):
+                    writer.write(rows)
+                    written += len(rows)
+                    ExportJob.objects.filter(pk=job.pk).update(
+                        written_rows=written, updated_at=timezone.now()
+                    )
+                writer.close()
+        archive.seek(0)
+        name = f"{user_id}/{job.pk}.zip"
+        return export_storage().save(name, File(archive, name=name))
+
+
+def expiry_time():
+    return timezone.now() + timedelta(hours=exports_settings()["RETENTION_HOURS"])
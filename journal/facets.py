@@ -0,0 +1,146 @@
+"""
+Per-category counts for the category sidebar.
+
+The counts of all the categories of a user come from one grouped query,
+leaving out templates queued for deletion, and are cached per user for
+``CATEGORY_FACETS["TIMEOUT"]`` seconds. Changes to templates, their
+category links, template fields and answers drop the cached counts of the
+users concerned once the change commits; bulk writes that bypass the model
+signals call ``invalidate_category_facets`` themselves. Writes in any
+process must reach the cache, so it has to be shared by all of them, see
+``journal.checks``.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, EntryFieldAnswer, Template, TemplateField
+
+DEFAULTS = {
+    "TIMEOUT": 300,
+}
+
+CACHE_KEY = "category-facets:{}"
+
+
+def facets_settings():
+    return {**DEFAULTS, **getattr(settings, "CATEGORY_FACETS", {})}
+
+
+def compute_category_facets(user_id):
+    # Templates being purged are hidden already, so is what they hold.
+    links = (
+        Template.categories.through.objects.filter(
+            category_id=OuterRef("pk"), template__deleting=False
+        )
+        .values("category_id")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    listed_fields = Q(template_fields__template__deleting=False)
+    rows = (
+        Category.objects.filter(created_by_id=user_id)
+        .annotate(
+            templates_count=Coalesce(Subquery(links, output_field=IntegerField()), 0),
+            template_fields_count=Count(
+                "template_fields", filter=listed_fields, distinct=True
+            ),
+            answers_count=Count("template_fields__answers", filter=listed_fields),
+        )
+        .order_by("name", "uuid")
+        .values(
+            "uuid", "name", "templates_count", "template_fields_count", "answers_count"
+        )
+    )
+    return list(rows)
+
+
+def category_facets(user_id):
+    """Return the counts of every category of the user, cached."""
+    key = CACHE_KEY.format(user_id)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_category_facets(user_id)
+        cache.set(key, facets, facets_settings()["TIMEOUT"])
+    return facets
+
+
+def invalidate_category_facets(*user_ids):
+    keys = [CACHE_KEY.format(user_id) for user_id in set(user_ids)]
+    # Once committed, or a read in between would cache the old counts again.
+    transaction.on_commit(partial(cache.delete_many, keys))
+
+
+def category_owner_ids(*category_ids):
+    category_ids = {category_id for category_id in category_ids if category_id}
+    if not category_ids:
+        return []
+    return Category.objects.filter(pk__in=category_ids).values_list(
+        "created_by_id", flat=True
+    )
+
+
+def template_category_owner_ids(template_id):
+    """Return the users whose category counts include the template."""
+    owners = set(
+        Category.objects.filter(
+            Q(templates=template_id) | Q(template_fields__template_id=template_id)
+        ).values_list("created_by_id", flat=True)
+    )
+    template = Template.objects.filter(uuid=template_id)
+    owners.update(template.values_list("created_by_id", flat=True))
+    return owners
+
+
+def field_category_owner_ids(field_ids):
+    """Return the owners of the categories of the given template fields."""
+    return Category.objects.filter(template_fields__in=field_ids).values_list(
+        "created_by_id", flat=True
+    )
+
+
+# Signal handlers, connected when ``JournalConfig.ready`` imports this module.
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Template)
+def category_changed(sender, instance, **kwargs):
+    invalidate_category_facets(instance.created_by_id)
+
+
+@receiver(m2m_changed, sender=Template.categories.through)
+def template_categories_changed(sender, instance, action, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, Category):
+        invalidate_category_facets(instance.created_by_id)
+    else:
+        # ``pk_set`` is None on clear(), the template owner's cache is enough.
+        owners = category_owner_ids(*(pk_set or ()))
+        invalidate_category_facets(instance.created_by_id, *owners)
+
+
+@receiver(post_save, sender=TemplateField)
+@receiver(post_delete, sender=TemplateField)
+def template_field_changed(sender, instance, **kwargs):
+    owners = category_owner_ids(instance.category_id)
+    invalidate_category_facets(instance.template.created_by_id, *owners)
+
+
+@receiver(post_save, sender=EntryFieldAnswer)
+@receiver(post_delete, sender=EntryFieldAnswer)
+def answer_changed(sender, instance, created=True, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    field_ids = {loaded.get("field_id", instance.field_id), instance.field_id}
+    if not created and len(field_ids) == 1:
+        # Editing an answer's value changes no count.
+        return
+    invalidate_category_facets(*field_category_owner_ids(field_ids))
@@ -0,0 +1,43 @@
+"""
+Year calendar heatmap of journal entries.
+
+Entries are bucketed by ``entry_date``, the day they were written on in
+their author's time zone, so a year is one grouped query over the
+``(created_by, entry_date, rate_your_day)`` index with no time zone
+conversion per row.
+"""
+
+from datetime import date, timedelta
+
+from django.db.models import Avg, Count
+
+from .models import JournalEntry
+
+
+def entry_heatmap(user_id, year):
+    """Return the entry count and average rating of every day of ``year``."""
+    start, end = date(year, 1, 1), date(year, 12, 31)
+    rows = (
+        JournalEntry.objects.filter(
+            created_by_id=user_id, entry_date__range=(start, end)
+        )
+        .values("entry_date")
+        .annotate(count=Count("*"), average_rate=Avg("rate_your_day"))
+        .order_by("entry_date")
+    )
+    days = {row["entry_date"]: row for row in rows}
+
+    buckets = []
+    day = start
+    while day <= end:
+        row = days.get(day)
+        average = row and row["average_rate"]
+        buckets.append(
+            {
+                "date": day,
+                "count": row["count"] if row else 0,
+                "average_rate": round(average, 2) if average is not None else None,
+            }
+        )
+        day += timedelta(days=1)
+    return buckets
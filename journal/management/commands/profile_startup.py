@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter under ``-X importtime``; each prints the seconds
+# from its first line to being ready for work.
+SCRIPTS = {
+    # Up to the response to a first request, through the WSGI handler.
+    "web": """
+import io, json, time
+start = time.perf_counter()
+from logjournal.wsgi import application
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": %(path)r, "SERVER_NAME": "localhost",
+    "SERVER_PORT": "80", "HTTP_HOST": "localhost", "wsgi.input": io.BytesIO(),
+    "wsgi.url_scheme": "http",
+}
+statuses = []
+b"".join(application(environ, lambda status, headers: statuses.append(status)))
+print(json.dumps({"seconds": time.perf_counter() - start, "status": statuses[0]}))
+""",
+    # Up to a worker having imported its tasks.
+    "worker": """
+import json, time
+start = time.perf_counter()
+from logjournal.celery import app
+app.loader.import_default_modules()
+print(json.dumps({"seconds": time.perf_counter() - start}))
+""",
+}
+
+
+def parse_importtime(lines):
+    """Return {module: (self, cumulative)} microseconds from ``-X importtime``."""
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue  # the header
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+def package_times(modules):
+    """Return the self time of ``modules`` summed per top-level package."""
+    packages = Counter()
+    for name, (own, _) in modules.items():
+        packages[name.split(".")[0]] += own
+    return packages
+
+
+class Command(BaseCommand):
+    help = "Report the slowest imports of a starting web or worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("process", nargs="?", choices=SCRIPTS, default="web")
+        parser.add_argument(
+            "--path",
+            default="/api/journal-entries/",
+            help="URL of the first web request.",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--by-module",
+            action="store_true",
+            help="Rank modules by cumulative time instead of packages by own time.",
+        )
+        parser.add_argument(
+            "--runs", type=int, default=1, help="Report the median of this many runs."
+        )
+
+    def run(self, process, path):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                SCRIPTS[process] % {"path": path},
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        ready = json.loads(result.stdout.strip().splitlines()[-1])
+        return ready, parse_importtime(result.stderr.splitlines())
+
+    def handle(self, *args, **options):
+        runs = [
+            self.run(options["process"], options["path"])
+            for _ in range(max(1, options["runs"]))
+        ]
+        runs.sort(key=lambda run: run[0]["seconds"])
+        ready, modules = runs[len(runs) // 2]
+
+        if options["by_module"]:
+            ranked = sorted(
+                ((name, cumulative) for name, (_, cumulative) in modules.items()),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+        else:
+            ranked = package_times(modules).most_common()
+        for name, microseconds in ranked[: options["limit"]]:
+            self.stdout.write(f"{microseconds / 1000:9.1f} ms  {name}")
+
+        total = sum(own for own, _ in modules.values())
+        status = f" ({ready['status']})" if "status" in ready else ""
+        self.stdout.write(
+            f"{len(modules)} modules imported in {total / 1e6:.3f}s, "
+            f"ready{status} after {ready['seconds']:.3f}s."
+        )
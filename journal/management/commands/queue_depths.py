@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from logjournal.celery import app
+from logjournal.queues import queue_depths
+
+
+class Command(BaseCommand):
+    help = "Print the number of messages waiting in each celery queue."
+
+    def handle(self, *args, **options):
+        for queue, depth in queue_depths(app).items():
+            self.stdout.write(f"{queue}: {depth}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from journal.counters import repair_template_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the fields_count and entries_count of drifted templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Templates updated per statement.",
+        )
+
+    def handle(self, *args, **options):
+        repaired = repair_template_counters(options["batch_size"])
+        self.stdout.write(f"Repaired the counters of {repaired} templates.")
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from journal.seeding import seed_users
+
+
+def seed_chunk(arguments):
+    return seed_users(*arguments)
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic users and journals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--entries-per-user", type=int, default=100)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread entries over this many days."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=100, help="Users per transaction."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes, one per CPU by default on PostgreSQL.",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        users, chunk_size = options["users"], options["chunk_size"]
+        if users < 1 or chunk_size < 1 or options["days"] < 1:
+            raise CommandError("--users, --chunk-size and --days must be positive.")
+        workers = options["workers"]
+        if connection.vendor != "postgresql":
+            # SQLite and friends serialize writers anyway.
+            workers = 1
+        elif workers is None:
+            workers = os.cpu_count() or 1
+
+        run = uuid.uuid4().hex[:8]
+        chunks = [
+            (
+                run,
+                first,
+                min(chunk_size, users - first),
+                options["entries_per_user"],
+                options["days"],
+                options["seed"],
+            )
+            for first in range(0, users, chunk_size)
+        ]
+        totals = Counter()
+        start = time.perf_counter()
+        if workers == 1:
+            results = map(seed_chunk, chunks)
+            self.report(results, totals, len(chunks))
+        else:
+            # Forked workers must not share the parent's connection.
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                results = pool.imap_unordered(seed_chunk, chunks)
+                self.report(results, totals, len(chunks))
+
+        seconds = time.perf_counter() - start
+        rows = sum(totals.values())
+        self.stdout.write(
+            ", ".join(f"{count} {name}" for name, count in totals.items())
+            + f" in {seconds:.1f}s ({rows / seconds:.0f} rows/s, run {run})."
+        )
+
+    def report(self, results, totals, chunks):
+        for done, counts in enumerate(results, 1):
+            totals.update(counts)
+            if self.verbosity > 1:
+                self.stdout.write(f"Chunk {done}/{chunks} done.")
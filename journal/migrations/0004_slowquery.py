@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0003_entryfieldanswer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("origin", models.CharField(max_length=255)),
+                ("sql", models.TextField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total_time", models.FloatField(default=0, help_text="Milliseconds")),
+                ("max_time", models.FloatField(default=0, help_text="Milliseconds")),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "unique_together": {("fingerprint", "origin")},
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0005_deletionjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=40)),
+                ("object_id", models.CharField(max_length=64)),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="templatefield",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="templatefield",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["created_by", "updated_at"],
+                name="journal_cat_created_5fbc2f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="entryfieldanswer",
+            index=models.Index(
+                fields=["updated_at"], name="journal_ent_updated_03f8d7_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["created_by", "updated_at"],
+                name="journal_jou_created_eef9dd_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="template",
+            index=models.Index(
+                fields=["created_by", "updated_at"],
+                name="journal_tem_created_d1d538_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="templatefield",
+            index=models.Index(
+                fields=["updated_at"], name="journal_tem_updated_13a0c2_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["owner", "deleted_at"], name="journal_tom_owner_i_10c0a5_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(template=OuterRef("pk"))
+            .values("template")
+            .annotate(count=Count("*"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Template = apps.get_model("journal", "Template")
+    Template.objects.update(
+        fields_count=count_rows(apps.get_model("journal", "TemplateField")),
+        entries_count=count_rows(apps.get_model("journal", "JournalEntry")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0006_sync_tracking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="template",
+            name="entries_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="template",
+            name="fields_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_missing_required(apps, schema_editor):
+    JournalEntry = apps.get_model("journal", "JournalEntry")
+    TemplateField = apps.get_model("journal", "TemplateField")
+    EntryFieldAnswer = apps.get_model("journal", "EntryFieldAnswer")
+    answered = (
+        EntryFieldAnswer.objects.filter(
+            entry=OuterRef(OuterRef("pk")), field=OuterRef("pk")
+        )
+        .exclude(value=None)
+        .exclude(value="")
+    )
+    missing = (
+        TemplateField.objects.filter(template=OuterRef("template"), is_required=True)
+        .exclude(Exists(answered))
+        .values("template")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    JournalEntry.objects.exclude(template=None).update(
+        missing_required_count=Coalesce(
+            Subquery(missing, output_field=IntegerField()), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0007_template_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journalentry",
+            name="missing_required_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["created_by", "missing_required_count"],
+                name="journal_jou_created_ea4e09_idx",
+            ),
+        ),
+        migrations.RunPython(fill_missing_required, migrations.RunPython.noop),
+    ]
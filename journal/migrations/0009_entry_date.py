@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:56
+
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_entry_dates(apps, schema_editor):
+    JournalEntry = apps.get_model("journal", "JournalEntry")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    zones = User.objects.filter(entries__isnull=False).values_list(
+        "timezone", flat=True
+    )
+    for zone in set(zones):
+        JournalEntry.objects.filter(created_by__timezone=zone).update(
+            entry_date=TruncDate("created_at", tzinfo=ZoneInfo(zone))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0008_entry_missing_required_count"),
+        ("accounts", "0002_customuser_timezone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journalentry",
+            name="entry_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_entry_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="journalentry",
+            name="entry_date",
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["created_by", "entry_date", "rate_your_day"],
+                name="journal_jou_created_b5306f_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0011_export_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="template",
+            name="deleting",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
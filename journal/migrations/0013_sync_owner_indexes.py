@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("journal", "0012_template_deleting"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="entryfieldanswer",
+            name="journal_ent_updated_03f8d7_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="templatefield",
+            name="journal_tem_updated_13a0c2_idx",
+        ),
+        migrations.AddIndex(
+            model_name="entryfieldanswer",
+            index=models.Index(
+                fields=["entry", "updated_at"], name="journal_ent_entry_i_cd8fab_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="templatefield",
+            index=models.Index(
+                fields=["template", "updated_at"], name="journal_tem_templat_9c333a_idx"
+            ),
+        ),
+    ]
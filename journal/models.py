@@ -1,9 +1,11 @@
 import uuid as uuid_lib
+from zoneinfo import ZoneInfo
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -14,6 +16,51 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+def local_date(moment, user):
+    """Return the calendar date of ``moment`` in the time zone of ``user``."""
+    return timezone.localdate(moment, ZoneInfo(user.timezone))
+
+
+class LoadedValuesMixin:
+    """
+    Remember the ``tracked_fields`` values as last loaded or saved.
+
+    Post-save signal handlers compare them with the current values to tell
+    what a save changed; they are missing on instances never loaded.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_values = {
+            name: loaded[name] for name in cls.tracked_fields if name in loaded
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            name: getattr(self, name) for name in self.tracked_fields
+        }
+
+
+class AtomicSaveMixin:
+    """
+    Save in a transaction that also covers the ``post_save`` handlers.
+
+    Django sends ``post_save`` after the save's own transaction, so the
+    counter updates of ``journal.counters`` would commit apart from the row;
+    ``post_delete`` is sent within the deletion's transaction already.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
 class Template(TimeStampedModel):
     uuid = models.UUIDField(default=uuid_lib.uuid4, editable=False, primary_key=True)
     title = models.CharField(max_length=240)
@@ -25,13 +72,77 @@ class Template(TimeStampedModel):
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="templates"
     )
+    # Maintained by ``journal.counters``, rebuilt by ``repair_template_counters``.
+    COUNTER_FIELDS = ("fields_count", "entries_count")
+    fields_count = models.PositiveIntegerField(default=0, editable=False)
+    entries_count = models.PositiveIntegerField(default=0, editable=False)
+    # Set when a purge is queued; the API no longer shows the template.
+    deleting = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_by", "updated_at"])]
 
     # slugify title before saving
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.title.lower().replace(" ", "-")
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # The counters only move through F() updates, never save a stale copy.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
+    def clone(self, created_by, title=None):
+        """
+        Copy the template with its category links and fields.
+
+        Uses one insert per table whatever the number of fields. The copy's
+        slug embeds its own primary key, so it is unique without probing.
+        """
+        copy = Template(
+            title=title or self.title,
+            description=self.description,
+            created_by=created_by,
+        )
+        suffix = f"-{copy.uuid.hex}"
+        max_length = Template._meta.get_field("slug").max_length
+        copy.slug = self.slug[: max_length - len(suffix)] + suffix
+
+        fields = list(self.fields.all())
+        copy.fields_count = len(fields)
+
+        links = Template.categories.through
+        category_ids = list(
+            links.objects.filter(template_id=self.uuid).values_list(
+                "category_id", flat=True
+            )
+        )
+        with transaction.atomic():
+            copy.save(force_insert=True)
+            links.objects.bulk_create(
+                links(template_id=copy.uuid, category_id=category_id)
+                for category_id in category_ids
+            )
+            TemplateField.objects.bulk_create(
+                TemplateField(
+                    template=copy,
+                    name=field.name,
+                    field_type=field.field_type,
+                    category_id=field.category_id,
+                    order=field.order,
+                    is_required=field.is_required,
+                )
+                for field in fields
+            )
+
+        from .facets import category_owner_ids, invalidate_category_facets
+
+        invalidate_category_facets(created_by.pk, *category_owner_ids(*category_ids))
+        return copy
+
     def __str__(self):
         return self.title
     
@@ -44,11 +155,14 @@ class Category(TimeStampedModel):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="categories"
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["created_by", "updated_at"])]
+
     def __str__(self):
         return self.name
     
 
-class JournalEntry(TimeStampedModel):
+class JournalEntry(AtomicSaveMixin, LoadedValuesMixin, TimeStampedModel):
     uuid = models.UUIDField(default=uuid_lib.uuid4, editable=False, primary_key=True)
     title = models.CharField(max_length=240, null=True, blank=True)
     template = models.ForeignKey(
@@ -59,14 +173,35 @@ class JournalEntry(TimeStampedModel):
     )
     quote_of_the_day = models.CharField(max_length=500, null=True, blank=True)
     rate_your_day = models.IntegerField(null=True, blank=True)
-    
+    # The day the entry was written on in its author's time zone, set once.
+    entry_date = models.DateField(editable=False)
+    # Required template fields without an answer, see ``journal.completeness``.
+    missing_required_count = models.PositiveIntegerField(default=0, editable=False)
+
+    tracked_fields = ("template_id",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_by", "updated_at"]),
+            models.Index(fields=["created_by", "missing_required_count"]),
+            # Covers the heatmap's grouped query, see ``journal.heatmap``.
+            models.Index(fields=["created_by", "entry_date", "rate_your_day"]),
+        ]
+
     def __str__(self):
         if self.title:
             return self.title
-        return f"Entry from {self.created_at.date()}"
+        return f"Entry from {self.entry_date}"
+
+    def save(self, *args, **kwargs):
+        if self.entry_date is None:
+            self.entry_date = local_date(
+                self.created_at or timezone.now(), self.created_by
+            )
+        super().save(*args, **kwargs)
     
 
-class TemplateField(models.Model):
+class TemplateField(AtomicSaveMixin, LoadedValuesMixin, TimeStampedModel):
     template = models.ForeignKey(
         Template, on_delete=models.CASCADE, related_name="fields"
     )
@@ -86,11 +221,17 @@ class TemplateField(models.Model):
     order = models.PositiveIntegerField(default=0)
     is_required = models.BooleanField(default=False)
 
+    tracked_fields = ("template_id", "is_required")
+
+    class Meta:
+        # Delta syncs reach the owner's fields through their templates.
+        indexes = [models.Index(fields=["template", "updated_at"])]
+
     def __str__(self):
         return f"{self.name} ({self.field_type})"
     
 
-class EntryFieldAnswer(TimeStampedModel):
+class EntryFieldAnswer(LoadedValuesMixin, TimeStampedModel):
     uuid = models.UUIDField(default=uuid_lib.uuid4, editable=False, primary_key=True)
     entry = models.ForeignKey(
         "JournalEntry", 
@@ -104,9 +245,136 @@ class EntryFieldAnswer(TimeStampedModel):
     )
     value = models.TextField(null=True, blank=True)
 
+    tracked_fields = ("entry_id", "field_id")
+
     class Meta:
         unique_together = ("entry", "field")
+        # Delta syncs reach the owner's answers through their entries.
+        indexes = [models.Index(fields=["entry", "updated_at"])]
 
     def __str__(self):
         return f"Answer for {self.field.name} in {self.entry.title}"
     
+
+
+class Tombstone(models.Model):
+    """Marks a deleted object so offline clients can drop their copy."""
+
+    model = models.CharField(max_length=40)
+    object_id = models.CharField(max_length=64)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
+class SlowQuery(TimeStampedModel):
+    """Aggregated timings of one slow statement shape from one view or task."""
+
+    fingerprint = models.CharField(max_length=40)
+    origin = models.CharField(max_length=255)
+    sql = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+    total_time = models.FloatField(default=0, help_text="Milliseconds")
+    max_time = models.FloatField(default=0, help_text="Milliseconds")
+
+    class Meta:
+        unique_together = ("fingerprint", "origin")
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.origin}: {self.sql[:80]}"
+
+
+class DeletionJob(TimeStampedModel):
+    """Tracks a template or account being deleted in batches by celery."""
+
+    TARGET_CHOICES = [
+        ("template", "Template"),
+        ("user", "User"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    uuid = models.UUIDField(default=uuid_lib.uuid4, editable=False, primary_key=True)
+    target_type = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.CharField(max_length=64)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="deletion_jobs",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    deleted_rows = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Delete {self.target_type} {self.target_id} ({self.status})"
+
+
+class WeeklyDigest(TimeStampedModel):
+    """A user's journaling summary for the week starting on ``week_start``."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="digests"
+    )
+    week_start = models.DateField()
+    entries_count = models.PositiveIntegerField(default=0)
+    average_rate = models.FloatField(null=True, blank=True)
+    # The most answered fields as ``{"field", "name", "answers"}`` objects.
+    top_fields = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ("user", "week_start")
+
+    def __str__(self):
+        return f"Digest of {self.user} for the week of {self.week_start}"
+
+
+class ExportJob(TimeStampedModel):
+    """Tracks an account export being written by celery, see ``journal.exports``."""
+
+    FORMAT_CHOICES = [
+        ("ndjson", "NDJSON"),
+        ("csv", "CSV"),
+        ("parquet", "Parquet"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+        ("expired", "Expired"),
+    ]
+    # A user has at most one export in these at a time.
+    ACTIVE_STATUSES = ("pending", "running")
+
+    uuid = models.UUIDField(default=uuid_lib.uuid4, editable=False, primary_key=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="export_jobs"
+    )
+    format = models.CharField(max_length=20, choices=FORMAT_CHOICES, default="ndjson")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    total_rows = models.PositiveBigIntegerField(default=0)
+    written_rows = models.PositiveBigIntegerField(default=0)
+    # Name of the archive in the "exports" storage.
+    artifact = models.CharField(max_length=255, null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "expires_at"])]
+
+    def __str__(self):
+        return f"Export {self.format} of {self.requested_by_id} ({self.status})"
@@ -0,0 +1,289 @@
+"""
+Synthetic journals for trying the app at realistic volume.
+
+``seed_users`` creates a chunk of users with their categories, templates,
+fields, entries and answers. Everything but the users and template fields,
+whose generated ids the other rows need, is inserted without the ORM: with
+``COPY`` on PostgreSQL and ``executemany`` elsewhere. Model signals do not
+run, so the denormalized columns (template counters, ``entry_date``,
+``missing_required_count``) are computed here. The ``seed_journal`` command
+runs the chunks in parallel worker processes.
+
+The shapes are loosely modelled on real use: a few templates per user with
+a handful of fields each, entries bunched towards recent days and evening
+hours, ratings around 6 out of 10 and most fields answered most days.
+"""
+
+import random
+import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Category, EntryFieldAnswer, JournalEntry, Template, TemplateField
+
+TIME_ZONES = (
+    "UTC",
+    "Europe/London",
+    "Europe/Berlin",
+    "America/New_York",
+    "America/Los_Angeles",
+    "Asia/Kolkata",
+    "Asia/Tokyo",
+    "Australia/Sydney",
+)
+CATEGORIES = ("Health", "Work", "Family", "Fitness", "Sleep", "Mood", "Learning")
+TEMPLATES = ("Daily reflection", "Morning pages", "Workout log", "Gratitude")
+FIELDS = {
+    "text": ("Highlight", "Notes", "Gratitude", "Lesson learned", "Worries"),
+    "number": ("Hours slept", "Glasses of water", "Steps", "Minutes read"),
+    "boolean": ("Exercised", "Meditated", "Took vitamins", "Went outside"),
+    "date": ("Next check-in", "Last day off"),
+}
+FIELD_TYPE_WEIGHTS = {"text": 4, "number": 3, "boolean": 2, "date": 1}
+NUMBER_RANGES = {
+    "Hours slept": (7, 1.2),
+    "Glasses of water": (6, 2),
+    "Steps": (7000, 3000),
+    "Minutes read": (25, 15),
+}
+WORDS = (
+    "calm busy tired walk coffee friends call project deadline rain sun park "
+    "dinner book music run late early quiet focus plan meeting garden kids"
+).split()
+QUOTES = (
+    "Stay hungry, stay foolish.",
+    "Well begun is half done.",
+    "This too shall pass.",
+    "Small steps every day.",
+)
+
+
+def insert_rows(model, rows):
+    """Insert ``rows``, dicts keyed by attname, bypassing the ORM."""
+    if not rows:
+        return
+    names = list(rows[0])
+    fields = [model._meta.get_field(name) for name in names]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row([row[name] for name in names])
+            return
+        placeholders = ", ".join(["%s"] * len(fields))
+        cursor.executemany(
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+            [
+                [
+                    field.get_db_prep_save(row[name], connection)
+                    for field, name in zip(fields, names)
+                ]
+                for row in rows
+            ],
+        )
+
+
+class JournalFaker:
+    """Generates the rows of one chunk of users, reproducibly given a seed."""
+
+    def __init__(self, seed, entries_per_user, days):
+        self.rng = random.Random(seed)
+        self.entries_per_user = entries_per_user
+        self.days = days
+        self.now = timezone.now()
+
+    def sentence(self, low, high):
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return " ".join(words).capitalize() + "."
+
+    def moment(self, zone):
+        """Return an evening-heavy time on a recent-heavy day, and its local date."""
+        days_ago = int(self.rng.triangular(0, self.days, 0))
+        day = self.now.astimezone(zone).date() - timedelta(days=days_ago)
+        minute = int(self.rng.gauss(21 * 60, 150)) % (24 * 60)
+        local = datetime.combine(day, time(minute // 60, minute % 60), tzinfo=zone)
+        return min(local.astimezone(dt_timezone.utc), self.now), day
+
+    def rating(self):
+        if self.rng.random() < 0.1:
+            return None
+        return min(10, max(1, round(self.rng.gauss(6, 2))))
+
+    def answer(self, field_type, name, day):
+        if field_type == "number":
+            mean, deviation = NUMBER_RANGES[name]
+            return str(max(0, round(self.rng.gauss(mean, deviation), 1)))
+        if field_type == "boolean":
+            return "true" if self.rng.random() < 0.6 else "false"
+        if field_type == "date":
+            return (day + timedelta(days=self.rng.randint(1, 30))).isoformat()
+        return self.sentence(3, 12)
+
+    def categories(self, user_id):
+        names = self.rng.sample(CATEGORIES, self.rng.randint(2, 5))
+        return [
+            {
+                "uuid": uuid.uuid4(),
+                "name": name,
+                "description": None,
+                "created_by_id": user_id,
+                "created_at": self.now,
+                "updated_at": self.now,
+            }
+            for name in names
+        ]
+
+    def templates(self, user_id):
+        titles = self.rng.sample(TEMPLATES, self.rng.choices((1, 2, 3), (5, 3, 2))[0])
+        templates = []
+        for title in titles:
+            pk = uuid.uuid4()
+            templates.append(
+                {
+                    "uuid": pk,
+                    "title": title,
+                    "description": None,
+                    "slug": f"{title.lower().replace(' ', '-')}-{pk.hex[:12]}",
+                    "created_by_id": user_id,
+                    "fields_count": 0,
+                    "entries_count": 0,
+                    "deleting": False,
+                    "created_at": self.now,
+                    "updated_at": self.now,
+                }
+            )
+        return templates
+
+    def fields(self, template, categories):
+        types = self.rng.choices(
+            list(FIELD_TYPE_WEIGHTS),
+            list(FIELD_TYPE_WEIGHTS.values()),
+            k=self.rng.randint(3, 8),
+        )
+        fields = []
+        for order, field_type in enumerate(types):
+            category = self.rng.choice(categories) if self.rng.random() < 0.5 else None
+            fields.append(
+                TemplateField(
+                    template_id=template["uuid"],
+                    name=self.rng.choice(FIELDS[field_type]),
+                    field_type=field_type,
+                    category_id=category and category["uuid"],
+                    order=order,
+                    is_required=self.rng.random() < 0.3,
+                )
+            )
+        template["fields_count"] = len(fields)
+        return fields
+
+    def entries(self, user_id, zone, templates):
+        entries = []
+        for _ in range(self.entries_per_user):
+            created_at, day = self.moment(zone)
+            template = None
+            if templates and self.rng.random() < 0.9:
+                weights = range(len(templates), 0, -1)
+                template = self.rng.choices(templates, weights)[0]
+                template["entries_count"] += 1
+            entries.append(
+                {
+                    "uuid": uuid.uuid4(),
+                    "title": f"{day:%A %d %B}" if self.rng.random() < 0.7 else None,
+                    "template_id": template and template["uuid"],
+                    "created_by_id": user_id,
+                    "quote_of_the_day": (
+                        self.rng.choice(QUOTES) if self.rng.random() < 0.2 else None
+                    ),
+                    "rate_your_day": self.rating(),
+                    "entry_date": day,
+                    "missing_required_count": 0,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+        return entries
+
+    def answers(self, entry, fields):
+        answers = []
+        for field in fields:
+            chance = 0.95 if field.is_required else 0.8
+            if self.rng.random() >= chance:
+                entry["missing_required_count"] += field.is_required
+                continue
+            answers.append(
+                {
+                    "uuid": uuid.uuid4(),
+                    "entry_id": entry["uuid"],
+                    "field_id": field.pk,
+                    "value": self.answer(
+                        field.field_type, field.name, entry["entry_date"]
+                    ),
+                    "created_at": entry["created_at"],
+                    "updated_at": entry["created_at"],
+                }
+            )
+        return answers
+
+
+def seed_users(run, first, count, entries_per_user, days, seed=None):
+    """Create users ``first`` to ``first + count`` of ``run`` with their journals."""
+    # Without a seed every chunk of every run draws from fresh OS entropy.
+    chunk_seed = None if seed is None else f"{seed}-{first}"
+    faker = JournalFaker(chunk_seed, entries_per_user, days)
+    password = make_password(None)
+    User = get_user_model()
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(
+                email=f"seed-{run}-{index}@example.com",
+                username=f"seed-{run}-{index}",
+                password=password,
+                timezone=faker.rng.choice(TIME_ZONES),
+            )
+            for index in range(first, first + count)
+        )
+        categories, templates, links, fields, entries, answers = [], [], [], [], [], []
+        by_template = {}
+        for user in users:
+            own_categories = faker.categories(user.pk)
+            own_templates = faker.templates(user.pk)
+            categories += own_categories
+            templates += own_templates
+            for template in own_templates:
+                by_template[template["uuid"]] = faker.fields(template, own_categories)
+                fields += by_template[template["uuid"]]
+                for category in faker.rng.sample(own_categories, 2):
+                    links.append(
+                        {
+                            "template_id": template["uuid"],
+                            "category_id": category["uuid"],
+                        }
+                    )
+            entries += faker.entries(user.pk, ZoneInfo(user.timezone), own_templates)
+
+        insert_rows(Category, categories)
+        insert_rows(Template, templates)
+        insert_rows(Template.categories.through, links)
+        # Answers need the field ids, which only the ORM gives back.
+        TemplateField.objects.bulk_create(fields)
+        for entry in entries:
+            answers += faker.answers(entry, by_template.get(entry["template_id"], ()))
+        insert_rows(JournalEntry, entries)
+        insert_rows(EntryFieldAnswer, answers)
+
+    return {
+        "users": len(users),
+        "categories": len(categories),
+        "templates": len(templates),
+        "fields": len(fields),
+        "entries": len(entries),
+        "answers": len(answers),
+    }
@@ -0,0 +1,416 @@
+"""
+Change tracking for offline clients.
+
+Every synced model carries an indexed ``updated_at``; deletions leave a
+``Tombstone`` for the owner of the deleted object. A sync cursor is the
+opaque encoding of the server time a sync started at, and the next sync
+returns the rows updated and tombstones written since then, re-sending the
+last ``SYNC["OVERLAP_SECONDS"]`` to cover transactions still in flight when
+the cursor was issued. Clients apply changes idempotently.
+
+A sync returns at most ``SYNC["PAGE_SIZE"]`` rows. When there are more, the
+cursor instead encodes the position after the last row sent and the
+response has ``has_more``; the client keeps syncing with each new cursor
+until ``has_more`` is false. All pages of a sync read up to the moment its
+first page started at, so rows changed meanwhile come with the next sync.
+
+``updated_at`` is stamped with the clock of the server that wrote the row
+when it wrote it, not when its transaction committed. A row committed more
+than ``OVERLAP_SECONDS`` after that, or stamped by a server whose clock is
+that far behind, is older than the next cursor and is missed by delta
+syncs. Clients should run a full sync now and then, at the latest when
+their cursor expires.
+"""
+
+import base64
+import binascii
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import partial
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from logjournal.events import publish
+
+from .models import (
+    Category,
+    EntryFieldAnswer,
+    JournalEntry,
+    Template,
+    TemplateField,
+    Tombstone,
+)
+
+DEFAULTS = {
+    "OVERLAP_SECONDS": 30,
+    "TOMBSTONE_RETENTION_DAYS": 30,
+    "PUSH_MAX_CHANGES": 500,
+    "PAGE_SIZE": 1000,
+}
+
+# Tombstone ``model`` label of each synced model, and how to reach its owner.
+TRACKED_MODELS = {
+    Template: ("template", "created_by_id"),
+    Category: ("category", "created_by_id"),
+    TemplateField: ("template_field", "template__created_by_id"),
+    JournalEntry: ("journal_entry", "created_by_id"),
+    EntryFieldAnswer: ("entry_field_answer", "entry__created_by_id"),
+}
+
+# Models whose changes are pushed to the owner's change feed.
+FEED_MODELS = (Template, JournalEntry, EntryFieldAnswer)
+
+# The models owned through another tracked model, and the foreign key to it.
+PARENTS = {
+    TemplateField: ("template_id", Template),
+    EntryFieldAnswer: ("entry_id", JournalEntry),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ExpiredCursor(ValueError):
+    pass
+
+
+def sync_settings():
+    return {**DEFAULTS, **getattr(settings, "SYNC", {})}
+
+
+class SyncPosition(NamedTuple):
+    """Where a sync reads from: rows changed after ``since`` up to ``until``."""
+
+    since: datetime | None
+    until: datetime | None = None
+    # The group and the (time, pk) of the last row sent, halfway through a sync.
+    key: str | None = None
+    after: tuple | None = None
+
+
+def encode_cursor(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+
+def encode_position(position):
+    """Return the cursor of a sync that stopped at ``position``."""
+    state = {
+        "since": position.since.isoformat() if position.since else None,
+        "until": position.until.isoformat(),
+        "key": position.key,
+        "after": position.after and [position.after[0].isoformat(), position.after[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def parse_moment(value):
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        raise ValueError(value)
+    return moment
+
+
+def decode_cursor(cursor):
+    """Return the ``SyncPosition`` of ``cursor``, reading everything without one."""
+    if not cursor:
+        return SyncPosition(since=None)
+    try:
+        text = base64.urlsafe_b64decode(cursor).decode()
+        if text.startswith("{"):
+            state = json.loads(text)
+            after = state["after"]
+            position = SyncPosition(
+                since=state["since"] and parse_moment(state["since"]),
+                until=parse_moment(state["until"]),
+                key=state["key"],
+                after=after and (parse_moment(after[0]), str(after[1])),
+            )
+        else:
+            position = SyncPosition(since=parse_moment(text))
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Invalid sync cursor.")
+
+    retention = timedelta(days=sync_settings()["TOMBSTONE_RETENTION_DAYS"])
+    if position.since and position.since < timezone.now() - retention:
+        raise ExpiredCursor("Sync cursor expired, a full sync is required.")
+    return position
+
+
+def changed_querysets(user, since, until):
+    """
+    Return {group: queryset} of the user's rows changed after ``since`` up
+    to ``until``, in the order they are synced. Tombstones come last, under
+    ``deleted``, and only for delta syncs.
+    """
+    querysets = {
+        "templates": Template.objects.filter(created_by=user, deleting=False),
+        "categories": Category.objects.filter(created_by=user),
+        "template_fields": TemplateField.objects.filter(template__created_by=user),
+        "journal_entries": JournalEntry.objects.filter(created_by=user),
+        "entry_field_answers": EntryFieldAnswer.objects.filter(entry__created_by=user),
+    }
+    if since is not None:
+        since = since - timedelta(seconds=sync_settings()["OVERLAP_SECONDS"])
+        querysets = {
+            key: queryset.filter(updated_at__gt=since)
+            for key, queryset in querysets.items()
+        }
+        querysets["deleted"] = Tombstone.objects.filter(
+            owner=user, deleted_at__gt=since
+        )
+    return {
+        key: queryset.filter(**{f"{sync_time_field(key)}__lte": until}).order_by(
+            sync_time_field(key), "pk"
+        )
+        for key, queryset in querysets.items()
+    }
+
+
+def sync_time_field(key):
+    return "deleted_at" if key == "deleted" else "updated_at"
+
+
+def read_page(user, position, limit):
+    """
+    Return {group: rows} of the next ``limit`` rows from ``position`` and the
+    position after them, or ``None`` once everything has been read.
+    """
+    querysets = changed_querysets(user, position.since, position.until)
+    keys = list(querysets)
+    start = keys.index(position.key) if position.key in querysets else 0
+    pages = {key: [] for key in keys}
+    remaining = limit
+    for key in keys[start:]:
+        queryset = querysets[key]
+        after = position.after if key == position.key else None
+        if after:
+            field = sync_time_field(key)
+            queryset = queryset.filter(
+                Q(**{f"{field}__gt": after[0]})
+                | Q(**{field: after[0], "pk__gt": after[1]})
+            )
+        rows = list(queryset[: remaining + 1])
+        pages[key] = rows[:remaining]
+        if len(rows) > remaining:
+            if pages[key]:
+                last = pages[key][-1]
+                after = (getattr(last, sync_time_field(key)), str(last.pk))
+            return pages, position._replace(key=key, after=after)
+        remaining -= len(rows)
+    return pages, None
+
+
+def owner_id_of(instance):
+    if isinstance(instance, TemplateField):
+        return instance.template.created_by_id
+    if isinstance(instance, EntryFieldAnswer):
+        return instance.entry.created_by_id
+    return instance.created_by_id
+
+
+def record_tombstones(queryset):
+    """
+    Write tombstones, in bulk, for the rows ``queryset`` is about to delete.
+
+    Only the background purges delete this way and they publish no events:
+    the owners' clients learn about the rows with their next sync.
+    """
+    label, owner_lookup = TRACKED_MODELS[queryset.model]
+    now = timezone.now()
+    Tombstone.objects.bulk_create(
+        Tombstone(model=label, object_id=str(pk), owner_id=owner_id, deleted_at=now)
+        for pk, owner_id in queryset.values_list("pk", owner_lookup)
+    )
+
+
+def change_event(model, pk, op, version=None):
+    label = TRACKED_MODELS[model][0]
+    return {
+        "type": f"{label}.{op}",
+        "model": label,
+        "uuid": str(pk),
+        "version": version.isoformat() if version else None,
+    }
+
+
+def changes_event(model, pks, op):
+    """Return the one event standing for the same change to several rows."""
+    label = TRACKED_MODELS[model][0]
+    return {"type": f"{label}.{op}", "model": label, "uuids": [str(pk) for pk in pks]}
+
+
+def publish_grouped(model, changes, op):
+    """Publish ``changes``, (owner id, pk, version) rows, in one event per owner."""
+    by_owner = defaultdict(list)
+    for owner_id, pk, version in changes:
+        by_owner[owner_id].append((pk, version))
+    for owner_id, rows in by_owner.items():
+        if len(rows) == 1:
+            pk, version = rows[0]
+            publish(owner_id, change_event(model, pk, op, version))
+        else:
+            publish(owner_id, changes_event(model, [pk for pk, _ in rows], op))
+
+
+def publish_changes(model, rows, op="updated"):
+    """Publish feed events for rows written in bulk, bypassing signals."""
+    owner_lookup = TRACKED_MODELS[model][1]
+    if owner_lookup == "created_by_id":
+        owners = {row.pk: row.created_by_id for row in rows}
+    else:
+        owners = dict(
+            model.objects.filter(pk__in=[row.pk for row in rows]).values_list(
+                "pk", owner_lookup
+            )
+        )
+    publish_grouped(
+        model, [(owners[row.pk], row.pk, row.updated_at) for row in rows], op
+    )
+
+
+def publish_deletions(deletions):
+    for model, changes in deletions.items():
+        publish_grouped(model, changes, "deleted")
+
+
+class Deletion:
+    """The tracked rows one ``delete()`` call removes, cascades included."""
+
+    def __init__(self):
+        self.expected = set()
+        self.deleted = defaultdict(dict)
+        self.count = 0
+
+    def expect(self, model, pk):
+        self.expected.add((model, pk))
+
+    def add(self, model, instance):
+        """Record a deleted row, return whether it was the last one."""
+        if instance.pk not in self.deleted[model]:
+            self.count += 1
+        self.deleted[model][instance.pk] = instance
+        return self.count >= len(self.expected)
+
+    def owner_ids(self):
+        """Return the owner id of each deleted row, by model and pk."""
+        owned = {
+            model: {pk: instance.created_by_id for pk, instance in rows.items()}
+            for model, rows in self.deleted.items()
+            if model not in PARENTS
+        }
+        owners = {}
+        for model, rows in self.deleted.items():
+            if model not in PARENTS:
+                owners[model] = owned[model]
+                continue
+            parent_field, parent_model = PARENTS[model]
+            # Parents deleted alongside are known, the others still exist.
+            parents = dict(owned.get(parent_model, {}))
+            missing = {getattr(row, parent_field) for row in rows.values()}
+            missing -= parents.keys()
+            if missing:
+                parents.update(
+                    parent_model.objects.filter(pk__in=missing).values_list(
+                        "pk", "created_by_id"
+                    )
+                )
+            owners[model] = {
+                pk: parents.get(getattr(row, parent_field)) for pk, row in rows.items()
+            }
+        return owners
+
+
+def record_deletion(deletion):
+    """Write the tombstones of ``deletion`` at once and publish it on commit."""
+    owners = deletion.owner_ids()
+    now = timezone.now()
+    # A row whose parent was deleted meanwhile by someone else has no owner.
+    owners = {
+        model: {pk: owner_id for pk, owner_id in rows.items() if owner_id}
+        for model, rows in owners.items()
+    }
+    Tombstone.objects.bulk_create(
+        Tombstone(
+            model=TRACKED_MODELS[model][0],
+            object_id=str(pk),
+            owner_id=owner_id,
+            deleted_at=now,
+        )
+        for model, rows in owners.items()
+        for pk, owner_id in rows.items()
+    )
+    # One event per owner and model for all the rows of the call.
+    feed = {
+        model: [(owner_id, pk, None) for pk, owner_id in rows.items()]
+        for model, rows in owners.items()
+        if model in FEED_MODELS
+    }
+    transaction.on_commit(partial(publish_deletions, feed))
+
+
+def deleted_with_owner(origin):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, get_user_model())
+
+
+# Signal handlers, connected when ``JournalConfig.ready`` imports this module.
+# Bulk deletes in ``journal.tasks`` bypass them and call ``record_tombstones``.
+
+
+@receiver(post_save, sender=Template)
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_save, sender=EntryFieldAnswer)
+def publish_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    op = "created" if created else "updated"
+    event = change_event(sender, instance.pk, op, instance.updated_at)
+    publish(owner_id_of(instance), event)
+
+
+@receiver(pre_delete, sender=Template)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=TemplateField)
+@receiver(pre_delete, sender=JournalEntry)
+@receiver(pre_delete, sender=EntryFieldAnswer)
+def expect_tombstone(sender, instance, origin=None, **kwargs):
+    if deleted_with_owner(origin):
+        # The owner is going away too, and its tombstones with it.
+        return
+    # Every row of a delete() call gets pre_delete before any is deleted.
+    vars(origin).setdefault("_sync_deletion", Deletion()).expect(sender, instance.pk)
+
+
+@receiver(post_delete, sender=Template)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=TemplateField)
+@receiver(post_delete, sender=JournalEntry)
+@receiver(post_delete, sender=EntryFieldAnswer)
+def write_tombstone(sender, instance, origin=None, **kwargs):
+    if deleted_with_owner(origin):
+        return
+    deletion = vars(origin)["_sync_deletion"]
+    if deletion.add(sender, instance):
+        # The last row is gone, tombstone them all with a single insert.
+        del vars(origin)["_sync_deletion"]
+        record_deletion(deletion)
+
+
+@receiver(pre_delete, sender=Template)
+@receiver(pre_delete, sender=Category)
+def touch_referencing_rows(sender, instance, **kwargs):
+    # SET_NULL updates skip auto_now, so the nulled rows would not sync.
+    now = timezone.now()
+    if sender is Template:
+        JournalEntry.objects.filter(template=instance).update(updated_at=now)
+    else:
+        TemplateField.objects.filter(category=instance).update(updated_at=now)
@@ -1,10 +1,253 @@
 # my_app/tasks.py
 from celery import shared_task
-from datetime import datetime
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import (
+    Category,
+    DeletionJob,
+    EntryFieldAnswer,
+    ExportJob,
+    JournalEntry,
+    Template,
+    TemplateField,
+    Tombstone,
+)
+from .analytics import answering_user_ids, invalidate_field_analytics
+from .counters import apply_count_deltas
+from .digests import (
+    digests_settings,
+    last_week_start,
+    pending_user_chunks,
+    store_weekly_digests,
+)
+from .exports import expiry_time, export_storage, exports_settings, write_export
+from .facets import invalidate_category_facets, template_category_owner_ids
+from .sync import TRACKED_MODELS, record_tombstones, sync_settings
+
 
 @shared_task
 def print_time_task():
     """A simple task to demonstrate Celery Beat cron job functionality."""
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"Celery Beat Cron Job Ran At: {current_time}")
-    return True
\ No newline at end of file
+    return True
+
+
+def delete_in_batches(queryset, tombstones=True):
+    """
+    Delete the rows of ``queryset`` in primary key batches.
+
+    Rows are removed with raw ``DELETE ... WHERE pk IN (batch)`` statements,
+    skipping the in-memory cascade collector and signals; callers must have
+    emptied dependent tables first. Each batch commits on its own, together
+    with the sync tombstones of its rows unless ``tombstones`` is false.
+    """
+    model = queryset.model
+    tombstones = tombstones and model in TRACKED_MODELS
+    deleted = 0
+    while True:
+        batch = list(queryset.values_list("pk", flat=True)[: settings.DELETE_BATCH_SIZE])
+        if not batch:
+            return deleted
+        with transaction.atomic():
+            rows = model.objects.filter(pk__in=batch)
+            if tombstones:
+                record_tombstones(rows)
+            deleted += rows._raw_delete(rows.db)
+
+
+def update_in_batches(queryset, **values):
+    """Apply ``values`` to the rows of ``queryset`` in primary key batches."""
+    model = queryset.model
+    filters = ~Q(**values)
+    changes = dict(values)
+    if model in TRACKED_MODELS:
+        # update() skips auto_now, bump it so the change reaches delta sync.
+        changes["updated_at"] = timezone.now()
+    updated = 0
+    while True:
+        batch = list(
+            queryset.filter(filters).values_list("pk", flat=True)[
+                : settings.DELETE_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            return updated
+        updated += model.objects.filter(pk__in=batch).update(**changes)
+
+
+def purge_template_rows(template_id):
+    links = Template.categories.through.objects
+    # Whose category counts change, worked out before the rows are gone.
+    owners = template_category_owner_ids(template_id)
+    answering = set(answering_user_ids(field__template_id=template_id))
+    deleted = delete_in_batches(
+        EntryFieldAnswer.objects.filter(field__template_id=template_id)
+    )
+    deleted += delete_in_batches(TemplateField.objects.filter(template_id=template_id))
+    deleted += delete_in_batches(links.filter(template_id=template_id))
+    update_in_batches(
+        JournalEntry.objects.filter(template_id=template_id),
+        template=None,
+        missing_required_count=0,
+    )
+    deleted += delete_in_batches(Template.objects.filter(uuid=template_id))
+    invalidate_category_facets(*owners)
+    invalidate_field_analytics(*answering)
+    return deleted
+
+
+def purge_user_rows(user_id):
+    links = Template.categories.through.objects
+    templates = Template.objects.filter(created_by_id=user_id)
+    categories = Category.objects.filter(created_by_id=user_id)
+
+    # The account's own tombstones go with it, only other users need them.
+    deleted = delete_in_batches(
+        EntryFieldAnswer.objects.filter(entry__created_by_id=user_id), tombstones=False
+    )
+    answering = set(answering_user_ids(field__template__created_by_id=user_id))
+    deleted += delete_in_batches(
+        EntryFieldAnswer.objects.filter(field__template__created_by_id=user_id)
+    )
+    # Entries on other users' templates leave their counters behind.
+    foreign_entries = (
+        JournalEntry.objects.filter(created_by_id=user_id)
+        .exclude(template__created_by_id=user_id)
+        .exclude(template=None)
+        .values_list("template")
+        .annotate(count=Count("*"))
+    )
+    apply_count_deltas(
+        "entries_count", {template_id: -count for template_id, count in foreign_entries}
+    )
+    deleted += delete_in_batches(
+        JournalEntry.objects.filter(created_by_id=user_id), tombstones=False
+    )
+    update_in_batches(
+        JournalEntry.objects.filter(template__created_by_id=user_id),
+        template=None,
+        missing_required_count=0,
+    )
+    deleted += delete_in_batches(
+        TemplateField.objects.filter(template__created_by_id=user_id), tombstones=False
+    )
+    update_in_batches(
+        TemplateField.objects.filter(category__created_by_id=user_id), category=None
+    )
+    deleted += delete_in_batches(
+        links.filter(
+            Q(template__created_by_id=user_id) | Q(category__created_by_id=user_id)
+        )
+    )
+    deleted += delete_in_batches(templates, tombstones=False)
+    deleted += delete_in_batches(categories, tombstones=False)
+
+    invalidate_category_facets(user_id)
+    invalidate_field_analytics(user_id, *answering)
+
+    exports = ExportJob.objects.filter(requested_by_id=user_id).exclude(artifact=None)
+    for artifact in exports.values_list("artifact", flat=True):
+        export_storage().delete(artifact)
+
+    # What is left (admin log, permissions) is small enough for the collector.
+    deleted += get_user_model().objects.filter(pk=user_id).delete()[0]
+    return deleted
+
+
+def run_deletion_job(job_id, purge):
+    job = DeletionJob.objects.get(uuid=job_id)
+    DeletionJob.objects.filter(uuid=job_id).update(status="running")
+    try:
+        deleted = purge(job.target_id)
+    except Exception as exc:
+        DeletionJob.objects.filter(uuid=job_id).update(status="failed", error=str(exc))
+        raise
+    DeletionJob.objects.filter(uuid=job_id).update(status="done", deleted_rows=deleted)
+    return deleted
+
+
+@shared_task
+def purge_template(job_id):
+    """Delete a template with its fields and answers in bounded batches."""
+    return run_deletion_job(job_id, purge_template_rows)
+
+
+@shared_task
+def purge_user(job_id):
+    """Delete an account and everything it owns in bounded batches."""
+    return run_deletion_job(job_id, purge_user_rows)
+
+
+@shared_task
+def purge_tombstones():
+    """Drop the sync tombstones older than the retention period."""
+    retention = timedelta(days=sync_settings()["TOMBSTONE_RETENTION_DAYS"])
+    return delete_in_batches(
+        Tombstone.objects.filter(deleted_at__lt=timezone.now() - retention)
+    )
+
+
+@shared_task
+def schedule_weekly_digests(week_start=None):
+    """Queue a digest chunk for the users still missing the week's digest."""
+    week_start = date.fromisoformat(week_start) if week_start else last_week_start()
+    chunks = 0
+    for user_ids in pending_user_chunks(week_start, digests_settings()["CHUNK_SIZE"]):
+        generate_weekly_digests.delay(user_ids, week_start.isoformat())
+        chunks += 1
+    return chunks
+
+
+# Acknowledged once done, so a chunk lost with its worker is run again.
+@shared_task(acks_late=True)
+def generate_weekly_digests(user_ids, week_start):
+    """Compute and store the digests of a chunk of users."""
+    return store_weekly_digests(user_ids, date.fromisoformat(week_start))
+
+
+@shared_task
+def run_export(job_id):
+    """Write the archive of an export job in chunks."""
+    jobs = ExportJob.objects.filter(uuid=job_id)
+    jobs.update(status="running", updated_at=timezone.now())
+    try:
+        artifact = write_export(jobs.get())
+    except Exception:
+        # Clients see a generic message, the traceback goes to the worker log.
+        jobs.update(status="failed", error="The export could not be written.")
+        raise
+    jobs.update(status="done", artifact=artifact, expires_at=expiry_time())
+    return artifact
+
+
+@shared_task
+def fail_stale_exports():
+    """Fail the exports left pending or running, e.g. by a worker that died."""
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=exports_settings()["STALE_MINUTES"])
+    return ExportJob.objects.filter(
+        status__in=ExportJob.ACTIVE_STATUSES, updated_at__lt=cutoff
+    ).update(status="failed", error="The export did not finish.", updated_at=now)
+
+
+@shared_task
+def expire_exports():
+    """Delete the export archives past their expiry."""
+    expired = list(
+        ExportJob.objects.filter(
+            status="done", expires_at__lte=timezone.now()
+        ).values_list("pk", "artifact")
+    )
+    storage = export_storage()
+    for _, artifact in expired:
+        storage.delete(artifact)
+    return ExportJob.objects.filter(pk__in=[pk for pk, _ in expired]).update(
+        status="expired", artifact=None
+    )
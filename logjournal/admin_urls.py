@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+# The admin is installed without autodiscovery, see logjournal/lazy.py.
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
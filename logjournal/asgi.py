@@ -2,6 +2,8 @@
 ASGI config for logjournal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to ``EVENTS["PATH"]`` get the Server-Sent Events change feed of
+``logjournal.events``, everything else goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "logjournal.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from logjournal.events import events_settings, sse_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == events_settings()["PATH"]:
+        return await sse_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,41 @@
+"""
+Cache backends that report hit and miss counts to the metrics module.
+"""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import record_cache_lookup
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    """Count lookups made through ``get`` and ``get_many``."""
+
+    metrics_label = "cache"
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        hit = value is not _missing
+        record_cache_lookup(self.metrics_label, hit)
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache_lookup(self.metrics_label, True, len(found))
+        record_cache_lookup(self.metrics_label, False, len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.metrics_label = name
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.metrics_label = "redis"
@@ -1,6 +1,16 @@
 # <project_name>/celery.py
 import os
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    celeryd_init,
+    task_prerun,
+    task_postrun,
+    worker_init,
+    worker_process_shutdown,
+)
+
+from . import metrics, querylog, queues
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'logjournal.settings')
@@ -11,4 +21,18 @@ app = Celery('logjournal')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks in all registered Django app configs
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Task runtime and broker queue-wait metrics
+before_task_publish.connect(metrics.stamp_task_published)
+task_prerun.connect(metrics.task_started)
+task_postrun.connect(metrics.task_finished)
+worker_process_shutdown.connect(metrics.worker_process_exited)
+
+# Slow query capture for task code
+task_prerun.connect(querylog.task_started)
+task_postrun.connect(querylog.task_finished)
+
+# Per-queue worker concurrency and prefetching
+celeryd_init.connect(queues.configure_worker)
+worker_init.connect(queues.apply_worker_profile)
@@ -0,0 +1,219 @@
+"""
+Response compression negotiated from ``Accept-Encoding``.
+
+Supports zstd (``compression.zstd`` on Python 3.14, else the ``zstandard``
+package), brotli (the ``brotli`` package) and gzip, preferring them in the
+order of ``COMPRESSION["ENCODINGS"]`` among those the client accepts.
+Streaming responses are compressed chunk by chunk, flushing after every
+chunk so clients keep receiving data; other responses are compressed only
+when at least ``MIN_SIZE`` bytes long.
+"""
+
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+DEFAULTS = {
+    "ENCODINGS": ["zstd", "br", "gzip"],
+    "LEVELS": {"zstd": 3, "br": 4, "gzip": 6},
+    "MIN_SIZE": 1024,
+    # Already compressed payloads, not worth spending CPU on.
+    "EXCLUDED_TYPES": ["image/", "video/", "application/gzip", "application/zip"],
+}
+
+
+def compression_settings():
+    options = {**DEFAULTS, **getattr(settings, "COMPRESSION", {})}
+    options["LEVELS"] = {**DEFAULTS["LEVELS"], **options["LEVELS"]}
+    return options
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, flush=False):
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data, flush=False):
+        output = self._compressor.process(data)
+        if flush:
+            output += self._compressor.flush()
+        return output
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        if zstd is not None:
+            self._compressor = zstd.ZstdCompressor(level=level)
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data, flush=False):
+        if zstd is not None:
+            mode = (
+                zstd.ZstdCompressor.FLUSH_BLOCK
+                if flush
+                else zstd.ZstdCompressor.CONTINUE
+            )
+            return self._compressor.compress(data, mode=mode)
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return output
+
+    def finish(self):
+        if zstd is not None:
+            return self._compressor.flush(mode=zstd.ZstdCompressor.FLUSH_FRAME)
+        return self._compressor.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstd is not None or zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def parse_accept_encoding(header):
+    """Return the ``{coding: q}`` preferences of an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header, encodings):
+    """Pick the first of ``encodings`` the client accepts, or ``None``."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(coding, wildcard), -index, coding)
+        for index, coding in enumerate(encodings)
+        if coding in COMPRESSORS
+    ]
+    candidates = [candidate for candidate in candidates if candidate[0] > 0]
+    if not candidates:
+        return None
+    return max(candidates)[2]
+
+
+def compress(encoding, data, level):
+    compressor = COMPRESSORS[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_sequence(compressor, sequence):
+    for chunk in sequence:
+        output = compressor.compress(chunk, flush=True)
+        if output:
+            yield output
+    yield compressor.finish()
+
+
+async def acompress_sequence(compressor, sequence):
+    async for chunk in sequence:
+        output = compressor.compress(chunk, flush=True)
+        if output:
+            yield output
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client supports."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        options = compression_settings()
+        content_type = response.get("Content-Type", "")
+        if any(
+            content_type.startswith(excluded) for excluded in options["EXCLUDED_TYPES"]
+        ):
+            return response
+        if not response.streaming and len(response.content) < options["MIN_SIZE"]:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), options["ENCODINGS"]
+        )
+        if encoding is None:
+            return response
+        level = options["LEVELS"][encoding]
+
+        if response.streaming:
+            compressor = COMPRESSORS[encoding](level)
+            if response.is_async:
+                response.streaming_content = acompress_sequence(
+                    compressor, response.streaming_content
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    compressor, response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(encoding, response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The compressed body is no longer byte-for-byte what a strong ETag
+        # promised, so weaken it (as GZipMiddleware does).
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
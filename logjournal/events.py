@@ -0,0 +1,250 @@
+"""
+Per-user change feed served as Server-Sent Events.
+
+Saving or deleting an entry, answer or template publishes a small event to
+its owner once the transaction commits. ``EVENTS["BROKER"]`` fans events out:
+``RedisBroker`` through Redis pub/sub so every ASGI process sees the writes
+of every web and celery process, ``InMemoryBroker`` within one process only,
+for tests and single-process development servers.
+
+``logjournal/asgi.py`` routes ``EVENTS["PATH"]`` to ``sse_application``.
+Clients authenticate with their JWT access token, in the Authorization
+header or, as ``EventSource`` cannot set headers, the ``token`` query
+parameter. Events are hints: a client that reconnects, or falls behind by
+more than ``QUEUE_SIZE`` events, catches up through the ``sync`` endpoint.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BROKER": "logjournal.events.RedisBroker",
+    "REDIS_URL": "redis://127.0.0.1:6379/1",
+    "PATH": "/api/events",
+    "KEEPALIVE": 15,
+    "QUEUE_SIZE": 100,
+}
+
+CHANNEL_PREFIX = "logjournal:events:"
+
+
+def events_settings():
+    return {**DEFAULTS, **getattr(settings, "EVENTS", {})}
+
+
+class InMemoryBroker:
+    """Deliver events to the subscribers of the current process."""
+
+    def __init__(self, options):
+        self.queue_size = options["QUEUE_SIZE"]
+        self._subscribers = defaultdict(set)
+
+    def publish(self, user_id, event):
+        self.dispatch(user_id, event)
+
+    def dispatch(self, user_id, event):
+        for loop, queue in list(self._subscribers.get(user_id, ())):
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue, event):
+        if not queue.full():
+            queue.put_nowait(event)
+
+    async def listen(self, user_id):
+        pass
+
+    async def unlisten(self, user_id):
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        """Yield a queue receiving the events of ``user_id``."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        first = not self._subscribers[user_id]
+        self._subscribers[user_id].add(subscriber)
+        try:
+            if first:
+                await self.listen(user_id)
+            yield subscriber[1]
+        finally:
+            self._subscribers[user_id].discard(subscriber)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+                await self.unlisten(user_id)
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    Publish events to Redis and relay them to the local subscribers.
+
+    Each process holds one pub/sub connection, subscribed to the channels of
+    the users with an open feed in that process.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.url = options["REDIS_URL"]
+        self._client = None
+        self._pubsub = None
+        self._reader = None
+
+    def publish(self, user_id, event):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(event))
+
+    async def listen(self, user_id):
+        if self._pubsub is None:
+            client = redis.asyncio.Redis.from_url(self.url)
+            self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(f"{CHANNEL_PREFIX}{user_id}")
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def unlisten(self, user_id):
+        await self._pubsub.unsubscribe(f"{CHANNEL_PREFIX}{user_id}")
+
+    async def _read(self):
+        async for message in self._pubsub.listen():
+            if message["type"] != "message":
+                continue
+            user_id = message["channel"].decode().removeprefix(CHANNEL_PREFIX)
+            self.dispatch(int(user_id), json.loads(message["data"]))
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        options = events_settings()
+        _broker = import_string(options["BROKER"])(options)
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == "EVENTS":
+        _broker = None
+
+
+def publish(user_id, event):
+    """Send ``event`` to the feeds of ``user_id`` after the current commit."""
+
+    def send():
+        try:
+            get_broker().publish(user_id, event)
+        except Exception:
+            # The feed is best effort, never fail the write over it.
+            logger.exception("Could not publish %s event", event.get("type"))
+
+    transaction.on_commit(send)
+
+
+async def authenticate(scope):
+    """Return the id of the active user the request's token belongs to."""
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    headers = dict(scope["headers"])
+    scheme, _, token = headers.get(b"authorization", b"").decode().partition(" ")
+    if scheme not in api_settings.AUTH_HEADER_TYPES:
+        query = parse_qs(scope["query_string"].decode())
+        token = query.get("token", [""])[0]
+    if not token:
+        return None
+    try:
+        user_id = AccessToken(token)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+    users = get_user_model().objects.filter(pk=user_id, is_active=True)
+    # The claim may hold the id as a string, use the model's own type.
+    return await users.values_list("pk", flat=True).afirst()
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+
+
+async def sse_application(scope, receive, send):
+    """ASGI application streaming the events of the authenticated user."""
+    user_id = await authenticate(scope)
+    if user_id is None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        body = b'{"detail": "Authentication credentials were not provided."}'
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Stop nginx from buffering the stream.
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    keepalive = events_settings()["KEEPALIVE"]
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        async with get_broker().subscribe(user_id) as queue:
+            await send(
+                {"type": "http.response.body", "body": b": open\n\n", "more_body": True}
+            )
+            while True:
+                event = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {event, disconnected},
+                    timeout=keepalive,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    event.cancel()
+                    return
+                if event in done:
+                    body = format_event(event.result())
+                else:
+                    event.cancel()
+                    body = b": keepalive\n\n"
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+    finally:
+        disconnected.cancel()
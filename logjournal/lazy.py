@@ -0,0 +1,37 @@
+"""
+URL patterns whose views are imported by the first request they serve.
+
+The schema views and the admin are rarely requested but import a lot, so
+keeping them out of the URLconf import shortens the startup of every web
+process. Run ``manage.py profile_startup`` to see where the time goes.
+"""
+
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Return a view calling ``dotted_path.as_view(**initkwargs)`` once imported."""
+    view = None
+
+    def lazy(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    # As for the APIView it wraps, CSRF is left to its authentication classes.
+    lazy.csrf_exempt = True
+    return lazy
+
+
+def lazy_include(route, urlconf, namespace):
+    """Return ``path(route, include((urlconf, namespace)))`` importing ``urlconf``
+    on first use: the first request under ``route`` or call to ``reverse()``."""
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf,
+        app_name=namespace,
+        namespace=namespace,
+    )
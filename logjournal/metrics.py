@@ -0,0 +1,209 @@
+"""
+Prometheus instrumentation for the web and worker processes.
+
+Metrics are recorded with ``prometheus_client`` when it is installed and are
+silently skipped otherwise. In multi-process deployments (gunicorn workers,
+the celery prefork pool) point ``PROMETHEUS_MULTIPROC_DIR`` at a directory
+shared by all processes of the host, wipe it on deploy, and the ``/metrics``
+view aggregates every process' samples through the multiprocess collector.
+
+The ``/metrics/`` view only answers clients in ``METRICS["ALLOWED_NETWORKS"]``
+or sending ``Authorization: Bearer <METRICS["TOKEN"]>``; everyone else gets a
+403.
+"""
+
+import ipaddress
+import os
+import secrets
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+
+DEFAULTS = {
+    "ALLOWED_NETWORKS": ["127.0.0.1/32", "::1/128"],
+    "TOKEN": None,
+}
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        "logjournal_http_request_duration_seconds",
+        "Time spent handling a request, by URL name and response status.",
+        ["view", "method", "status"],
+        buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_DB_QUERIES = prometheus_client.Histogram(
+        "logjournal_http_request_db_queries",
+        "Number of database queries issued while handling a request.",
+        ["view"],
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+    CACHE_LOOKUPS = prometheus_client.Counter(
+        "logjournal_cache_lookups_total",
+        "Cache lookups by cache and result (hit or miss).",
+        ["cache", "result"],
+    )
+    TASK_RUNTIME = prometheus_client.Histogram(
+        "logjournal_celery_task_duration_seconds",
+        "Time spent executing a celery task.",
+        ["task", "state"],
+        buckets=TASK_BUCKETS,
+    )
+    TASK_QUEUE_WAIT = prometheus_client.Histogram(
+        "logjournal_celery_task_queue_wait_seconds",
+        "Time between publishing a celery task and a worker starting it.",
+        ["task", "queue"],
+        buckets=TASK_BUCKETS,
+    )
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries run through it."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def view_label(request):
+    """Return the URL name the request resolved to, used as metric label."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.view_name:
+        return "<unresolved>"
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """Record request latency and query counts for every request."""
+
+    def __init__(self, get_response):
+        if prometheus_client is None:
+            raise MiddlewareNotUsed("prometheus_client is not installed")
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(
+            duration
+        )
+        REQUEST_DB_QUERIES.labels(view).observe(queries.count)
+        return response
+
+
+def record_cache_lookup(cache, hit, count=1):
+    """Count ``count`` cache lookups against ``cache`` as hits or misses."""
+    if prometheus_client is None or not count:
+        return
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+# Celery signal handlers, connected in ``logjournal/celery.py``.
+
+_task_started = {}
+
+
+def stamp_task_published(headers=None, **kwargs):
+    """Stamp outgoing task messages with their publish time."""
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+def task_started(task_id=None, task=None, **kwargs):
+    if prometheus_client is None:
+        return
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at:
+        delivery_info = task.request.delivery_info or {}
+        queue = delivery_info.get("routing_key") or "default"
+        TASK_QUEUE_WAIT.labels(task.name, queue).observe(
+            max(time.time() - published_at, 0)
+        )
+
+
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if prometheus_client is None or started is None:
+        return
+    TASK_RUNTIME.labels(task.name, state or "UNKNOWN").observe(
+        time.perf_counter() - started
+    )
+
+
+def mark_process_dead(pid):
+    """
+    Drop the live samples of an exited process in multi-process mode.
+
+    Call from gunicorn's ``child_exit`` hook; worker pool processes are
+    handled through celery's ``worker_process_shutdown`` signal.
+    """
+    if prometheus_client is not None and "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+def worker_process_exited(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, "METRICS", {})}
+
+
+def scrape_allowed(request):
+    """Return whether ``request`` comes from an allowed network or has the token."""
+    options = metrics_settings()
+    token = options["TOKEN"]
+    if token:
+        scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(given, token):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in options["ALLOWED_NETWORKS"]
+    )
+
+
+def metrics_view(request):
+    """Expose the collected metrics in the Prometheus text format."""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    if prometheus_client is None:
+        raise Http404("Metrics are not available.")
+
+    registry = prometheus_client.REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        prometheus_client.generate_latest(registry),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
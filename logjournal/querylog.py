@@ -0,0 +1,182 @@
+"""
+Slow query capture.
+
+A database execute wrapper times every query run while handling a request or
+a celery task. Queries slower than ``SLOW_QUERY_LOG["THRESHOLD_MS"]`` are
+normalized into a fingerprint (literals and ``IN`` lists collapsed) and, once
+the request or task is done, aggregated per fingerprint and origin into the
+``journal.SlowQuery`` table, which holds at most ``MAX_FINGERPRINTS`` rows;
+the least recently seen ones make room for new fingerprints. The middleware
+goes before ``MetricsMiddleware`` so storing them is not counted against the
+request.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .metrics import view_label
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "THRESHOLD_MS": 200,
+    "MAX_FINGERPRINTS": 1000,
+}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def query_log_settings():
+    return {**DEFAULTS, **getattr(settings, "SLOW_QUERY_LOG", {})}
+
+
+def normalize(sql):
+    """Replace literals with ``?`` and collapse value lists to ``(...)``."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    sql = _ROWS_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    """Return the normalized statement and its digest."""
+    normalized = normalize(sql)
+    return normalized, hashlib.sha1(normalized.encode()).hexdigest()
+
+
+class SlowQueryRecorder:
+    """Execute wrapper collecting the queries slower than the threshold."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.captured = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= self.threshold_ms:
+                self.captured.append((sql, duration))
+
+    def flush(self, origin):
+        """Aggregate the captured queries into the slow query table."""
+        if not self.captured:
+            return
+        captured, self.captured = self.captured, []
+        try:
+            with transaction.atomic():
+                store(origin, captured)
+        except DatabaseError:
+            logger.exception("Could not store slow queries for %s", origin)
+
+
+def store(origin, captured):
+    from journal.models import SlowQuery
+
+    aggregated = defaultdict(lambda: [None, 0, 0.0, 0.0])
+    for sql, duration in captured:
+        normalized, digest = fingerprint(sql)
+        stats = aggregated[digest]
+        stats[0] = normalized
+        stats[1] += 1
+        stats[2] += duration
+        stats[3] = max(stats[3], duration)
+
+    origin = origin[:255]
+    limit = query_log_settings()["MAX_FINGERPRINTS"]
+    now = timezone.now()
+    for digest, (normalized, count, total, longest) in aggregated.items():
+        existing = SlowQuery.objects.filter(fingerprint=digest, origin=origin)
+        updated = existing.update(
+            count=F("count") + count,
+            total_time=F("total_time") + total,
+            max_time=Greatest(F("max_time"), longest),
+            updated_at=now,
+        )
+        if updated:
+            continue
+        surplus = SlowQuery.objects.count() - limit + 1
+        if surplus > 0:
+            least_recent = SlowQuery.objects.order_by("updated_at", "pk")
+            SlowQuery.objects.filter(
+                pk__in=list(least_recent.values_list("pk", flat=True)[:surplus])
+            ).delete()
+        try:
+            # In a savepoint, so a conflict does not break an outer transaction.
+            with transaction.atomic():
+                SlowQuery.objects.create(
+                    fingerprint=digest,
+                    origin=origin,
+                    sql=normalized,
+                    count=count,
+                    total_time=total,
+                    max_time=longest,
+                )
+        except IntegrityError:
+            # Another process recorded the fingerprint first.
+            existing.update(
+                count=F("count") + count,
+                total_time=F("total_time") + total,
+                max_time=Greatest(F("max_time"), longest),
+                updated_at=now,
+            )
+
+
+class SlowQueryMiddleware:
+    """Capture slow queries of each request, attributed to its URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = query_log_settings()
+        if not options["ENABLED"]:
+            return self.get_response(request)
+
+        recorder = SlowQueryRecorder(options["THRESHOLD_MS"])
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        recorder.flush(view_label(request))
+        return response
+
+
+# Celery signal handlers, connected in ``logjournal/celery.py``.
+
+_task_recorders = {}
+
+
+def task_started(task_id=None, task=None, **kwargs):
+    options = query_log_settings()
+    if not options["ENABLED"]:
+        return
+    recorder = SlowQueryRecorder(options["THRESHOLD_MS"])
+    connection.execute_wrappers.append(recorder)
+    _task_recorders[task_id] = recorder
+
+
+def task_finished(task_id=None, task=None, **kwargs):
+    recorder = _task_recorders.pop(task_id, None)
+    if recorder is None:
+        return
+    if recorder in connection.execute_wrappers:
+        connection.execute_wrappers.remove(recorder)
+    recorder.flush(f"task:{task.name}")
@@ -0,0 +1,81 @@
+"""
+Celery queues and the workers consuming them.
+
+``CELERY_TASK_ROUTES`` sends tasks to the ``interactive``, ``analytics`` or
+``bulk`` queue so a long purge or export never sits in front of quick jobs.
+Run a worker per queue, e.g. ``celery -A logjournal worker -Q bulk``; a
+worker consuming a single queue takes its concurrency and prefetch
+multiplier from ``CELERY_WORKER_QUEUE_PROFILES`` unless they are given on
+its command line.
+
+``queue_depths`` counts the messages waiting in each queue, as printed by
+the ``queue_depths`` management command.
+"""
+
+import click
+from click.core import ParameterSource
+from django.conf import settings
+
+
+def single_queue(queues):
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    queues = [queue.strip() for queue in queues or () if queue.strip()]
+    return queues[0] if len(queues) == 1 else None
+
+
+# Celery signal handler, connected in ``logjournal/celery.py``.
+
+
+def given_explicitly(name, options, configured):
+    """Return whether the worker option ``name`` was given by the operator."""
+    # Celery fills options left out with the configured value, so ask click.
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None and name in ctx.params:
+        return ctx.get_parameter_source(name) not in (None, ParameterSource.DEFAULT)
+    return options.get(name) not in (None, configured)
+
+
+def configure_worker(conf=None, instance=None, options=None, **kwargs):
+    """Pick the profile of the queue a worker consumes, on ``celeryd_init``."""
+    options = options or {}
+    queue = single_queue(options.get("queues"))
+    profile = getattr(settings, "CELERY_WORKER_QUEUE_PROFILES", {}).get(queue)
+    if profile is None:
+        return
+    overrides = {}
+    if not given_explicitly("concurrency", options, conf.worker_concurrency):
+        overrides["concurrency"] = conf.worker_concurrency = profile["concurrency"]
+    if not given_explicitly(
+        "prefetch_multiplier", options, conf.worker_prefetch_multiplier
+    ):
+        overrides["prefetch_multiplier"] = conf.worker_prefetch_multiplier = (
+            profile["prefetch_multiplier"]
+        )
+    if instance is not None:
+        instance.queue_profile = overrides
+
+
+def apply_worker_profile(sender=None, **kwargs):
+    """Set the picked profile on the worker, on ``worker_init``."""
+    # The worker prefers the option values Celery passes it over ``conf``,
+    # and the command line always passes a prefetch multiplier.
+    for name, value in getattr(sender, "queue_profile", {}).items():
+        setattr(sender, name, value)
+
+
+def queue_depths(app):
+    """Return the number of messages waiting in each configured queue."""
+    depths = {}
+    with app.connection_for_read() as connection:
+        for queue in app.conf.task_queues:
+            # A failed passive declare can close the channel, use one each.
+            with connection.channel() as channel:
+                try:
+                    ok = channel.queue_declare(queue=queue.name, passive=True)
+                except connection.channel_errors:
+                    # Never declared, nothing was ever sent to it.
+                    depths[queue.name] = 0
+                else:
+                    depths[queue.name] = ok.message_count
+    return depths
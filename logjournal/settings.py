@@ -12,8 +12,11 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 from dotenv import load_dotenv
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
+from kombu import Queue
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,7 +42,8 @@ CORS_ALLOWED_ORIGINS = [
 # Application definition
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    # Admin modules are discovered by logjournal/admin_urls.py on first use.
+    "django.contrib.admin.apps.SimpleAdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -59,6 +63,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the queries storing slow queries are not counted as the
+    # request's own by the metrics.
+    "logjournal.querylog.SlowQueryMiddleware",
+    "logjournal.metrics.MetricsMiddleware",
+    "logjournal.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -108,6 +117,27 @@ DATABASES = {
     }
 }
 
+# Cache
+# Lookups are counted in the ``logjournal_cache_lookups_total`` metric.
+# Cached facets and analytics are invalidated by writes in every process, so
+# deployments need a shared cache: set CACHE_REDIS_URL. The process-local
+# fallback is for development and fails ``manage.py check --deploy``.
+
+if os.getenv("CACHE_REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "logjournal.cache.InstrumentedRedisCache",
+            "LOCATION": os.getenv("CACHE_REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "logjournal.cache.InstrumentedLocMemCache",
+            "LOCATION": "logjournal",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,6 +165,14 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": True,
 }
 
+# The schema served at api-schema/, see api/schema.py. It is generated once
+# per CODE_VERSION, e.g. the commit deployed, and kept in memory and at PATH;
+# run ``manage.py build_schema`` at release time to have it ready.
+API_SCHEMA = {
+    "CODE_VERSION": os.getenv("CODE_VERSION"),
+    "PATH": BASE_DIR / "api-schema.json",
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -144,6 +182,15 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 50,
@@ -153,6 +200,31 @@ REST_FRAMEWORK = {
     ]
 }
 
+# On-demand sampling profiler for staff requests, see api/profiling.py
+API_PROFILING = {
+    "ENABLED": os.getenv("API_PROFILING_ENABLED") == "1",
+    "INTERVAL": 0.005,
+    "MAX_SAMPLES": 2000,
+    "RETENTION": 3600,
+    "MAX_PROFILES": 50,
+}
+
+# Slow query capture, aggregated in the admin under "Slow queries"
+SLOW_QUERY_LOG = {
+    "ENABLED": True,
+    "THRESHOLD_MS": 200,
+    "MAX_FINGERPRINTS": 1000,
+}
+
+# Binary MessagePack bodies for clients that ask for them
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(
+        1, "api.renderers.MessagePackRenderer"
+    )
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].insert(
+        1, "api.parsers.MessagePackParser"
+    )
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -166,9 +238,124 @@ CELERY_BROKER_URL = 'redis://127.0.0.1:6379/0' # The last digit is the database
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Task queues, see logjournal/queues.py: "interactive" for quick jobs users
+# wait on, "analytics" for reports and digests, "bulk" for purges, imports
+# and exports. Unrouted tasks are interactive.
+CELERY_TASK_QUEUES = (
+    Queue("interactive", routing_key="interactive"),
+    Queue("analytics", routing_key="analytics"),
+    Queue("bulk", routing_key="bulk"),
+)
+CELERY_TASK_DEFAULT_QUEUE = "interactive"
+CELERY_TASK_DEFAULT_PRIORITY = 0
+# With the Redis transport 0 is the highest priority and 9 the lowest.
+CELERY_TASK_ROUTES = {
+    "journal.tasks.purge_*": {"queue": "bulk", "priority": 6},
+    "journal.tasks.*_export*": {"queue": "bulk", "priority": 6},
+    "journal.tasks.*_weekly_digests": {"queue": "analytics", "priority": 3},
+}
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "sep": ":",
+}
+# Applied to a worker consuming a single queue (``-Q bulk``) unless given on
+# its command line: many slots and prefetching for short tasks, few slots
+# and no prefetching for long ones.
+CELERY_WORKER_QUEUE_PROFILES = {
+    "interactive": {"concurrency": 8, "prefetch_multiplier": 4},
+    "analytics": {"concurrency": 2, "prefetch_multiplier": 1},
+    "bulk": {"concurrency": 2, "prefetch_multiplier": 1},
+}
+
+# Response compression, see logjournal/compression.py
+COMPRESSION = {
+    "ENCODINGS": ["zstd", "br", "gzip"],
+    "LEVELS": {"zstd": 3, "br": 4, "gzip": 6},
+    "MIN_SIZE": 1024,
+}
+
+# Seconds the per-user category counts stay cached, see journal/facets.py
+CATEGORY_FACETS = {
+    "TIMEOUT": 300,
+}
+
+# Field correlation analytics, see journal/analytics.py (needs numpy)
+FIELD_ANALYTICS = {
+    "TIMEOUT": 3600,
+    "BINS": 10,
+}
+
+# Most sub-requests accepted by a single api/batch call
+BATCH_MAX_OPERATIONS = 25
+
+# Rows removed per statement by the background template and account purges
+DELETE_BATCH_SIZE = 1000
+
+# Weekly digests, see journal/digests.py. Users are fanned out to celery in
+# chunks of CHUNK_SIZE, each computed with a handful of grouped queries.
+DIGESTS = {
+    "CHUNK_SIZE": 500,
+    "TOP_FIELDS": 3,
+}
+
+# Account exports, see journal/exports.py. Rows are written CHUNK_SIZE at a
+# time and the archives are deleted RETENTION_HOURS after they are ready.
+EXPORTS = {
+    "CHUNK_SIZE": 2000,
+    "RETENTION_HOURS": 24,
+    "STALE_MINUTES": 60,
+}
+
+# Delta sync for offline clients, see journal/sync.py. Cursors older than
+# the tombstone retention get a 410 and must run a full sync. A sync returns
+# at most PAGE_SIZE rows and a cursor to fetch the rest.
+SYNC = {
+    "OVERLAP_SECONDS": 30,
+    "TOMBSTONE_RETENTION_DAYS": 30,
+    "PUSH_MAX_CHANGES": 500,
+    "PAGE_SIZE": 1000,
+}
+
+# Prometheus scrapes, see logjournal/metrics.py. Only ALLOWED_NETWORKS, as
+# seen in REMOTE_ADDR, or requests with "Authorization: Bearer <TOKEN>".
+METRICS = {
+    "ALLOWED_NETWORKS": ["127.0.0.1/32", "::1/128"],
+    "TOKEN": os.getenv("METRICS_TOKEN"),
+}
+
+# Change feed served by logjournal/asgi.py, see logjournal/events.py
+EVENTS = {
+    "BROKER": "logjournal.events.RedisBroker",
+    "REDIS_URL": os.getenv("EVENTS_REDIS_URL", "redis://127.0.0.1:6379/1"),
+    "PATH": "/api/events",
+    "KEEPALIVE": 15,
+}
+
 # Celery Beat Scheduler using the Django database
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Periodic tasks installed in the beat database on startup
+CELERY_BEAT_SCHEDULE = {
+    "purge-tombstones": {
+        "task": "journal.tasks.purge_tombstones",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "fail-stale-exports": {
+        "task": "journal.tasks.fail_stale_exports",
+        "schedule": crontab(minute="*/15"),
+    },
+    "expire-exports": {
+        "task": "journal.tasks.expire_exports",
+        "schedule": crontab(minute=15),
+    },
+    "weekly-digests": {
+        "task": "journal.tasks.schedule_weekly_digests",
+        # Late enough on Monday for Sunday to be over in every time zone.
+        "schedule": crontab(hour=12, minute=0, day_of_week="mon"),
+    },
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -186,6 +373,18 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+    # Account export archives, only served through the API to their owner.
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": BASE_DIR / "exports"},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
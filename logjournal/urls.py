@@ -13,20 +13,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from django.views.generic import TemplateView
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from logjournal.lazy import lazy_include, lazy_view
+from logjournal.metrics import metrics_view
 
 urlpatterns = [
     path('', TemplateView.as_view(template_name='index.html'), name='home'),
-    path('admin/', admin.site.urls),
+    lazy_include('admin/', 'logjournal.admin_urls', 'admin'),
     path('api/', include(('api.urls', 'api'), namespace='api')),
-    path('api-schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api-schema/', lazy_view('api.schema.CachedSchemaView'), name='schema'),
     # Optional UI:
-    path('api-docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('api-docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)